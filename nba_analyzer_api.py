@@ -0,0 +1,319 @@
+import pandas as pd
+import numpy as np
+import os
+import io
+import time
+import contextlib
+from dataclasses import dataclass, field
+from nba_data_processor import load_and_preprocess_data, scale_data, perform_kmeans_clustering
+from nba_player_analyzer import assign_cluster_roles, NBA_DRILLS
+from nba_percentiles import PercentileEngine
+from nba_model_runtime import ClusterScorer
+from nba_league_snapshot import build_league_snapshot
+
+# API programática del analizador: un objeto que guarda el estado ajustado (datos, escalador,
+# modelo, medias y roles por clúster) y responde por lotes con DataFrames y dataclasses,
+# sin imprimir nada ni pedir datos por consola.
+
+DEFAULT_STATS_COLUMNS = [
+    'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT',
+    'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB', 'AST', 'STL',
+    'BLK', 'TOV', 'PF', 'PTS', 'GP', 'GS'
+]
+
+
+@dataclass
+class PlayerAnalysis:
+    """Resultado del análisis de un jugador (lo que analyze_player_weak_spots imprime)."""
+    player_name: str
+    team: str
+    cluster: int
+    role: str
+    comparison: pd.DataFrame
+    weak_stats: list
+    weak_areas: list
+    projected_stats: pd.Series
+    drills: dict = field(default_factory=dict)
+
+    @property
+    def has_weak_spots(self):
+        return bool(self.weak_stats)
+
+
+@dataclass
+class ReportResult:
+    """Resultado de generar el reporte PDF de un jugador."""
+    player_name: str
+    path: str
+    ok: bool
+    error: str = None
+
+
+class PlayerAnalyzer:
+    """
+    Analizador de jugadores con el estado ajustado en memoria. Se crea con PlayerAnalyzer.fit
+    (a partir del dataset) o directamente con los objetos ya entrenados.
+    """
+
+    def __init__(self, player_data_with_clusters, stats_columns, scaler, kmeans_model, cluster_means, cluster_roles,
+                 threshold_multiplier=0.75):
+        """
+        Args:
+            player_data_with_clusters (pd.DataFrame): DataFrame de jugadores con la columna 'CLUSTER'.
+            stats_columns (list): Columnas usadas para el clustering.
+            scaler (sklearn.preprocessing.StandardScaler): Escalador entrenado.
+            kmeans_model: Modelo de clustering entrenado (con cluster_centers_).
+            cluster_means (pd.DataFrame): Estadísticas promedio por clúster.
+            cluster_roles (dict): Rol de cada clúster.
+            threshold_multiplier (float): Umbral de áreas débiles de analyze_player_weak_spots.
+        """
+        self.player_data = player_data_with_clusters
+        self.stats_columns = list(stats_columns)
+        self.scaler = scaler
+        self.kmeans_model = kmeans_model
+        self.cluster_means = cluster_means
+        self.cluster_roles = cluster_roles
+        self.threshold_multiplier = threshold_multiplier
+
+        self.snapshot = build_league_snapshot(player_data_with_clusters, cluster_means, cluster_roles, self.stats_columns,
+                                              threshold_multiplier=threshold_multiplier)
+        self.percentile_engine = PercentileEngine(player_data_with_clusters, self.stats_columns)
+        self.scorer = ClusterScorer(scaler.mean_, scaler.scale_, kmeans_model.cluster_centers_, self.stats_columns,
+                                    [cluster_roles.get(c, "Rol Desconocido") for c in range(len(kmeans_model.cluster_centers_))])
+        # El centroide más cercano solo reproduce el clustering de los motores tipo KMeans; otros
+        # (gaussian_mixture asigna por probabilidad a posteriori) usan el predict del modelo
+        training_labels = self.scorer.assign_batch(player_data_with_clusters[self.stats_columns].to_numpy(dtype=float))
+        self.nearest_centroid = bool(np.array_equal(training_labels, player_data_with_clusters['CLUSTER'].to_numpy()))
+
+    @classmethod
+    def fit(cls, filepath, stats_columns=None, n_clusters=5, engine='kmeans', threshold_multiplier=0.75):
+        """
+        Carga el dataset y ajusta todo el pipeline (escalado, clustering, medias y roles) sin salida por consola.
+
+        Returns:
+            PlayerAnalyzer: El analizador ajustado, o None si el dataset no se pudo cargar.
+        """
+        stats_columns = stats_columns if stats_columns is not None else DEFAULT_STATS_COLUMNS
+        with contextlib.redirect_stdout(io.StringIO()):
+            stats_for_clustering, player_data_cleaned, _ = load_and_preprocess_data(filepath, stats_columns)
+            if stats_for_clustering is None:
+                return None
+            scaled_stats_df, scaler = scale_data(stats_for_clustering)
+            clusters, kmeans_model = perform_kmeans_clustering(scaled_stats_df, n_clusters, engine=engine)
+            player_data_cleaned['CLUSTER'] = clusters
+            # Igual que analyze_clusters, pero sin escribir el Excel ni imprimir
+            stats_columns = list(stats_for_clustering.columns)
+            cluster_means = player_data_cleaned.groupby('CLUSTER')[stats_columns].mean()
+            cluster_roles = assign_cluster_roles(cluster_means)
+        return cls(player_data_cleaned, stats_columns, scaler, kmeans_model, cluster_means, cluster_roles,
+                   threshold_multiplier=threshold_multiplier)
+
+    @property
+    def player_names(self):
+        """Nombres de jugador únicos, en el orden del dataset."""
+        return list(dict.fromkeys(self.snapshot.player_names))
+
+    def _positions(self, player_names):
+        """Posiciones en la instantánea de los jugadores pedidos (KeyError si alguno no existe)."""
+        player_names = self.player_names if player_names is None else list(player_names)
+        missing = [name for name in player_names if name not in self.snapshot]
+        if missing:
+            raise KeyError(f"Jugadores no encontrados en el dataset: {', '.join(missing[:5])}"
+                           + (f" y {len(missing) - 5} más" if len(missing) > 5 else ""))
+        return player_names, np.array([self.snapshot.position(name) for name in player_names], dtype=np.int64)
+
+    def summary_many(self, player_names=None):
+        """
+        Resumen de varios jugadores en una sola tabla.
+
+        Returns:
+            pd.DataFrame: Por jugador: equipo, clúster, rol, número de áreas débiles y la lista de estadísticas débiles.
+        """
+        player_names, positions = self._positions(player_names)
+        weak_mask = np.asarray(self.snapshot.arrays['weak_mask'], dtype=bool)[positions]
+        clusters = np.asarray(self.snapshot.arrays['cluster'])[positions]
+        stats = np.array(self.snapshot.stats_columns, dtype=object)
+        row_labels = [self.snapshot.row_labels[p] for p in positions]
+        return pd.DataFrame({
+            'PLAYER_NAME': player_names,
+            'TEAM_ABBREVIATION': self.player_data.loc[row_labels, 'TEAM_ABBREVIATION'].to_numpy()
+            if 'TEAM_ABBREVIATION' in self.player_data.columns else None,
+            'CLUSTER': clusters,
+            'ROLE': [self.cluster_roles.get(int(c), "Rol Desconocido") for c in clusters],
+            'N_WEAK': weak_mask.sum(axis=1),
+            'WEAK_STATS': [list(stats[row]) for row in weak_mask],
+        })
+
+    def compare_many(self, player_names=None, percentiles=True):
+        """
+        Tabla de comparación jugador vs. promedio de su clúster para varios jugadores, en formato largo.
+
+        Returns:
+            pd.DataFrame: Índice (PLAYER_NAME, STAT) y columnas 'Player Stats', 'Cluster Average',
+                          'Difference', 'Percentage Difference' (numérica), 'Projected', 'Weak' y,
+                          si percentiles es True, 'League Percentile' y 'Cluster Percentile'.
+        """
+        player_names, positions = self._positions(player_names)
+        stats_columns = self.snapshot.stats_columns
+        columns = {
+            'Player Stats': 'player_stats', 'Cluster Average': 'cluster_avg', 'Difference': 'difference',
+            'Percentage Difference': 'pct_difference', 'Projected': 'projected_stats', 'Weak': 'weak_mask',
+        }
+        data = {name: np.asarray(self.snapshot.arrays[key])[positions].ravel() for name, key in columns.items()}
+        comparison = pd.DataFrame(data, index=pd.MultiIndex.from_product([player_names, stats_columns], names=['PLAYER_NAME', 'STAT']))
+        comparison['Weak'] = comparison['Weak'].astype(bool)
+
+        if percentiles:
+            rows = self.player_data.loc[[self.snapshot.row_labels[p] for p in positions]]
+            league = self.percentile_engine.percentile_frame(rows)
+            by_cluster = self.percentile_engine.percentile_frame(rows, by_cluster=True)
+            comparison['League Percentile'] = league[stats_columns].to_numpy().ravel()
+            comparison['Cluster Percentile'] = by_cluster[stats_columns].to_numpy().ravel()
+        return comparison
+
+    def analyze_many(self, player_names=None):
+        """
+        Análisis completo de varios jugadores (comparación, áreas débiles, proyección y drills).
+
+        Returns:
+            list: Un PlayerAnalysis por jugador, en el orden pedido.
+        """
+        player_names, positions = self._positions(player_names)
+        comparison = self.compare_many(player_names)
+        summary = self.summary_many(player_names)
+        projected = np.asarray(self.snapshot.arrays['projected_stats'])[positions]
+        drill_codes = np.asarray(self.snapshot.arrays['drill_codes'])[positions]
+        drill_keys = self.snapshot.metadata['drill_keys']
+        stats_columns = self.snapshot.stats_columns
+
+        n_stats = len(stats_columns)
+        results = []
+        for i, player_name in enumerate(player_names):
+            # Por posición: un nombre repetido en player_names tiene un bloque propio en comparison
+            player_comparison = comparison.iloc[i * n_stats:(i + 1) * n_stats].droplevel('PLAYER_NAME')
+            weak_stats = summary['WEAK_STATS'].iloc[i]
+            drills = {stats_columns[j]: NBA_DRILLS[drill_keys[code]] for j, code in enumerate(drill_codes[i]) if code >= 0}
+            results.append(PlayerAnalysis(
+                player_name=player_name,
+                team=summary['TEAM_ABBREVIATION'].iloc[i],
+                cluster=int(summary['CLUSTER'].iloc[i]),
+                role=summary['ROLE'].iloc[i],
+                comparison=player_comparison,
+                weak_stats=weak_stats,
+                weak_areas=self.snapshot.weak_areas(player_name) if weak_stats else [],
+                projected_stats=pd.Series(projected[i], index=stats_columns, name=player_name),
+                drills=drills,
+            ))
+        return results
+
+    def analyze(self, player_name):
+        """Análisis de un solo jugador (ver analyze_many)."""
+        return self.analyze_many([player_name])[0]
+
+    def assign_many(self, stats_rows):
+        """
+        Asigna clúster y rol a líneas estadísticas nuevas (sin reentrenar). Con motores tipo
+        KMeans se usa el ClusterScorer (solo NumPy); si el centroide más cercano no reproduce
+        el clustering ajustado (p. ej. gaussian_mixture), se usa el predict del modelo.
+
+        Args:
+            stats_rows (pd.DataFrame): Filas con las columnas de clustering.
+
+        Returns:
+            pd.DataFrame: Columnas 'CLUSTER' y 'ROLE', con el índice de entrada.
+        """
+        if self.nearest_centroid:
+            labels = self.scorer.assign_batch(stats_rows[self.scorer.columns].to_numpy(dtype=float))
+        else:
+            scaled = pd.DataFrame(self.scaler.transform(stats_rows[self.stats_columns]), columns=self.stats_columns)
+            labels = np.asarray(self.kmeans_model.predict(scaled))
+        return pd.DataFrame({'CLUSTER': labels, 'ROLE': self.scorer.roles_for(labels)}, index=stats_rows.index)
+
+    def report_many(self, player_names=None, report_cache=None):
+        """
+        Genera los reportes PDF de varios jugadores (en el directorio actual, como
+        generate_player_report_pdf), sin salida por consola.
+
+        Args:
+            player_names (list, optional): Jugadores. Por defecto, todos.
+            report_cache (ReportCache, optional): Caché para no rehacer reportes sin cambios.
+
+        Returns:
+            list: Un ReportResult por jugador.
+        """
+        import matplotlib
+        matplotlib.use('Agg')
+        from nba_report_cache import generate_player_report_from_snapshot
+
+        player_names, _ = self._positions(player_names)
+        results = []
+        for player_name in player_names:
+            path = os.path.abspath(f"Reporte_{player_name.replace(' ', '_')}.pdf")
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    report_ok = generate_player_report_from_snapshot(self.snapshot, self.player_data, player_name,
+                                                                     report_cache=report_cache, percentile_engine=self.percentile_engine)
+                results.append(ReportResult(player_name, path, report_ok, None if report_ok else 'PDF no generado'))
+            except Exception as e:
+                results.append(ReportResult(player_name, path, False, str(e)))
+        if report_cache is not None:
+            report_cache.save()
+        return results
+
+
+def benchmark_analyzer_api(analyzer, n_players=500, baseline_sample=20):
+    """
+    Compara analizar `n_players` jugadores con la API por lotes frente al camino actual
+    (analyze_player_weak_spots jugador a jugador, capturando su salida por consola). El camino
+    actual también dibuja gráficos y genera el PDF, así que se mide sobre `baseline_sample`
+    jugadores y se extrapola.
+
+    Returns:
+        dict: Segundos de la API, segundos por jugador de cada camino y aceleración.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    from nba_player_analyzer import analyze_player_weak_spots
+
+    names = analyzer.player_names
+    names = [names[i % len(names)] for i in range(n_players)]
+
+    start = time.perf_counter()
+    analyzer.analyze_many(names)
+    api_s = time.perf_counter() - start
+
+    baseline_names = names[:baseline_sample]
+    start = time.perf_counter()
+    for player_name in baseline_names:
+        with contextlib.redirect_stdout(io.StringIO()):
+            analyze_player_weak_spots(player_name, analyzer.player_data, analyzer.cluster_means, analyzer.cluster_roles,
+                                      analyzer.stats_columns, analyzer.scaler, snapshot=analyzer.snapshot,
+                                      percentile_engine=analyzer.percentile_engine)
+    per_call_s = (time.perf_counter() - start) / len(baseline_names)
+
+    api_per_player = api_s / n_players
+    print(f"API por lotes: {n_players} jugadores en {api_s:.3f} s ({api_per_player * 1000:.2f} ms/jugador)")
+    print(f"Camino actual: {per_call_s:.2f} s/jugador (medido en {len(baseline_names)}), "
+          f"~{per_call_s * n_players:.0f} s para {n_players}; aceleración x{per_call_s / api_per_player:,.0f}")
+    return {'api_s': api_s, 'api_per_player_s': api_per_player, 'per_call_s': per_call_s,
+            'speedup': per_call_s / api_per_player}
+
+
+if __name__ == '__main__':
+    filepath = 'nba_active_player_stats_2023-24_Regular_Season_100min.xlsx'
+    analyzer = PlayerAnalyzer.fit(filepath)
+
+    if analyzer is not None:
+        print(analyzer.summary_many().head(10).to_string(index=False))
+        analysis = analyzer.analyze(analyzer.player_names[0])
+        print(f"\n{analysis.player_name} ({analysis.team}) - Clúster {analysis.cluster}: {analysis.role}")
+        print(analysis.comparison.round(2).to_string())
+
+        # assign_many sobre las filas de entrenamiento debe reproducir el clustering ajustado
+        for engine in ['kmeans', 'gaussian_mixture']:
+            engine_analyzer = analyzer if engine == 'kmeans' else PlayerAnalyzer.fit(filepath, engine=engine)
+            assigned = engine_analyzer.assign_many(engine_analyzer.player_data)['CLUSTER'].to_numpy()
+            agreement = np.mean(assigned == engine_analyzer.player_data['CLUSTER'].to_numpy())
+            print(f"assign_many ({engine}, {'centroide más cercano' if engine_analyzer.nearest_centroid else 'predict del modelo'}): "
+                  f"{agreement:.1%} de coincidencia con CLUSTER")
+        benchmark_analyzer_api(analyzer)
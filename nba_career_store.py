@@ -0,0 +1,374 @@
+import pandas as pd
+import numpy as np
+import os
+import json
+import time
+
+# Almacén de carreras: todas las temporadas de todos los jugadores (las tablas completas que
+# devuelve PlayerCareerStats) guardadas por columnas y ordenadas por (jugador, temporada).
+# offsets[i]:offsets[i + 1] es el rango de filas del jugador i, así que la trayectoria de un
+# jugador es un slice de arrays abiertos con memory-map.
+
+# Versión del formato en disco; súbela si cambian los arrays o los metadatos guardados
+CAREER_STORE_FORMAT_VERSION = 1
+
+# Columnas numéricas de la tabla de carrera que se guardan (las que existan en las respuestas)
+CAREER_STATS_COLUMNS = [
+    'PLAYER_AGE', 'GP', 'GS', 'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT',
+    'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB', 'AST', 'STL',
+    'BLK', 'TOV', 'PF', 'PTS'
+]
+
+# Arrays por fila (además de uno por estadística) e índice por jugador
+CAREER_ROW_FIELDS = ['player_slot', 'season', 'team_id', 'team', 'is_season_total']
+CAREER_INDEX_FIELDS = ['player_ids', 'offsets']
+
+
+def season_start_year(season_ids):
+    """Convierte SEASON_ID ('2023-24') en el año de inicio (2023) como array de enteros."""
+    return pd.Series(season_ids).astype(str).str.slice(0, 4).astype(np.int16).to_numpy()
+
+
+def season_label(start_year):
+    """Convierte el año de inicio (2023) en SEASON_ID ('2023-24')."""
+    return f"{int(start_year)}-{(int(start_year) + 1) % 100:02d}"
+
+
+class CareerStore:
+    """
+    Carreras de todos los jugadores por columnas, ordenadas por (jugador, temporada).
+
+    Un jugador traspasado tiene en una misma temporada una fila por equipo más la fila
+    'TOT'; is_season_total marca la fila que representa la temporada completa (la 'TOT',
+    o la única fila si no hubo traspaso).
+    """
+
+    def __init__(self, arrays, metadata):
+        self.arrays = arrays
+        self.metadata = metadata
+        self.stats_columns = metadata['stats_columns']
+        self.player_names = metadata['player_names']
+
+        # Índices PLAYER_ID / nombre -> posición del jugador (offsets), para consultas O(1)
+        self._slots = {int(player_id): slot for slot, player_id in enumerate(np.asarray(arrays['player_ids']))}
+        self._name_slots = {}
+        for slot, name in enumerate(self.player_names):
+            self._name_slots.setdefault(name, slot)
+
+    def __len__(self):
+        return len(self.player_names)
+
+    def __contains__(self, player):
+        return self._slot(player) is not None
+
+    @property
+    def n_rows(self):
+        return len(self.arrays['season'])
+
+    def _slot(self, player):
+        if isinstance(player, str):
+            return self._name_slots.get(player)
+        return self._slots.get(int(player))
+
+    def player_rows(self, player):
+        """
+        Devuelve el rango de filas de un jugador.
+
+        Args:
+            player (int o str): PLAYER_ID o nombre del jugador.
+
+        Returns:
+            slice: Filas del jugador en el almacén (KeyError si no existe).
+        """
+        slot = self._slot(player)
+        if slot is None:
+            raise KeyError(f"Jugador '{player}' no encontrado en el almacén de carreras.")
+        offsets = self.arrays['offsets']
+        return slice(int(offsets[slot]), int(offsets[slot + 1]))
+
+    def _frame(self, rows, stats_columns=None):
+        stats_columns = self.stats_columns if stats_columns is None else stats_columns
+        player_slots = np.asarray(self.arrays['player_slot'][rows])
+        seasons = np.asarray(self.arrays['season'][rows])
+        data = {
+            'PLAYER_NAME': np.array(self.player_names, dtype=object)[player_slots],
+            'PLAYER_ID': np.asarray(self.arrays['player_ids'])[player_slots],
+            'SEASON_ID': [season_label(s) for s in seasons.tolist()],
+            'TEAM_ID': np.asarray(self.arrays['team_id'][rows]),
+            'TEAM_ABBREVIATION': np.asarray(self.arrays['team'][rows]).astype(object),
+        }
+        for stat in stats_columns:
+            data[stat] = np.asarray(self.arrays[stat][rows])
+        return pd.DataFrame(data)
+
+    def trajectory(self, player, season_totals=True, stats_columns=None):
+        """
+        Devuelve la carrera de un jugador, temporada a temporada.
+
+        Args:
+            player (int o str): PLAYER_ID o nombre del jugador.
+            season_totals (bool): Si es True, una fila por temporada (la 'TOT' en los traspasos).
+            stats_columns (list, optional): Estadísticas a incluir. Por defecto, todas.
+
+        Returns:
+            pd.DataFrame: Filas de la carrera del jugador en orden de temporada.
+        """
+        rows = self.player_rows(player)
+        if season_totals:
+            mask = np.asarray(self.arrays['is_season_total'][rows])
+            rows = np.arange(rows.start, rows.stop)[mask]
+        return self._frame(rows, stats_columns)
+
+    def trajectory_arrays(self, player, stats_columns=None):
+        """
+        Igual que trajectory (temporadas completas) pero devuelve vistas de los arrays, sin
+        construir un DataFrame: la consulta no depende del tamaño del almacén.
+
+        Returns:
+            dict: {'season': años de inicio, estadística: valores} para el jugador.
+        """
+        rows = self.player_rows(player)
+        mask = np.asarray(self.arrays['is_season_total'][rows])
+        stats_columns = self.stats_columns if stats_columns is None else stats_columns
+        result = {'season': self.arrays['season'][rows][mask]}
+        for stat in stats_columns:
+            result[stat] = self.arrays[stat][rows][mask]
+        return result
+
+    def _season_total_rows(self, seasons=None):
+        rows = np.flatnonzero(np.asarray(self.arrays['is_season_total']))
+        if seasons is not None:
+            wanted = season_start_year(list(seasons))
+            rows = rows[np.isin(np.asarray(self.arrays['season'])[rows], wanted)]
+        return rows
+
+    def yoy_deltas(self, stats_columns=None, consecutive_only=True):
+        """
+        Calcula las variaciones año a año de todos los jugadores a la vez (temporada completa
+        menos la temporada anterior del mismo jugador).
+
+        Args:
+            stats_columns (list, optional): Estadísticas a comparar. Por defecto, todas.
+            consecutive_only (bool): Si es True, solo se comparan temporadas consecutivas
+                                     (un año sin jugar no genera variación).
+
+        Returns:
+            pd.DataFrame: PLAYER_NAME, PLAYER_ID, SEASON_ID, PREV_SEASON_ID y una columna por estadística.
+        """
+        stats_columns = self.stats_columns if stats_columns is None else stats_columns
+        rows = self._season_total_rows()
+        player_slots = np.asarray(self.arrays['player_slot'])[rows]
+        seasons = np.asarray(self.arrays['season'])[rows]
+
+        # Las filas están ordenadas por (jugador, temporada): la anterior de cada fila es la previa
+        valid = player_slots[1:] == player_slots[:-1]
+        if consecutive_only:
+            valid &= (seasons[1:] - seasons[:-1]) == 1
+        current = rows[1:][valid]
+        previous = rows[:-1][valid]
+
+        deltas = self._frame(current, stats_columns=[])[['PLAYER_NAME', 'PLAYER_ID', 'SEASON_ID']]
+        deltas['PREV_SEASON_ID'] = [season_label(s) for s in np.asarray(self.arrays['season'])[previous]]
+        for stat in stats_columns:
+            values = np.asarray(self.arrays[stat])
+            deltas[stat] = values[current] - values[previous]
+        return deltas
+
+    def season_frame(self, seasons=None, stats_columns=None):
+        """
+        Devuelve una fila por jugador y temporada (la temporada completa) para las temporadas pedidas.
+
+        Args:
+            seasons (list, optional): SEASON_ID a incluir (ej. ['2022-23', '2023-24']). Por defecto, todas.
+            stats_columns (list, optional): Estadísticas a incluir. Por defecto, todas.
+
+        Returns:
+            pd.DataFrame: Filas ordenadas por (jugador, temporada).
+        """
+        return self._frame(self._season_total_rows(seasons), stats_columns)
+
+    def clustering_input(self, stats_columns, seasons=None, min_minutes_played=100):
+        """
+        Prepara la entrada del clustering con varias temporadas, con la misma forma que
+        load_and_preprocess_data pero leyendo del almacén en lugar del Excel.
+
+        Args:
+            stats_columns (list): Columnas de estadísticas para el clustering.
+            seasons (list, optional): SEASON_ID a incluir. Por defecto, todas.
+            min_minutes_played (int): Mínimo de minutos en la temporada (como get_nba_active_player_stats).
+
+        Returns:
+            tuple: (DataFrame de estadísticas limpias, DataFrame con nombres y temporadas, Series de nombres de jugadores)
+        """
+        actual_stats_columns = [col for col in stats_columns if col in self.stats_columns]
+        if not actual_stats_columns:
+            print("Error: Ninguna de las columnas de estadísticas especificadas está en el almacén de carreras.")
+            return None, None, None
+
+        player_data = self.season_frame(seasons)
+        if 'MIN' in player_data.columns:
+            player_data = player_data[player_data['MIN'] >= min_minutes_played]
+        stats_for_clustering = player_data[actual_stats_columns].dropna()
+        player_data_cleaned = player_data.loc[stats_for_clustering.index].copy()
+        print(f"Entrada de clustering desde el almacén de carreras: {stats_for_clustering.shape[0]} jugador-temporadas")
+        return stats_for_clustering, player_data_cleaned, player_data_cleaned['PLAYER_NAME']
+
+    def save(self, directory):
+        """
+        Guarda el almacén en un directorio: un .npy por array más metadata.json.
+
+        Args:
+            directory (str): Directorio de destino (se crea si no existe).
+        """
+        os.makedirs(directory, exist_ok=True)
+        for field in CAREER_INDEX_FIELDS + CAREER_ROW_FIELDS + self.stats_columns:
+            np.save(os.path.join(directory, f"{field}.npy"), np.ascontiguousarray(self.arrays[field]))
+        with open(os.path.join(directory, 'metadata.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.metadata, f, ensure_ascii=False)
+        print(f"Almacén de carreras guardado en: {directory} ({len(self)} jugadores, {self.n_rows} filas)")
+
+
+def build_career_store(career_tables, stats_columns=None):
+    """
+    Construye el almacén a partir de las tablas de carrera de PlayerCareerStats.
+
+    Args:
+        career_tables (list o pd.DataFrame): Tablas de carrera (una por jugador) con 'PLAYER_NAME'
+                                             añadido, o un único DataFrame ya concatenado.
+        stats_columns (list, optional): Estadísticas a guardar. Por defecto, CAREER_STATS_COLUMNS.
+
+    Returns:
+        CareerStore: El almacén en memoria (usa save para persistirlo), o None si no hay filas.
+    """
+    careers = career_tables if isinstance(career_tables, pd.DataFrame) else pd.concat(list(career_tables), ignore_index=True)
+    if careers.empty:
+        print("Error: No hay tablas de carrera para construir el almacén.")
+        return None
+
+    stats_columns = [col for col in (stats_columns or CAREER_STATS_COLUMNS) if col in careers.columns]
+    careers = careers.assign(_SEASON=season_start_year(careers['SEASON_ID']), _ORDER=np.arange(len(careers)))
+    # Orden estable: dentro de una temporada se mantiene el orden de la respuesta (equipos y luego 'TOT')
+    careers = careers.sort_values(['PLAYER_ID', '_SEASON', '_ORDER'], kind='mergesort').reset_index(drop=True)
+
+    player_ids_per_row = careers['PLAYER_ID'].to_numpy(dtype=np.int64)
+    player_ids, first_rows, player_slot = np.unique(player_ids_per_row, return_index=True, return_inverse=True)
+    offsets = np.append(first_rows, len(careers)).astype(np.int64)
+    seasons = careers['_SEASON'].to_numpy(dtype=np.int16)
+    teams = careers['TEAM_ABBREVIATION'].fillna('').astype(str).to_numpy()
+
+    # Temporada completa: la fila 'TOT' si existe; si no, la única fila de esa temporada
+    season_key = pd.Series(player_slot.astype(np.int64) * 10000 + seasons)
+    rows_per_season = season_key.map(season_key.value_counts()).to_numpy()
+    is_season_total = (rows_per_season == 1) | (teams == 'TOT')
+
+    arrays = {
+        'player_ids': player_ids,
+        'offsets': offsets,
+        'player_slot': player_slot.astype(np.int32),
+        'season': seasons,
+        'team_id': careers['TEAM_ID'].to_numpy(dtype=np.int64) if 'TEAM_ID' in careers.columns else np.zeros(len(careers), dtype=np.int64),
+        'team': teams.astype(f"<U{max(1, max(len(t) for t in teams))}"),
+        'is_season_total': is_season_total,
+    }
+    for stat in stats_columns:
+        arrays[stat] = pd.to_numeric(careers[stat], errors='coerce').to_numpy(dtype=float)
+
+    metadata = {
+        'format_version': CAREER_STORE_FORMAT_VERSION,
+        'stats_columns': stats_columns,
+        'player_names': careers['PLAYER_NAME'].astype(str).to_numpy()[first_rows].tolist(),
+    }
+    return CareerStore(arrays, metadata)
+
+
+def load_career_store(directory, mmap=True):
+    """
+    Carga un almacén guardado con CareerStore.save.
+
+    Args:
+        directory (str): Directorio del almacén.
+        mmap (bool): Si es True, los arrays se abren con memory-map (solo lectura) en lugar de leerse a RAM.
+
+    Returns:
+        CareerStore: El almacén, o None si no existe o su formato no es compatible.
+    """
+    metadata_path = os.path.join(directory, 'metadata.json')
+    if not os.path.exists(metadata_path):
+        print(f"Error: No se encontró un almacén de carreras en '{directory}'")
+        return None
+
+    with open(metadata_path, encoding='utf-8') as f:
+        metadata = json.load(f)
+    if metadata.get('format_version') != CAREER_STORE_FORMAT_VERSION:
+        print(f"Error: El almacén de carreras en '{directory}' tiene un formato incompatible ({metadata.get('format_version')}).")
+        return None
+
+    mmap_mode = 'r' if mmap else None
+    arrays = {
+        field: np.load(os.path.join(directory, f"{field}.npy"), mmap_mode=mmap_mode)
+        for field in CAREER_INDEX_FIELDS + CAREER_ROW_FIELDS + metadata['stats_columns']
+    }
+    return CareerStore(arrays, metadata)
+
+
+def benchmark_career_store(store, n_lookups=1000):
+    """
+    Compara la consulta de trayectorias con el índice de offsets frente a filtrar un
+    DataFrame con todas las carreras, y mide las variaciones año a año de toda la liga.
+
+    Returns:
+        dict: Latencias medias por consulta en microsegundos ('arrays_us', 'store_us', 'dataframe_us') y 'yoy_ms'.
+    """
+    careers = store._frame(slice(0, store.n_rows))
+    rng = np.random.default_rng(42)
+    sample = np.asarray(store.arrays['player_ids'])[rng.integers(0, len(store), size=n_lookups)]
+
+    start = time.perf_counter()
+    for player_id in sample:
+        store.trajectory_arrays(player_id)
+    arrays_us = (time.perf_counter() - start) / n_lookups * 1e6
+
+    start = time.perf_counter()
+    for player_id in sample:
+        store.trajectory(player_id)
+    store_us = (time.perf_counter() - start) / n_lookups * 1e6
+
+    start = time.perf_counter()
+    for player_id in sample:
+        careers[careers['PLAYER_ID'] == player_id]
+    dataframe_us = (time.perf_counter() - start) / n_lookups * 1e6
+
+    start = time.perf_counter()
+    deltas = store.yoy_deltas()
+    yoy_ms = (time.perf_counter() - start) * 1000
+
+    print(f"\nAlmacén de {len(store)} jugadores ({store.n_rows} filas): trayectoria {arrays_us:.1f} µs/jugador "
+          f"(arrays) / {store_us:.1f} µs/jugador (DataFrame) vs. filtro de DataFrame {dataframe_us:.1f} µs/jugador; "
+          f"{len(deltas)} variaciones año a año en {yoy_ms:.1f} ms")
+    return {'arrays_us': arrays_us, 'store_us': store_us, 'dataframe_us': dataframe_us, 'yoy_ms': yoy_ms}
+
+
+if __name__ == '__main__':
+    from nba_player_data import get_nba_active_player_stats
+
+    career_store_dir = 'career_store'
+    clustering_stats_columns = [
+        'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT',
+        'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB', 'AST', 'STL',
+        'BLK', 'TOV', 'PF', 'PTS', 'GP', 'GS'
+    ]
+
+    career_store = load_career_store(career_store_dir)
+    if career_store is None:
+        # La descarga guarda las carreras completas además de la temporada pedida
+        get_nba_active_player_stats(season='2023-24', career_store_dir=career_store_dir)
+        career_store = load_career_store(career_store_dir)
+
+    if career_store is not None:
+        first_player = career_store.player_names[0]
+        print(f"\nTrayectoria de {first_player}:")
+        print(career_store.trajectory(first_player, stats_columns=['GP', 'MIN', 'PTS', 'REB', 'AST']).to_string(index=False))
+
+        stats_for_clustering, player_data_cleaned, player_names = career_store.clustering_input(
+            clustering_stats_columns, seasons=['2022-23', '2023-24'])
+        benchmark_career_store(career_store)
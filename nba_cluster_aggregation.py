@@ -0,0 +1,390 @@
+import pandas as pd
+import numpy as np
+import os
+import time
+import tracemalloc
+import multiprocessing as mp
+from nba_resource_governor import get_governor, apply_worker_limits
+
+# Agregación por clúster fuera de memoria: el dataset se lee del disco por bloques y de cada
+# bloque solo se guardan estadísticos suficientes por clúster (conteo, suma, M2 para la
+# varianza y una muestra bottom-k para los cuantiles). Los parciales se combinan en cualquier
+# orden, así que los bloques pueden procesarse en varios procesos. La memoria depende del
+# tamaño de bloque y del número de clústeres, no del número de filas.
+
+DEFAULT_CHUNK_ROWS = 100_000
+DEFAULT_SKETCH_SIZE = 1024
+
+
+def _row_hashes(first_row, n_rows):
+    """Hash splitmix64 del número de fila global: la muestra bottom-k no depende de cómo se parta el archivo."""
+    with np.errstate(over='ignore'):
+        z = np.arange(first_row, first_row + n_rows, dtype=np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+
+class ClusterAggregate:
+    """
+    Estadísticos por clúster combinables: conteo, suma (con compensación de Neumaier entre
+    parciales), M2 (suma de cuadrados de desviaciones, combinada con la fórmula de Chan) y una
+    muestra bottom-k de filas por clúster para aproximar cuantiles.
+    """
+
+    def __init__(self, stats_columns, sketch_size=DEFAULT_SKETCH_SIZE):
+        self.stats_columns = list(stats_columns)
+        self.sketch_size = sketch_size
+        empty = pd.DataFrame(columns=self.stats_columns, dtype=float)
+        self.count = empty.copy()
+        self.sum = empty.copy()
+        self.compensation = empty.copy()
+        self.m2 = empty.copy()
+        self.sketches = {} # clúster -> (hashes, valores (k, n_stats))
+        self.n_rows = 0
+
+    @classmethod
+    def from_chunk(cls, chunk, stats_columns, first_row=0, sketch_size=DEFAULT_SKETCH_SIZE):
+        """
+        Agrega un bloque en memoria.
+
+        Args:
+            chunk (pd.DataFrame): Filas con 'CLUSTER' y las columnas de estadísticas.
+            stats_columns (list): Columnas a agregar.
+            first_row (int): Posición de la primera fila del bloque en el dataset completo.
+            sketch_size (int): Tamaño de la muestra bottom-k por clúster.
+
+        Returns:
+            ClusterAggregate: Agregado del bloque.
+        """
+        aggregate = cls(stats_columns, sketch_size)
+        values = chunk[aggregate.stats_columns]
+        if not all(pd.api.types.is_numeric_dtype(dtype) for dtype in values.dtypes):
+            values = values.apply(pd.to_numeric, errors='coerce')
+        value_matrix = values.to_numpy(dtype=float)
+        labels, codes = np.unique(chunk['CLUSTER'].to_numpy(), return_inverse=True)
+        n_groups, n_stats = len(labels), value_matrix.shape[1]
+
+        # Sumas con el groupby de pandas (suma compensada de Kahan, igual que groupby().mean());
+        # conteo y M2 con bincount, columna a columna (sin copias de la tabla entera)
+        total = pd.DataFrame(value_matrix, copy=False).groupby(codes).sum().to_numpy()
+        count = np.empty((n_groups, n_stats))
+        m2 = np.empty((n_groups, n_stats))
+        for j in range(n_stats):
+            column = value_matrix[:, j]
+            valid = ~np.isnan(column)
+            column = np.where(valid, column, 0.0)
+            count[:, j] = np.bincount(codes, weights=valid, minlength=n_groups)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                mean = total[:, j] / count[:, j]
+            deviation = np.where(valid, column - mean[codes], 0.0)
+            m2[:, j] = np.bincount(codes, weights=deviation * deviation, minlength=n_groups)
+
+        index = pd.Index(labels)
+        aggregate.count = pd.DataFrame(count, index=index, columns=aggregate.stats_columns)
+        aggregate.sum = pd.DataFrame(total, index=index, columns=aggregate.stats_columns)
+        aggregate.compensation = aggregate.sum * 0.0
+        aggregate.m2 = pd.DataFrame(m2, index=index, columns=aggregate.stats_columns)
+        aggregate.n_rows = len(chunk)
+
+        hashes = _row_hashes(first_row, len(chunk))
+        for code, cluster in enumerate(labels):
+            rows = np.flatnonzero(codes == code)
+            if len(rows) > sketch_size:
+                rows = rows[np.argpartition(hashes[rows], sketch_size - 1)[:sketch_size]]
+            aggregate.sketches[cluster] = (hashes[rows], value_matrix[rows])
+        return aggregate
+
+    def merge(self, other):
+        """
+        Combina otro agregado en este (en el sitio).
+
+        Returns:
+            ClusterAggregate: self, para encadenar.
+        """
+        if other.n_rows == 0:
+            return self
+        if self.n_rows == 0:
+            self.count, self.sum, self.compensation, self.m2 = other.count, other.sum, other.compensation, other.m2
+            self.sketches, self.n_rows = dict(other.sketches), other.n_rows
+            return self
+
+        index = self.count.index.union(other.count.index)
+        count_a, count_b = self.count.reindex(index, fill_value=0.0), other.count.reindex(index, fill_value=0.0)
+        sum_a, sum_b = self.sum.reindex(index, fill_value=0.0), other.sum.reindex(index, fill_value=0.0)
+        comp_a, comp_b = self.compensation.reindex(index, fill_value=0.0), other.compensation.reindex(index, fill_value=0.0)
+        m2_a, m2_b = self.m2.reindex(index, fill_value=0.0), other.m2.reindex(index, fill_value=0.0)
+
+        count = count_a + count_b
+        with np.errstate(divide='ignore', invalid='ignore'):
+            delta = (sum_b / count_b) - (sum_a / count_a)
+            m2 = m2_a + m2_b + (delta ** 2 * count_a * count_b / count).where((count_a > 0) & (count_b > 0), 0.0)
+
+        # Suma de Neumaier: el error de redondeo de cada suma se acumula aparte
+        total = sum_a + sum_b
+        big_a = sum_a.abs() >= sum_b.abs()
+        error = ((sum_a - total) + sum_b).where(big_a, (sum_b - total) + sum_a)
+
+        self.count, self.sum, self.m2 = count, total, m2
+        self.compensation = comp_a + comp_b + error
+        for cluster, (hashes, values) in other.sketches.items():
+            if cluster in self.sketches:
+                hashes = np.concatenate([self.sketches[cluster][0], hashes])
+                values = np.concatenate([self.sketches[cluster][1], values])
+                if len(hashes) > self.sketch_size:
+                    keep = np.argpartition(hashes, self.sketch_size - 1)[:self.sketch_size]
+                    hashes, values = hashes[keep], values[keep]
+            self.sketches[cluster] = (hashes, values)
+        self.n_rows += other.n_rows
+        return self
+
+    def means(self):
+        """Media por clúster (equivalente a groupby('CLUSTER').mean())."""
+        means = (self.sum + self.compensation) / self.count
+        means.index.name = 'CLUSTER'
+        return means.sort_index()
+
+    def variances(self, ddof=1):
+        """Varianza por clúster (equivalente a groupby('CLUSTER').var(ddof))."""
+        variances = self.m2 / (self.count - ddof).where(self.count > ddof)
+        variances.index.name = 'CLUSTER'
+        return variances.sort_index()
+
+    def sizes(self):
+        """Número de filas por clúster."""
+        return self.count.max(axis=1).astype(np.int64).sort_index()
+
+    def overall_means(self):
+        """Media de toda la liga (todas las filas, todos los clústeres)."""
+        return (self.sum + self.compensation).sum() / self.count.sum()
+
+    def quantiles(self, q=(0.25, 0.5, 0.75)):
+        """
+        Cuantiles aproximados por clúster a partir de la muestra bottom-k (exactos si el
+        clúster tiene como mucho `sketch_size` filas).
+
+        Returns:
+            pd.DataFrame: Índice (CLUSTER, cuantil) y una columna por estadística.
+        """
+        frames = {}
+        for cluster in sorted(self.sketches):
+            values = self.sketches[cluster][1]
+            frames[cluster] = pd.DataFrame(np.nanquantile(values, q, axis=0), index=list(q), columns=self.stats_columns)
+        return pd.concat(frames, names=['CLUSTER', 'quantile'])
+
+
+def iter_chunks(source, columns, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Lee un dataset por bloques.
+
+    Args:
+        source (str o pd.DataFrame o iterable): Ruta a .csv, .xlsx o .parquet (requiere pyarrow),
+            un DataFrame (se recorre por slices) o un iterable de DataFrames.
+        columns (list): Columnas a leer.
+        chunk_rows (int): Filas por bloque.
+
+    Yields:
+        tuple: (posición de la primera fila, DataFrame del bloque)
+    """
+    first_row = 0
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunk_rows):
+            yield start, source.iloc[start:start + chunk_rows][columns]
+        return
+    if not isinstance(source, (str, os.PathLike)):
+        for chunk in source:
+            yield first_row, chunk[columns]
+            first_row += len(chunk)
+        return
+
+    extension = os.path.splitext(str(source))[1].lower()
+    if extension == '.csv':
+        for chunk in pd.read_csv(source, usecols=columns, chunksize=chunk_rows):
+            yield first_row, chunk
+            first_row += len(chunk)
+    elif extension == '.parquet':
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_rows, columns=columns):
+            chunk = batch.to_pandas()
+            yield first_row, chunk
+            first_row += len(chunk)
+    elif extension in ('.xlsx', '.xlsm'):
+        # openpyxl en modo solo lectura recorre las filas sin cargar la hoja entera
+        from openpyxl import load_workbook
+        workbook = load_workbook(source, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = list(next(rows))
+            positions = [header.index(col) for col in columns]
+            buffer = []
+            for row in rows:
+                buffer.append([row[p] for p in positions])
+                if len(buffer) == chunk_rows:
+                    yield first_row, pd.DataFrame(buffer, columns=columns)
+                    first_row += len(buffer)
+                    buffer = []
+            if buffer:
+                yield first_row, pd.DataFrame(buffer, columns=columns)
+        finally:
+            workbook.close()
+    else:
+        raise ValueError(f"Formato no soportado para lectura por bloques: '{extension}'")
+
+
+def _aggregate_chunk(task):
+    first_row, chunk, stats_columns, sketch_size, scorer = task
+    if scorer is not None:
+        chunk = chunk.assign(CLUSTER=scorer.assign_batch(chunk[scorer.columns].to_numpy(dtype=float)))
+    return ClusterAggregate.from_chunk(chunk, stats_columns, first_row, sketch_size)
+
+
+def aggregate_clusters(source, stats_columns, chunk_rows=DEFAULT_CHUNK_ROWS, n_workers=1, sketch_size=DEFAULT_SKETCH_SIZE,
+                       scorer=None):
+    """
+    Agrega por clúster un dataset leído por bloques, opcionalmente en varios procesos.
+
+    Args:
+        source: Dataset (ver iter_chunks). Debe tener 'CLUSTER' salvo que se pase `scorer`.
+        stats_columns (list): Columnas a agregar.
+        chunk_rows (int): Filas por bloque.
+        n_workers (int): Procesos de trabajo (el gobernador de recursos limita el total); 1 = en este proceso.
+        sketch_size (int): Tamaño de la muestra bottom-k por clúster.
+        scorer (ClusterScorer, optional): Si se indica, asigna el clúster de cada fila al leerla.
+
+    Returns:
+        ClusterAggregate: Estadísticos por clúster de todo el dataset.
+    """
+    columns = list(dict.fromkeys(list(stats_columns) + (list(scorer.columns) if scorer is not None else ['CLUSTER'])))
+    tasks = ((first_row, chunk, stats_columns, sketch_size, scorer)
+             for first_row, chunk in iter_chunks(source, columns, chunk_rows))
+    total = ClusterAggregate(stats_columns, sketch_size)
+
+    outer, inner = get_governor().plan(n_tasks=max(1, n_workers), outer_workers=n_workers)
+    if outer == 1:
+        for task in tasks:
+            total.merge(_aggregate_chunk(task))
+        return total
+
+    # Como mucho 2 bloques en vuelo por proceso: Pool.imap leería el archivo entero por adelantado
+    with mp.Pool(processes=outer, initializer=apply_worker_limits, initargs=(inner,)) as pool:
+        pending = []
+        for task in tasks:
+            pending.append(pool.apply_async(_aggregate_chunk, (task,)))
+            while len(pending) >= 2 * outer:
+                total.merge(pending.pop(0).get())
+        for result in pending:
+            total.merge(result.get())
+    return total
+
+
+def analyze_clusters_chunked(source, stats_columns, chunk_rows=DEFAULT_CHUNK_ROWS, n_workers=1, scorer=None,
+                             output_filename='cluster_means_report.xlsx'):
+    """
+    Versión por bloques de analyze_clusters para datasets que no caben en memoria: mismas
+    medias por clúster, más varianzas y cuantiles aproximados.
+
+    Returns:
+        tuple: (DataFrame de medias por clúster, ClusterAggregate con el resto de estadísticos)
+    """
+    print("\nCalculando estadísticas promedio por clúster por bloques...")
+    start = time.perf_counter()
+    aggregate = aggregate_clusters(source, stats_columns, chunk_rows=chunk_rows, n_workers=n_workers, scorer=scorer)
+    cluster_means = aggregate.means()
+    print(f"{aggregate.n_rows:,} filas agregadas en {time.perf_counter() - start:.2f} s.")
+    print("\nEstadísticas promedio por clúster:")
+    print(cluster_means)
+    if output_filename:
+        try:
+            cluster_means.to_excel(output_filename)
+            print(f"\nEstadísticas promedio por clúster guardadas en: {output_filename}")
+        except Exception as e:
+            print(f"Error al guardar las estadísticas promedio en Excel: {e}")
+    print("\nEstadísticas promedio generales de la liga:")
+    print(aggregate.overall_means())
+    return cluster_means, aggregate
+
+
+def _synthetic_league(player_data_with_clusters, stats_columns, n_rows, random_state=42):
+    """Filas sintéticas: jugadores reales remuestreados con ruido multiplicativo, conservando su clúster."""
+    rng = np.random.default_rng(random_state)
+    picks = rng.integers(0, len(player_data_with_clusters), size=n_rows)
+    values = player_data_with_clusters[stats_columns].to_numpy(dtype=float)[picks]
+    values *= rng.uniform(0.8, 1.2, size=values.shape)
+    synthetic = pd.DataFrame(values, columns=stats_columns)
+    synthetic['CLUSTER'] = player_data_with_clusters['CLUSTER'].to_numpy()[picks]
+    return synthetic
+
+
+def benchmark_cluster_aggregation(player_data_with_clusters, stats_columns, sizes=(100_000, 1_000_000),
+                                  chunk_rows=DEFAULT_CHUNK_ROWS, directory='aggregation_benchmark'):
+    """
+    Escribe datasets sintéticos en CSV y compara la agregación en memoria (leer todo +
+    groupby) con la agregación por bloques: tiempo, pico de memoria (tracemalloc) y
+    diferencia máxima entre las medias.
+
+    Returns:
+        pd.DataFrame: Una fila por tamaño.
+    """
+    os.makedirs(directory, exist_ok=True)
+    rows = []
+    for n_rows in sizes:
+        path = os.path.join(directory, f'league_{n_rows}.csv')
+        _synthetic_league(player_data_with_clusters, stats_columns, n_rows).to_csv(path, index=False)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        in_memory = pd.read_csv(path)
+        expected_means = in_memory.groupby('CLUSTER')[stats_columns].mean()
+        expected_vars = in_memory.groupby('CLUSTER')[stats_columns].var()
+        in_memory_s = time.perf_counter() - start
+        in_memory_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del in_memory
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        aggregate = aggregate_clusters(path, stats_columns, chunk_rows=chunk_rows)
+        chunked_s = time.perf_counter() - start
+        chunked_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        rows.append({
+            'rows': n_rows,
+            'in_memory_s': in_memory_s,
+            'chunked_s': chunked_s,
+            'in_memory_peak_mb': in_memory_peak / 2**20,
+            'chunked_peak_mb': chunked_peak / 2**20,
+            'max_mean_diff': float((aggregate.means() - expected_means).abs().to_numpy().max()),
+            'max_var_rel_diff': float(((aggregate.variances() - expected_vars) / expected_vars).abs().to_numpy().max()),
+        })
+        os.remove(path)
+    results = pd.DataFrame(rows)
+    print("\nAgregación por clúster en memoria vs. por bloques:")
+    print(results.to_string(index=False))
+    return results
+
+
+if __name__ == '__main__':
+    from nba_data_processor import load_and_preprocess_data, scale_data, perform_kmeans_clustering
+
+    filepath = 'nba_active_player_stats_2023-24_Regular_Season_100min.xlsx'
+    clustering_stats_columns = [
+        'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT',
+        'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB', 'AST', 'STL',
+        'BLK', 'TOV', 'PF', 'PTS', 'GP', 'GS'
+    ]
+
+    stats_for_clustering, player_data_cleaned, player_names = load_and_preprocess_data(filepath, clustering_stats_columns)
+
+    if stats_for_clustering is not None:
+        scaled_stats_df, scaler = scale_data(stats_for_clustering)
+        clusters, kmeans_model = perform_kmeans_clustering(scaled_stats_df, 5)
+        player_data_cleaned['CLUSTER'] = clusters
+
+        cluster_means, aggregate = analyze_clusters_chunked(player_data_cleaned, clustering_stats_columns, chunk_rows=100,
+                                                            output_filename=None)
+        expected = player_data_cleaned.groupby('CLUSTER')[clustering_stats_columns].mean()
+        print(f"\nDiferencia máxima con groupby().mean(): {(cluster_means - expected).abs().to_numpy().max():.3g}")
+        print(aggregate.quantiles((0.5,)).round(2).to_string())
+
+        benchmark_cluster_aggregation(player_data_cleaned, clustering_stats_columns)
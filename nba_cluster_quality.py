@@ -0,0 +1,220 @@
+import pandas as pd
+import numpy as np
+
+# Métricas de calidad de clustering sobre la matriz escalada. La silueta exacta es O(n^2):
+# aquí se calcula por bloques de filas cuyo tamaño respeta un presupuesto de memoria, o
+# sobre una muestra con su intervalo de confianza cuando el dataset es demasiado grande.
+
+DEFAULT_MEMORY_BUDGET_MB = 256
+
+
+def _block_rows(n_rows, n_clusters, memory_budget_mb):
+    """Filas por bloque para que la matriz de distancias del bloque (y sus sumas por clúster) quepan en el presupuesto."""
+    # sq_norms[bloque] + sq_norms, X[bloque] @ X.T y 2.0 * (...) están vivas a la vez: tres
+    # matrices bloque x n, más las sumas por clúster del bloque
+    bytes_per_row = 8 * (3 * n_rows + n_clusters)
+    return max(1, int(memory_budget_mb * 1024 ** 2 // bytes_per_row))
+
+
+def _encode_labels(labels):
+    """Convierte etiquetas arbitrarias en códigos 0..k-1 y devuelve (códigos, etiquetas únicas, tamaños)."""
+    unique_labels, codes = np.unique(np.asarray(labels), return_inverse=True)
+    return codes, unique_labels, np.bincount(codes)
+
+
+def silhouette_values(X, labels, rows=None, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB):
+    """
+    Silueta exacta de cada fila (o de las filas indicadas) calculada por bloques: cada bloque
+    obtiene sus distancias a todo el dataset y las suma por clúster con un producto matricial,
+    así que la memoria máxima es la del bloque, no la de la matriz n x n.
+
+    Args:
+        X (numpy.ndarray): Matriz escalada (n, d).
+        labels (array-like): Clúster de cada fila.
+        rows (array-like, optional): Índices de las filas a evaluar. Por defecto, todas.
+        memory_budget_mb (float): Memoria máxima para los temporales de un bloque.
+
+    Returns:
+        numpy.ndarray: Silueta de cada fila evaluada (0 para clústeres de un solo jugador, como en scikit-learn).
+    """
+    X = np.asarray(X, dtype=float)
+    codes, _, sizes = _encode_labels(labels)
+    n_clusters = len(sizes)
+    rows = np.arange(len(X)) if rows is None else np.asarray(rows)
+    one_hot = np.zeros((len(X), n_clusters))
+    one_hot[np.arange(len(X)), codes] = 1.0
+    sq_norms = np.einsum('ij,ij->i', X, X)
+
+    values = np.empty(len(rows))
+    block = _block_rows(len(X), n_clusters, memory_budget_mb)
+    for start in range(0, len(rows), block):
+        block_rows = rows[start:start + block]
+        sq_distances = sq_norms[block_rows, None] + sq_norms[None, :] - 2.0 * (X[block_rows] @ X.T)
+        np.maximum(sq_distances, 0.0, out=sq_distances)
+        distance_sums = np.sqrt(sq_distances, out=sq_distances) @ one_hot # (bloque, k)
+
+        own = codes[block_rows]
+        own_sizes = sizes[own]
+        a = distance_sums[np.arange(len(block_rows)), own] / np.maximum(own_sizes - 1, 1)
+        mean_to_others = distance_sums / sizes
+        mean_to_others[np.arange(len(block_rows)), own] = np.inf
+        b = mean_to_others.min(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            s = (b - a) / np.maximum(a, b)
+        values[start:start + len(block_rows)] = np.where(own_sizes > 1, np.nan_to_num(s), 0.0)
+    return values
+
+
+def sampled_silhouette(X, labels, sample_size=5000, confidence=0.95, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, random_state=42):
+    """
+    Estima la silueta media con una muestra de filas: la silueta de cada fila muestreada es
+    exacta (distancias a todo el dataset), así que el único error es el de muestreo, que se
+    acota con un intervalo normal con corrección de población finita.
+
+    Returns:
+        dict: 'silhouette' (estimación), 'lower', 'upper', 'std_error' y 'sample_size'.
+    """
+    n_rows = len(X)
+    sample_size = min(sample_size, n_rows)
+    rows = np.random.default_rng(random_state).choice(n_rows, size=sample_size, replace=False)
+    values = silhouette_values(X, labels, rows=rows, memory_budget_mb=memory_budget_mb)
+    finite_population = np.sqrt((n_rows - sample_size) / (n_rows - 1)) if n_rows > 1 else 0.0
+    std_error = values.std(ddof=1) / np.sqrt(sample_size) * finite_population if sample_size > 1 else 0.0
+    z = {0.90: 1.645, 0.95: 1.96, 0.99: 2.576}.get(confidence, 1.96)
+    estimate = float(values.mean())
+    return {'silhouette': estimate, 'lower': float(estimate - z * std_error), 'upper': float(estimate + z * std_error),
+            'std_error': float(std_error), 'sample_size': sample_size}
+
+
+def davies_bouldin(X, labels):
+    """
+    Índice de Davies–Bouldin (menor es mejor): media, para cada clúster, del peor cociente
+    (dispersión_i + dispersión_j) / distancia entre centroides. Es O(n·k).
+    """
+    X = np.asarray(X, dtype=float)
+    codes, _, sizes = _encode_labels(labels)
+    if len(sizes) < 2:
+        return np.nan
+    centroids = np.zeros((len(sizes), X.shape[1]))
+    np.add.at(centroids, codes, X)
+    centroids /= sizes[:, None]
+    scatter = np.bincount(codes, weights=np.linalg.norm(X - centroids[codes], axis=1)) / sizes
+    centroid_distances = np.linalg.norm(centroids[:, None, :] - centroids[None, :, :], axis=2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratios = (scatter[:, None] + scatter[None, :]) / centroid_distances
+    np.fill_diagonal(ratios, -np.inf)
+    return float(np.mean(np.max(np.nan_to_num(ratios, posinf=0.0), axis=1)))
+
+
+def cluster_compactness(X, labels, silhouettes=None):
+    """
+    Compacidad de cada clúster: tamaño, distancia media y máxima al centroide, radio cuadrático
+    medio, fracción de la WCSS total y, si se pasan, la silueta media de sus jugadores.
+
+    Returns:
+        pd.DataFrame: Una fila por clúster.
+    """
+    X = np.asarray(X, dtype=float)
+    codes, unique_labels, sizes = _encode_labels(labels)
+    centroids = np.zeros((len(sizes), X.shape[1]))
+    np.add.at(centroids, codes, X)
+    centroids /= sizes[:, None]
+    sq_distances = np.sum((X - centroids[codes]) ** 2, axis=1)
+    distances = np.sqrt(sq_distances)
+
+    max_distance = np.zeros(len(sizes))
+    np.maximum.at(max_distance, codes, distances)
+    wcss = np.bincount(codes, weights=sq_distances)
+    compactness = pd.DataFrame({
+        'size': sizes,
+        'mean_distance': np.bincount(codes, weights=distances) / sizes,
+        'max_distance': max_distance,
+        'rms_radius': np.sqrt(wcss / sizes),
+        'wcss_share': wcss / wcss.sum() if wcss.sum() else 0.0,
+    }, index=pd.Index(unique_labels, name='CLUSTER'))
+    if silhouettes is not None:
+        compactness['silhouette'] = np.bincount(codes, weights=silhouettes) / sizes
+    return compactness
+
+
+def evaluate_clustering(scaled_stats_df, labels, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, max_exact_rows=20000,
+                        sample_size=5000, verbose=True):
+    """
+    Calcula la silueta, Davies–Bouldin y la compacidad por clúster de un clustering.
+    Hasta `max_exact_rows` filas la silueta es exacta (por bloques, dentro del presupuesto
+    de memoria); por encima se estima con una muestra y se devuelve su intervalo de confianza.
+
+    Args:
+        scaled_stats_df (pd.DataFrame o numpy.ndarray): Matriz escalada (o reducida) usada para el clustering.
+        labels (array-like): Etiquetas de perform_kmeans_clustering.
+        memory_budget_mb (float): Memoria máxima para los temporales de la silueta.
+        max_exact_rows (int): Máximo de filas para calcular la silueta exacta.
+        sample_size (int): Filas muestreadas si el dataset supera `max_exact_rows`.
+        verbose (bool): Si True, imprime el resumen.
+
+    Returns:
+        dict: 'silhouette', 'silhouette_lower', 'silhouette_upper', 'silhouette_exact',
+              'davies_bouldin' y 'compactness' (DataFrame).
+    """
+    X = np.asarray(scaled_stats_df, dtype=float)
+    labels = np.asarray(labels)
+    n_clusters = len(np.unique(labels))
+
+    silhouettes = None
+    if n_clusters < 2:
+        silhouette = {'silhouette': np.nan, 'lower': np.nan, 'upper': np.nan}
+        exact = True
+    elif len(X) <= max_exact_rows:
+        silhouettes = silhouette_values(X, labels, memory_budget_mb=memory_budget_mb)
+        mean = float(silhouettes.mean())
+        silhouette = {'silhouette': mean, 'lower': mean, 'upper': mean}
+        exact = True
+    else:
+        silhouette = sampled_silhouette(X, labels, sample_size=sample_size, memory_budget_mb=memory_budget_mb)
+        exact = False
+
+    quality = {
+        'silhouette': silhouette['silhouette'],
+        'silhouette_lower': silhouette['lower'],
+        'silhouette_upper': silhouette['upper'],
+        'silhouette_exact': exact,
+        'davies_bouldin': davies_bouldin(X, labels),
+        'compactness': cluster_compactness(X, labels, silhouettes=silhouettes),
+    }
+    if verbose:
+        band = "" if exact else f" (IC 95%: {quality['silhouette_lower']:.4f} - {quality['silhouette_upper']:.4f})"
+        print(f"\nCalidad del clustering (K={n_clusters}, {len(X)} jugadores): silueta {quality['silhouette']:.4f}{band}, "
+              f"Davies-Bouldin {quality['davies_bouldin']:.4f}")
+        print(quality['compactness'].round(4).to_string())
+    return quality
+
+
+if __name__ == '__main__':
+    import time
+    from sklearn.metrics import silhouette_score, davies_bouldin_score
+    from nba_data_processor import load_and_preprocess_data, scale_data, perform_kmeans_clustering
+
+    filepath = 'nba_active_player_stats_2023-24_Regular_Season_100min.xlsx'
+    clustering_stats_columns = [
+        'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT',
+        'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB', 'AST', 'STL',
+        'BLK', 'TOV', 'PF', 'PTS', 'GP', 'GS'
+    ]
+
+    stats_for_clustering, player_data_cleaned, player_names = load_and_preprocess_data(filepath, clustering_stats_columns)
+
+    if stats_for_clustering is not None:
+        scaled_stats_df, scaler = scale_data(stats_for_clustering)
+        clusters, kmeans_model = perform_kmeans_clustering(scaled_stats_df, 5)
+        quality = evaluate_clustering(scaled_stats_df, clusters, memory_budget_mb=1)
+        print(f"Referencia scikit-learn: silueta {silhouette_score(scaled_stats_df, clusters):.4f}, "
+              f"Davies-Bouldin {davies_bouldin_score(scaled_stats_df, clusters):.4f}")
+
+        # Dataset grande simulado: silueta muestreada con presupuesto de memoria
+        rng = np.random.default_rng(42)
+        X = scaled_stats_df.to_numpy()
+        rows = rng.integers(0, len(X), size=100000)
+        big_X = X[rows] + rng.normal(scale=0.05, size=(len(rows), X.shape[1]))
+        start = time.perf_counter()
+        evaluate_clustering(big_X, clusters[rows], memory_budget_mb=64, verbose=False)
+        print(f"100000 filas, silueta muestreada con 64 MB: {time.perf_counter() - start:.2f} s")
@@ -0,0 +1,167 @@
+import pandas as pd
+import numpy as np
+import time
+import tracemalloc
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.mixture import GaussianMixture
+from sklearn.decomposition import PCA
+from sklearn.metrics import silhouette_score, adjusted_rand_score
+
+# Cada motor de clustering es una función (n_clusters, random_state) -> estimador con la
+# interfaz de KMeans de scikit-learn: fit, predict, fit_predict, cluster_centers_ e inertia_.
+# cluster_centers_ siempre está en el espacio de entrada (datos escalados).
+
+
+class GaussianMixtureClusterer:
+    """Mezcla de gaussianas con la interfaz de KMeans (centroides = medias de las componentes)."""
+
+    def __init__(self, n_clusters, random_state=42):
+        self.model = GaussianMixture(n_components=n_clusters, covariance_type='full', n_init=3, random_state=random_state)
+
+    def fit(self, X):
+        self.model.fit(X)
+        self.cluster_centers_ = self.model.means_
+        self.labels_ = self.model.predict(X)
+        self.inertia_ = _inertia(np.asarray(X, dtype=float), self.labels_, self.cluster_centers_)
+        return self
+
+    def predict(self, X):
+        return self.model.predict(X)
+
+    def fit_predict(self, X):
+        return self.fit(X).labels_
+
+
+class PCAKMeansClusterer:
+    """KMeans sobre las componentes principales que explican `explained_variance` de la varianza."""
+
+    def __init__(self, n_clusters, random_state=42, explained_variance=0.90):
+        self.pca = PCA(n_components=explained_variance, svd_solver='full', random_state=random_state)
+        self.kmeans = KMeans(n_clusters=n_clusters, init='k-means++', max_iter=300, n_init=10, random_state=random_state)
+
+    def fit(self, X):
+        reduced = self.pca.fit_transform(X)
+        self.labels_ = self.kmeans.fit_predict(reduced)
+        # Centroides devueltos al espacio original para que sean comparables con los de KMeans
+        self.cluster_centers_ = self.pca.inverse_transform(self.kmeans.cluster_centers_)
+        self.inertia_ = _inertia(np.asarray(X, dtype=float), self.labels_, self.cluster_centers_)
+        return self
+
+    def predict(self, X):
+        return self.kmeans.predict(self.pca.transform(X))
+
+    def fit_predict(self, X):
+        return self.fit(X).labels_
+
+
+def _inertia(X, labels, centers):
+    """Suma de distancias al cuadrado de cada punto al centro de su clúster."""
+    return float(np.sum((X - centers[labels]) ** 2))
+
+
+CLUSTERING_ENGINES = {
+    # Referencia: la configuración original de perform_kmeans_clustering
+    'kmeans': lambda n_clusters, random_state=42: KMeans(n_clusters=n_clusters, init='k-means++', max_iter=300, n_init=10, random_state=random_state),
+    'kmeans_elkan': lambda n_clusters, random_state=42: KMeans(n_clusters=n_clusters, init='k-means++', max_iter=300, n_init=10, algorithm='elkan', random_state=random_state),
+    'minibatch_kmeans': lambda n_clusters, random_state=42: MiniBatchKMeans(n_clusters=n_clusters, init='k-means++', batch_size=1024, n_init=10, random_state=random_state),
+    'gaussian_mixture': lambda n_clusters, random_state=42: GaussianMixtureClusterer(n_clusters, random_state=random_state),
+    'pca_kmeans': lambda n_clusters, random_state=42: PCAKMeansClusterer(n_clusters, random_state=random_state),
+}
+
+
+def register_clustering_engine(name, factory):
+    """
+    Registra un motor de clustering nuevo.
+
+    Args:
+        name (str): Nombre con el que se selecciona el motor.
+        factory (callable): Función (n_clusters, random_state) -> estimador con fit/predict/fit_predict,
+            cluster_centers_ e inertia_.
+    """
+    CLUSTERING_ENGINES[name] = factory
+
+
+def create_clustering_engine(name, n_clusters, random_state=42):
+    """
+    Crea un estimador del motor registrado con ese nombre.
+
+    Raises:
+        ValueError: Si el motor no está registrado.
+    """
+    if name not in CLUSTERING_ENGINES:
+        raise ValueError(f"Motor de clustering desconocido: '{name}'. Disponibles: {', '.join(CLUSTERING_ENGINES)}")
+    return CLUSTERING_ENGINES[name](n_clusters, random_state=random_state)
+
+
+def benchmark_clustering_engines(scaled_stats_df, n_clusters, engines=None, baseline='kmeans', silhouette_sample_size=5000):
+    """
+    Ejecuta cada motor sobre los mismos datos escalados y mide coste y calidad.
+
+    Args:
+        scaled_stats_df (pd.DataFrame): DataFrame de estadísticas escaladas.
+        n_clusters (int): Número de clústeres.
+        engines (list, optional): Motores a comparar. Por defecto, todos los registrados.
+        baseline (str): Motor de referencia para el acuerdo (ARI).
+        silhouette_sample_size (int): Máximo de filas usadas para la silueta en datasets grandes.
+
+    Returns:
+        pd.DataFrame: Por motor: tiempo de ajuste y de predicción, memoria pico, inercia,
+                      silueta y ARI respecto a la referencia.
+    """
+    engines = engines if engines is not None else list(CLUSTERING_ENGINES)
+    if baseline not in engines:
+        engines = [baseline] + list(engines)
+    X = scaled_stats_df.to_numpy(dtype=float)
+
+    results = []
+    labels_by_engine = {}
+    for name in engines:
+        model = create_clustering_engine(name, n_clusters)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        model.fit(X)
+        fit_s = time.perf_counter() - start
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        labels = model.predict(X)
+        predict_s = time.perf_counter() - start
+        labels_by_engine[name] = labels
+
+        n_found = len(np.unique(labels))
+        silhouette = silhouette_score(X, labels, sample_size=min(silhouette_sample_size, len(X)), random_state=42) if n_found > 1 else np.nan
+        results.append({
+            'engine': name,
+            'fit_s': fit_s,
+            'predict_s': predict_s,
+            'peak_mem_mb': peak_bytes / 1024 ** 2,
+            'inertia': _inertia(X, labels, np.asarray(model.cluster_centers_)),
+            'silhouette': silhouette,
+            'clusters_found': n_found,
+        })
+
+    results_df = pd.DataFrame(results).set_index('engine')
+    results_df['ari_vs_baseline'] = [adjusted_rand_score(labels_by_engine[baseline], labels_by_engine[name]) for name in results_df.index]
+
+    print(f"\nComparativa de motores de clustering (K={n_clusters}, referencia: {baseline}):")
+    print(results_df.round(4).to_string())
+    return results_df
+
+
+if __name__ == '__main__':
+    from nba_data_processor import load_and_preprocess_data, scale_data
+
+    filepath = 'nba_active_player_stats_2023-24_Regular_Season_100min.xlsx'
+    clustering_stats_columns = [
+        'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT',
+        'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB', 'AST', 'STL',
+        'BLK', 'TOV', 'PF', 'PTS', 'GP', 'GS'
+    ]
+
+    stats_for_clustering, player_data_cleaned, player_names = load_and_preprocess_data(filepath, clustering_stats_columns)
+
+    if stats_for_clustering is not None:
+        scaled_stats_df, scaler = scale_data(stats_for_clustering)
+        benchmark_clustering_engines(scaled_stats_df, 5)
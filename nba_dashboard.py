@@ -0,0 +1,337 @@
+import numpy as np
+import os
+import json
+import time
+import base64
+from nba_player_analyzer import radar_stats_categories, STAT_NAMES_MAP, NBA_DRILLS, LOWER_IS_BETTER_STATS
+from nba_league_snapshot import DRILL_KEYS
+
+# Tablero HTML de un solo archivo: los datos de toda la liga van una sola vez, como arrays
+# binarios compactos (float32, bits empaquetados) codificados en base64, y los gráficos de
+# radar se dibujan en el navegador con <canvas> al elegir un jugador. El tamaño del archivo
+# depende de los datos, no del número de gráficos.
+
+DASHBOARD_FORMAT_VERSION = 1
+
+
+def _encode_array(array, dtype):
+    """Codifica un array como {'dtype', 'shape', 'data'} con los bytes little-endian en base64."""
+    array = np.ascontiguousarray(np.asarray(array).astype(np.dtype(dtype).newbyteorder('<')))
+    return {'dtype': np.dtype(dtype).name, 'shape': list(array.shape), 'data': base64.b64encode(array.tobytes()).decode('ascii')}
+
+
+def build_dashboard_payload(snapshot, player_data_with_clusters=None, radar_categories=radar_stats_categories):
+    """
+    Reúne los datos del tablero a partir de la instantánea de la liga: una fila por jugador
+    (la primera si aparece varias veces, igual que en los reportes), medias y roles por clúster,
+    máscara de áreas débiles, proyecciones y los drills.
+
+    Args:
+        snapshot (LeagueSnapshot): Instantánea de la liga (nba_league_snapshot).
+        player_data_with_clusters (pd.DataFrame, optional): Si se pasa, añade equipo y edad de cada jugador.
+        radar_categories (dict): Categorías de los gráficos de radar por estadística.
+
+    Returns:
+        dict: Datos serializables a JSON.
+    """
+    positions = np.array([snapshot.position(name) for name in dict.fromkeys(snapshot.player_names)], dtype=np.int64)
+    names = [snapshot.player_names[p] for p in positions]
+    stats_columns = snapshot.stats_columns
+    clusters = np.asarray(snapshot.arrays['cluster'])[positions]
+    cluster_avg = np.asarray(snapshot.arrays['cluster_avg'])
+
+    # Medias por clúster: cualquier fila del clúster lleva su promedio completo
+    cluster_ids = sorted(snapshot.cluster_roles)
+    cluster_means = np.full((len(cluster_ids), len(stats_columns)), np.nan)
+    all_clusters = np.asarray(snapshot.arrays['cluster'])
+    for i, cluster_id in enumerate(cluster_ids):
+        members = np.flatnonzero(all_clusters == cluster_id)
+        if len(members):
+            cluster_means[i] = cluster_avg[members[0]]
+
+    weak_mask = np.asarray(snapshot.arrays['weak_mask'])[positions].astype(bool)
+    # Clave de drill por estadística (no depende del jugador)
+    drill_codes = np.asarray(snapshot.arrays['drill_codes'])[positions]
+    column_drills = np.where(weak_mask, drill_codes, -1).max(axis=0) if len(positions) else np.full(len(stats_columns), -1)
+
+    info = {}
+    if player_data_with_clusters is not None:
+        rows = player_data_with_clusters.loc[[snapshot.row_labels[p] for p in positions]]
+        for col in ['TEAM_ABBREVIATION', 'PLAYER_AGE', 'SEASON_ID']:
+            if col in rows.columns:
+                info[col] = rows[col].astype(str).tolist()
+
+    return {
+        'format_version': DASHBOARD_FORMAT_VERSION,
+        'stats_columns': stats_columns,
+        'stat_names': {stat: STAT_NAMES_MAP.get(stat, stat) for stat in stats_columns},
+        'lower_is_better': [stat for stat in stats_columns if stat in LOWER_IS_BETTER_STATS],
+        'player_names': names,
+        'player_info': info,
+        'cluster_ids': [int(c) for c in cluster_ids],
+        'cluster_roles': [snapshot.cluster_roles[c] for c in cluster_ids],
+        'radar_categories': {category: [s for s in stats if s in stats_columns] for category, stats in radar_categories.items()},
+        'drills': {key: NBA_DRILLS[key] for key in DRILL_KEYS},
+        'drill_keys': DRILL_KEYS,
+        'column_drills': [int(code) for code in column_drills],
+        'arrays': {
+            'player_stats': _encode_array(np.asarray(snapshot.arrays['player_stats'])[positions], 'float32'),
+            'projected_stats': _encode_array(np.asarray(snapshot.arrays['projected_stats'])[positions], 'float32'),
+            'cluster_means': _encode_array(cluster_means, 'float32'),
+            'cluster': _encode_array(np.searchsorted(cluster_ids, clusters), 'uint8'),
+            # Un bit por (jugador, estadística)
+            'weak_bits': _encode_array(np.packbits(weak_mask.ravel(), bitorder='little'), 'uint8'),
+        },
+    }
+
+
+def export_league_dashboard(snapshot, player_data_with_clusters=None, output_path='nba_league_dashboard.html',
+                            radar_categories=radar_stats_categories):
+    """
+    Exporta un tablero HTML autocontenido con toda la liga: búsqueda de jugadores, comparación
+    con su clúster, áreas débiles, proyecciones, drills y gráficos de radar dibujados en el navegador.
+
+    Args:
+        snapshot (LeagueSnapshot): Instantánea de la liga.
+        player_data_with_clusters (pd.DataFrame, optional): Para mostrar equipo, edad y temporada.
+        output_path (str): Ruta del archivo HTML.
+        radar_categories (dict): Categorías de los gráficos de radar.
+
+    Returns:
+        dict: 'path', 'bytes', 'players' y 'elapsed_s'.
+    """
+    start = time.perf_counter()
+    payload = build_dashboard_payload(snapshot, player_data_with_clusters, radar_categories)
+    # '</' se escapa para que ningún texto pueda cerrar la etiqueta <script>
+    payload_json = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+    html = DASHBOARD_TEMPLATE.replace('__LEAGUE_DATA__', payload_json)
+    try:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(html)
+    except OSError as e:
+        print(f"Error al guardar el tablero HTML: {e}")
+        return None
+
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(output_path)
+    print(f"Tablero de la liga guardado en: {output_path} ({len(payload['player_names'])} jugadores, "
+          f"{size / 1024:.0f} KB, {elapsed:.2f} s)")
+    return {'path': output_path, 'bytes': size, 'players': len(payload['player_names']), 'elapsed_s': elapsed}
+
+
+DASHBOARD_TEMPLATE = """<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<title>Tablero de la Liga NBA</title>
+<style>
+body { font-family: Arial, sans-serif; margin: 20px; color: #222; }
+h1 { color: #0056b3; margin-bottom: 4px; }
+h2 { color: #0056b3; border-bottom: 1px solid #ccc; padding-bottom: 4px; }
+#controls { margin: 12px 0; }
+#controls input, #controls select { padding: 4px; font-size: 14px; margin-right: 8px; }
+table { border-collapse: collapse; font-size: 13px; margin-bottom: 16px; }
+th, td { border: 1px solid #ddd; padding: 4px 8px; text-align: right; }
+th { background: #f2f2f2; }
+td:first-child, th:first-child { text-align: left; }
+tr.weak td { background: #fde8e8; }
+.charts { display: flex; flex-wrap: wrap; gap: 12px; }
+.chart { border: 1px solid #eee; padding: 6px; }
+.chart h4 { margin: 0 0 4px 0; font-size: 13px; text-align: center; }
+.legend span { display: inline-block; margin-right: 14px; font-size: 13px; }
+.swatch { display: inline-block; width: 12px; height: 12px; margin-right: 4px; vertical-align: middle; }
+#league-table tbody tr { cursor: pointer; }
+#league-table tbody tr:hover td { background: #eef5ff; }
+</style>
+</head>
+<body>
+<h1>Tablero de la Liga NBA</h1>
+<div id="summary"></div>
+<div id="controls">
+  <input id="search" list="player-list" placeholder="Buscar jugador..." size="30">
+  <datalist id="player-list"></datalist>
+  <select id="cluster-filter"><option value="">Todos los clústeres</option></select>
+</div>
+<div id="player"></div>
+<h2>Promedios por Clúster</h2>
+<div id="clusters"></div>
+<h2>Jugadores</h2>
+<table id="league-table"><thead></thead><tbody></tbody></table>
+<script id="league-data" type="application/json">__LEAGUE_DATA__</script>
+<script>
+"use strict";
+const D = JSON.parse(document.getElementById('league-data').textContent);
+const TYPES = { float32: Float32Array, uint8: Uint8Array };
+
+function decode(entry) {
+  const bin = atob(entry.data);
+  const bytes = new Uint8Array(bin.length);
+  for (let i = 0; i < bin.length; i++) bytes[i] = bin.charCodeAt(i);
+  return new TYPES[entry.dtype](bytes.buffer);
+}
+
+const A = {};
+for (const key in D.arrays) A[key] = decode(D.arrays[key]);
+const S = D.stats_columns, NS = S.length, NP = D.player_names.length;
+const col = Object.fromEntries(S.map((s, i) => [s, i]));
+
+function stat(arr, row, s) { return arr[row * NS + col[s]]; }
+function isWeak(p, j) { const bit = p * NS + j; return (A.weak_bits[bit >> 3] >> (bit & 7)) & 1; }
+function fmt(v, s) { return isNaN(v) ? '-' : (s.indexOf('_PCT') >= 0 ? v.toFixed(3) : v.toFixed(1)); }
+function roleOf(c) { return D.cluster_roles[c]; }
+function esc(t) { return String(t).replace(/[&<>"]/g, ch => ({ '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;' }[ch])); }
+
+function drawRadar(canvas, stats, series) {
+  const ctx = canvas.getContext('2d'), W = canvas.width, H = canvas.height;
+  const cx = W / 2, cy = H / 2 + 6, R = Math.min(W, H) / 2 - 48, n = stats.length;
+  ctx.clearRect(0, 0, W, H);
+  // Misma normalización que los PDF: se divide por el máximo de las tres series
+  let max = 0;
+  for (const sr of series) for (const v of sr.values) if (v > max) max = v;
+  max = max > 0 ? max : 1;
+  const angle = i => -Math.PI / 2 + 2 * Math.PI * i / n;
+  ctx.strokeStyle = '#ddd'; ctx.fillStyle = '#555'; ctx.font = '11px Arial';
+  for (let ring = 1; ring <= 4; ring++) {
+    ctx.beginPath();
+    for (let i = 0; i <= n; i++) {
+      const a = angle(i % n), r = R * ring / 4;
+      i === 0 ? ctx.moveTo(cx + r * Math.cos(a), cy + r * Math.sin(a)) : ctx.lineTo(cx + r * Math.cos(a), cy + r * Math.sin(a));
+    }
+    ctx.stroke();
+  }
+  for (let i = 0; i < n; i++) {
+    const a = angle(i);
+    ctx.beginPath(); ctx.moveTo(cx, cy); ctx.lineTo(cx + R * Math.cos(a), cy + R * Math.sin(a)); ctx.stroke();
+    ctx.textAlign = Math.cos(a) > 0.1 ? 'left' : (Math.cos(a) < -0.1 ? 'right' : 'center');
+    ctx.fillText(stats[i], cx + (R + 8) * Math.cos(a), cy + (R + 12) * Math.sin(a));
+  }
+  for (const sr of series) {
+    ctx.beginPath();
+    sr.values.forEach((v, i) => {
+      const r = R * Math.max(0, isNaN(v) ? 0 : v) / max, a = angle(i);
+      i === 0 ? ctx.moveTo(cx + r * Math.cos(a), cy + r * Math.sin(a)) : ctx.lineTo(cx + r * Math.cos(a), cy + r * Math.sin(a));
+    });
+    ctx.closePath();
+    ctx.strokeStyle = sr.color; ctx.lineWidth = 2; ctx.setLineDash(sr.dash || []); ctx.stroke();
+    ctx.globalAlpha = 0.15; ctx.fillStyle = sr.color; ctx.fill(); ctx.globalAlpha = 1; ctx.setLineDash([]);
+  }
+  ctx.lineWidth = 1;
+}
+
+const SERIES = [
+  { key: 'player', label: 'Jugador', color: '#1f77b4' },
+  { key: 'cluster', label: 'Promedio del Clúster', color: '#ff7f0e' },
+  { key: 'projected', label: 'Proyección', color: '#2ca02c', dash: [6, 4] },
+];
+
+function showPlayer(p) {
+  const c = A.cluster[p], info = D.player_info, name = D.player_names[p];
+  const header = ['TEAM_ABBREVIATION', 'PLAYER_AGE', 'SEASON_ID'].filter(k => info[k]).map(k => esc(info[k][p])).join(' · ');
+  let html = `<h2>${esc(name)}</h2><p>${header ? header + ' · ' : ''}Clúster ${D.cluster_ids[c]}: <b>${esc(roleOf(c))}</b></p>`;
+  html += '<div class="legend">' + SERIES.map(sr => `<span><i class="swatch" style="background:${sr.color}"></i>${sr.label}</span>`).join('') + '</div>';
+  html += '<div class="charts">';
+  const charts = [['Global', S]].concat(Object.entries(D.radar_categories).filter(e => e[1].length));
+  charts.forEach((chart, i) => { html += `<div class="chart"><h4>${esc(chart[0])}</h4><canvas id="radar-${i}" width="${i ? 300 : 420}" height="${i ? 300 : 420}"></canvas></div>`; });
+  html += '</div>';
+
+  html += '<h3>Comparación con el Clúster</h3><table><thead><tr><th>Estadística</th><th>Jugador</th><th>Promedio Clúster</th><th>Diferencia %</th><th>Proyección</th></tr></thead><tbody>';
+  const weakList = [];
+  S.forEach((s, j) => {
+    const v = stat(A.player_stats, p, s), avg = stat(A.cluster_means, c, s), proj = stat(A.projected_stats, p, s);
+    const pct = avg ? (v - avg) / avg * 100 : NaN, weak = isWeak(p, j);
+    if (weak) weakList.push(j);
+    html += `<tr class="${weak ? 'weak' : ''}"><td>${esc(D.stat_names[s])}</td><td>${fmt(v, s)}</td><td>${fmt(avg, s)}</td><td>${isNaN(pct) ? '-' : pct.toFixed(1) + '%'}</td><td>${fmt(proj, s)}</td></tr>`;
+  });
+  html += '</tbody></table>';
+
+  html += '<h3>Áreas Débiles y Entrenamiento</h3>';
+  if (!weakList.length) html += '<p>El jugador no presenta debilidades significativas en comparación con su clúster.</p>';
+  else {
+    html += '<ul>';
+    for (const j of weakList) {
+      const s = S[j], drill = D.column_drills[j] >= 0 ? D.drill_keys[D.column_drills[j]] : null;
+      const action = s.indexOf('_PCT') >= 0 ? 'Necesita mejorar puntería/eficiencia' : (D.lower_is_better.indexOf(s) >= 0 ? 'Reducir ' + s : 'Necesita mejorar ' + s);
+      html += `<li><b>${esc(D.stat_names[s])}</b>: ${fmt(stat(A.player_stats, p, s), s)} (Promedio Clúster: ${fmt(stat(A.cluster_means, c, s), s)}) - ${esc(action)}`;
+      if (drill) html += '<ul>' + D.drills[drill].map(d => `<li>${esc(d)}</li>`).join('') + '</ul>';
+      html += '</li>';
+    }
+    html += '</ul>';
+  }
+  document.getElementById('player').innerHTML = html;
+
+  charts.forEach((chart, i) => {
+    const stats = chart[1];
+    drawRadar(document.getElementById('radar-' + i), stats, SERIES.map(sr => ({
+      color: sr.color, dash: sr.dash,
+      values: stats.map(s => sr.key === 'player' ? stat(A.player_stats, p, s) : sr.key === 'cluster' ? stat(A.cluster_means, c, s) : stat(A.projected_stats, p, s)),
+    })));
+  });
+}
+
+function renderClusters() {
+  let html = '<table><thead><tr><th>Clúster</th><th>Rol</th><th>Jugadores</th>' + S.map(s => `<th>${s}</th>`).join('') + '</tr></thead><tbody>';
+  const counts = new Array(D.cluster_ids.length).fill(0);
+  for (let p = 0; p < NP; p++) counts[A.cluster[p]]++;
+  D.cluster_ids.forEach((id, c) => {
+    html += `<tr><td>${id}</td><td>${esc(roleOf(c))}</td><td>${counts[c]}</td>` + S.map(s => `<td>${fmt(stat(A.cluster_means, c, s), s)}</td>`).join('') + '</tr>';
+  });
+  document.getElementById('clusters').innerHTML = html + '</tbody></table>';
+}
+
+const TABLE_STATS = ['PTS', 'REB', 'AST', 'MIN', 'GP'].filter(s => s in col);
+function renderLeagueTable() {
+  const filter = document.getElementById('cluster-filter').value;
+  document.querySelector('#league-table thead').innerHTML = '<tr><th>Jugador</th><th>Clúster</th><th>Rol</th>' + TABLE_STATS.map(s => `<th>${s}</th>`).join('') + '<th>Áreas débiles</th></tr>';
+  const rows = [];
+  for (let p = 0; p < NP; p++) {
+    if (filter !== '' && A.cluster[p] !== Number(filter)) continue;
+    let nWeak = 0;
+    for (let j = 0; j < NS; j++) nWeak += isWeak(p, j);
+    rows.push(`<tr data-p="${p}"><td>${esc(D.player_names[p])}</td><td>${D.cluster_ids[A.cluster[p]]}</td><td>${esc(roleOf(A.cluster[p]))}</td>` +
+      TABLE_STATS.map(s => `<td>${fmt(stat(A.player_stats, p, s), s)}</td>`).join('') + `<td>${nWeak}</td></tr>`);
+  }
+  document.querySelector('#league-table tbody').innerHTML = rows.join('');
+}
+
+const byName = new Map(D.player_names.map((n, p) => [n, p]));
+document.getElementById('player-list').innerHTML = D.player_names.map(n => `<option value="${esc(n)}">`).join('');
+document.getElementById('cluster-filter').innerHTML += D.cluster_ids.map((id, c) => `<option value="${c}">Clúster ${id}: ${esc(roleOf(c))}</option>`).join('');
+document.getElementById('search').addEventListener('change', e => { if (byName.has(e.target.value)) showPlayer(byName.get(e.target.value)); });
+document.getElementById('cluster-filter').addEventListener('change', renderLeagueTable);
+document.querySelector('#league-table tbody').addEventListener('click', e => {
+  const tr = e.target.closest('tr');
+  if (tr) { showPlayer(Number(tr.dataset.p)); window.scrollTo(0, 0); }
+});
+document.getElementById('summary').textContent = `${NP} jugadores · ${D.cluster_ids.length} clústeres · ${NS} estadísticas`;
+renderClusters();
+renderLeagueTable();
+if (NP) showPlayer(0);
+</script>
+</body>
+</html>
+"""
+
+
+if __name__ == '__main__':
+    from nba_data_processor import load_and_preprocess_data, scale_data, perform_kmeans_clustering, analyze_clusters
+    from nba_player_analyzer import assign_cluster_roles
+    from nba_league_snapshot import build_league_snapshot
+
+    filepath = 'nba_active_player_stats_2023-24_Regular_Season_100min.xlsx'
+    clustering_stats_columns = [
+        'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT',
+        'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB', 'AST', 'STL',
+        'BLK', 'TOV', 'PF', 'PTS', 'GP', 'GS'
+    ]
+
+    stats_for_clustering, player_data_cleaned, player_names = load_and_preprocess_data(filepath, clustering_stats_columns)
+
+    if stats_for_clustering is not None:
+        scaled_stats_df, scaler = scale_data(stats_for_clustering)
+        clusters, kmeans_model = perform_kmeans_clustering(scaled_stats_df, 5)
+        player_data_cleaned['CLUSTER'] = clusters
+        cluster_means = analyze_clusters(player_data_cleaned, clustering_stats_columns)
+        cluster_roles = assign_cluster_roles(cluster_means)
+
+        league_snapshot = build_league_snapshot(player_data_cleaned, cluster_means, cluster_roles, clustering_stats_columns)
+        export_league_dashboard(league_snapshot, player_data_cleaned)
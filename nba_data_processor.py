@@ -5,11 +5,15 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import os
 import warnings
+from nba_clustering_engines import create_clustering_engine
+from nba_cluster_quality import evaluate_clustering, DEFAULT_MEMORY_BUDGET_MB
+from nba_resource_governor import get_governor
+from nba_feature_store import FeatureStore, resolve_feature_set
 
 # Ignorar FutureWarnings para evitar saturar la salida
 warnings.simplefilter(action='ignore', category=FutureWarning)
 
-def load_and_preprocess_data(filepath, stats_columns):
+def load_and_preprocess_data(filepath, stats_columns, feature_set='raw', feature_store_dir='feature_store'):
     """
     Carga el dataset de jugadores, selecciona columnas de estadísticas,
     convierte a numérico y maneja valores nulos.
@@ -17,6 +21,9 @@ def load_and_preprocess_data(filepath, stats_columns):
     Args:
         filepath (str): Ruta al archivo Excel del dataset.
         stats_columns (list): Lista de nombres de columnas a usar para el clustering.
+        feature_set (str o list): 'raw' (totales de temporada), 'per_game', 'per36', 'advanced'
+                                  o una lista de columnas derivadas (ver nba_feature_store).
+        feature_store_dir (str, optional): Caché en disco de las características derivadas.
 
     Returns:
         tuple: (DataFrame de estadísticas limpias, DataFrame original con nombres, Series de nombres de jugadores)
@@ -34,7 +41,20 @@ def load_and_preprocess_data(filepath, stats_columns):
         print("Error: Ninguna de las columnas de estadísticas especificadas se encontró en el dataset.")
         return None, None, None
 
-    stats_for_clustering = player_data[actual_stats_columns].copy()
+    if feature_set == 'raw':
+        stats_for_clustering = player_data[actual_stats_columns].copy()
+    else:
+        # Las tasas se calculan una vez por versión del dataset y se leen de la caché después
+        feature_columns = resolve_feature_set(feature_set, actual_stats_columns)
+        if feature_columns is None:
+            return None, None, None
+        feature_store = FeatureStore(player_data, cache_dir=feature_store_dir)
+        stats_for_clustering = feature_store.frame(feature_columns)
+        # Los totales se mantienen en player_data (los roles y reportes los usan); se añaden las derivadas
+        derived_columns = [col for col in feature_columns if col not in player_data.columns]
+        player_data = player_data.join(stats_for_clustering[derived_columns])
+        print(f"Características '{feature_set if isinstance(feature_set, str) else 'personalizadas'}': "
+              f"{len(feature_columns)} columnas ({len(feature_store.computed)} calculadas, el resto desde la caché)")
 
     # Convertir a numérico, forzando errores a NaN, y luego eliminando NaN
     for col in stats_for_clustering.columns:
@@ -67,23 +87,32 @@ def scale_data(stats_df):
     print("Datos escalados exitosamente.")
     return scaled_stats_df, scaler
 
-def find_optimal_k(scaled_stats_df, max_k=10):
+def find_optimal_k(scaled_stats_df, max_k=10, quality_metrics=False, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB):
     """
     Usa el método del codo para sugerir un K óptimo.
 
     Args:
         scaled_stats_df (pd.DataFrame): DataFrame de estadísticas escaladas.
         max_k (int): Número máximo de clústeres a probar.
+        quality_metrics (bool): Si True, calcula también la silueta y Davies–Bouldin de cada K (K >= 2).
+        memory_budget_mb (float): Memoria máxima para la silueta por bloques.
 
     Returns:
-        None: Muestra un gráfico del método del codo.
+        pd.DataFrame: Si quality_metrics es True, WCSS, silueta y Davies–Bouldin por K; si no, None.
+                      Muestra un gráfico del método del codo.
     """
     wcss = []
+    quality_rows = []
     print(f"Calculando WCSS para K de 1 a {max_k} para el método del codo...")
     for i in range(1, max_k + 1):
         kmeans = KMeans(n_clusters=i, init='k-means++', max_iter=300, n_init=10, random_state=42)
-        kmeans.fit(scaled_stats_df)
+        with get_governor().limit_threads():
+            kmeans.fit(scaled_stats_df)
         wcss.append(kmeans.inertia_)
+        if quality_metrics and i >= 2:
+            quality = evaluate_clustering(scaled_stats_df, kmeans.labels_, memory_budget_mb=memory_budget_mb, verbose=False)
+            quality_rows.append({'K': i, 'WCSS': kmeans.inertia_, 'silhouette': quality['silhouette'],
+                                 'davies_bouldin': quality['davies_bouldin']})
 
     plt.figure(figsize=(10, 6))
     plt.plot(range(1, max_k + 1), wcss, marker='o', linestyle='--')
@@ -95,21 +124,33 @@ def find_optimal_k(scaled_stats_df, max_k=10):
     print("\nVisualiza el gráfico del 'Método del Codo' para elegir un valor de K.")
     print("Busca un 'codo' donde la disminución de WCSS se ralentice significativamente.")
 
-def perform_kmeans_clustering(scaled_stats_df, n_clusters):
+    if quality_metrics:
+        if not quality_rows:
+            print("\nLas métricas de calidad necesitan K >= 2 (max_k es menor); no hay nada que comparar.")
+            return pd.DataFrame(columns=['WCSS', 'silhouette', 'davies_bouldin'], index=pd.Index([], name='K'))
+        quality_df = pd.DataFrame(quality_rows).set_index('K')
+        print("\nCalidad por K (silueta: mayor es mejor; Davies-Bouldin: menor es mejor):")
+        print(quality_df.round(4).to_string())
+        return quality_df
+
+def perform_kmeans_clustering(scaled_stats_df, n_clusters, engine='kmeans'):
     """
     Realiza el clustering K-Means y devuelve las etiquetas de clúster.
 
     Args:
         scaled_stats_df (pd.DataFrame): DataFrame de estadísticas escaladas.
         n_clusters (int): Número de clústeres deseado.
+        engine (str): Motor de clustering registrado en nba_clustering_engines.CLUSTERING_ENGINES.
+            'kmeans' es la configuración original (k-means++, n_init=10, max_iter=300).
 
     Returns:
         numpy.ndarray: Etiquetas de clúster para cada jugador.
-        sklearn.cluster.KMeans: Modelo KMeans entrenado.
+        sklearn.cluster.KMeans: Modelo KMeans entrenado (o el estimador del motor elegido).
     """
-    print(f"Realizando clustering K-Means con {n_clusters} clústeres...")
-    kmeans = KMeans(n_clusters=n_clusters, init='k-means++', max_iter=300, n_init=10, random_state=42)
-    clusters = kmeans.fit_predict(scaled_stats_df)
+    print(f"Realizando clustering K-Means con {n_clusters} clústeres (motor: {engine})...")
+    kmeans = create_clustering_engine(engine, n_clusters)
+    with get_governor().limit_threads():
+        clusters = kmeans.fit_predict(scaled_stats_df)
     print("Clustering completado.")
     return clusters, kmeans
 
@@ -158,10 +199,22 @@ if __name__ == '__main__':
         'BLK', 'TOV', 'PF', 'PTS', 'GP', 'GS'
     ]
 
-    stats_for_clustering, player_data_cleaned, player_names = load_and_preprocess_data(filepath, clustering_stats_columns)
+    # Conjunto de características del clustering: 'raw' (totales), 'per_game', 'per36' o 'advanced'.
+    # Las medias por clúster y los roles siguen calculándose sobre los totales.
+    clustering_feature_set = 'raw'
+
+    stats_for_clustering, player_data_cleaned, player_names = load_and_preprocess_data(
+        filepath, clustering_stats_columns, feature_set=clustering_feature_set)
 
     if stats_for_clustering is not None:
         scaled_stats_df, scaler = scale_data(stats_for_clustering)
+
+        # Opcional: reducir las columnas correlacionadas a sus componentes principales.
+        # El codo, el clustering y la búsqueda de vecinos funcionan igual sobre reduced_stats_df.
+        use_dimensionality_reduction = False
+        if use_dimensionality_reduction:
+            from nba_dimensionality import reduce_dimensions
+            scaled_stats_df, projection, projection_2d = reduce_dimensions(scaled_stats_df, explained_variance=0.90)
         
         # Para elegir el K, ejecuta esto una vez y mira el gráfico
         # find_optimal_k(scaled_stats_df) 
@@ -173,6 +226,8 @@ if __name__ == '__main__':
         clusters, kmeans_model = perform_kmeans_clustering(scaled_stats_df, optimal_k)
         
         player_data_cleaned['CLUSTER'] = clusters
+
+        evaluate_clustering(scaled_stats_df, clusters)
         
         cluster_means = analyze_clusters(player_data_cleaned, clustering_stats_columns)
         
@@ -0,0 +1,280 @@
+import pandas as pd
+import numpy as np
+import os
+import time
+import hashlib
+from sklearn.decomposition import PCA
+from sklearn.utils.extmath import randomized_svd
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+# Etapa opcional entre scale_data y el clustering: las 21 columnas de clustering_stats_columns
+# están muy correlacionadas (FGM/FGA/PTS, OREB/DREB/REB, MIN/GP/GS...), así que unas pocas
+# componentes principales conservan casi toda la varianza con una fracción de las dimensiones.
+
+PROJECTION_FORMAT_VERSION = 1
+
+
+class FeatureProjection:
+    """
+    Proyección lineal de los datos escalados a sus componentes principales:
+    reduced = (scaled - mean) @ components.T
+    """
+
+    def __init__(self, mean, components, explained_variance_ratio, columns, method='pca', data_key=''):
+        self.mean = np.asarray(mean, dtype=float)
+        self.components = np.ascontiguousarray(components, dtype=float)
+        self.explained_variance_ratio = np.asarray(explained_variance_ratio, dtype=float)
+        self.columns = [str(col) for col in columns]
+        self.method = method
+        self.data_key = data_key
+
+    @property
+    def n_components(self):
+        return len(self.components)
+
+    @property
+    def component_names(self):
+        return [f"PC{i + 1}" for i in range(self.n_components)]
+
+    def transform(self, scaled_stats_df):
+        """
+        Proyecta datos escalados (con las mismas columnas que el ajuste) al espacio reducido.
+
+        Returns:
+            pd.DataFrame: Una columna por componente (PC1, PC2, ...), con el índice original.
+        """
+        X = scaled_stats_df[self.columns].to_numpy(dtype=float)
+        reduced = (X - self.mean) @ self.components.T
+        return pd.DataFrame(reduced, columns=self.component_names, index=scaled_stats_df.index)
+
+    def transform_2d(self, scaled_stats_df):
+        """Proyecta a las dos primeras componentes, para mapas de dispersión."""
+        X = scaled_stats_df[self.columns].to_numpy(dtype=float)
+        coords = (X - self.mean) @ self.components[:2].T
+        return pd.DataFrame(coords, columns=['PC1', 'PC2'], index=scaled_stats_df.index)
+
+    def inverse_transform(self, reduced):
+        """Devuelve puntos del espacio reducido (p. ej. centroides) al espacio escalado original."""
+        return np.asarray(reduced, dtype=float) @ self.components + self.mean
+
+    def save(self, filepath, projection_2d=None):
+        """
+        Guarda la matriz de proyección (y opcionalmente las coordenadas 2-D) en un .npz.
+
+        Args:
+            filepath (str): Ruta del archivo .npz.
+            projection_2d (pd.DataFrame, optional): Coordenadas PC1/PC2 de cada jugador.
+        """
+        arrays = {
+            'format_version': np.array(PROJECTION_FORMAT_VERSION),
+            'mean': self.mean,
+            'components': self.components,
+            'explained_variance_ratio': self.explained_variance_ratio,
+            'columns': np.array(self.columns),
+            'method': np.array(self.method),
+            'data_key': np.array(self.data_key),
+        }
+        if projection_2d is not None:
+            arrays['projection_2d'] = projection_2d[['PC1', 'PC2']].to_numpy(dtype=float)
+            arrays['projection_2d_index'] = projection_2d.index.to_numpy()
+        np.savez(filepath, **arrays)
+
+
+def load_projection(filepath):
+    """
+    Carga una proyección guardada con FeatureProjection.save.
+
+    Returns:
+        tuple: (FeatureProjection, DataFrame de coordenadas 2-D o None), o (None, None)
+               si el archivo no existe o su formato no es compatible.
+    """
+    if not os.path.exists(filepath):
+        return None, None
+    with np.load(filepath, allow_pickle=False) as data:
+        if int(data['format_version']) != PROJECTION_FORMAT_VERSION:
+            print(f"Aviso: La proyección en '{filepath}' tiene un formato incompatible, se recalculará.")
+            return None, None
+        projection = FeatureProjection(data['mean'], data['components'], data['explained_variance_ratio'],
+                                       data['columns'].tolist(), method=str(data['method']), data_key=str(data['data_key']))
+        projection_2d = None
+        if 'projection_2d' in data:
+            projection_2d = pd.DataFrame(data['projection_2d'], columns=['PC1', 'PC2'], index=data['projection_2d_index'])
+    return projection, projection_2d
+
+
+def _data_key(scaled_stats_df, explained_variance, method):
+    """Hash de los datos escalados y de la configuración: si cambia, la proyección cacheada no vale."""
+    digest = hashlib.sha256()
+    digest.update(repr((list(map(str, scaled_stats_df.columns)), scaled_stats_df.shape, float(explained_variance), method)).encode())
+    digest.update(np.ascontiguousarray(scaled_stats_df.to_numpy(dtype=float)).tobytes())
+    return digest.hexdigest()
+
+
+def _n_components_for(explained_variance_ratio, explained_variance):
+    """Mínimo de componentes que alcanza la varianza explicada objetivo (al menos 2, para el mapa 2-D)."""
+    cumulative = np.cumsum(explained_variance_ratio)
+    n_components = int(np.searchsorted(cumulative, explained_variance - 1e-12) + 1)
+    return min(max(n_components, 2), len(explained_variance_ratio))
+
+
+def fit_projection(scaled_stats_df, explained_variance=0.90, method='pca', random_state=42):
+    """
+    Ajusta la proyección a componentes principales sobre los datos escalados.
+
+    Args:
+        scaled_stats_df (pd.DataFrame): DataFrame de estadísticas escaladas.
+        explained_variance (float): Fracción de la varianza total que deben conservar las componentes.
+        method (str): 'pca' (SVD completa) o 'randomized' (SVD aleatorizada, que solo calcula
+            las componentes necesarias; útil con muchas filas o columnas).
+        random_state (int): Semilla de la SVD aleatorizada.
+
+    Returns:
+        FeatureProjection: Proyección ajustada.
+    """
+    X = scaled_stats_df.to_numpy(dtype=float)
+    n_rows, n_cols = X.shape
+    mean = X.mean(axis=0)
+
+    if method == 'pca':
+        pca = PCA(svd_solver='full').fit(X)
+        components, ratios = pca.components_, pca.explained_variance_ratio_
+    elif method == 'randomized':
+        centered = X - mean
+        total_variance = float(np.sum(centered ** 2))
+        max_rank = min(n_rows, n_cols)
+        n_try = min(max_rank, 4)
+        # Se piden más componentes hasta alcanzar el objetivo; cada intento solo cuesta O(n·d·k)
+        while True:
+            _, singular_values, components = randomized_svd(centered, n_components=n_try, n_iter=7, random_state=random_state)
+            ratios = singular_values ** 2 / total_variance
+            if ratios.sum() >= explained_variance or n_try >= max_rank:
+                break
+            n_try = min(max_rank, n_try * 2)
+    else:
+        raise ValueError(f"Método de reducción desconocido: '{method}'. Usa 'pca' o 'randomized'.")
+
+    n_components = _n_components_for(ratios, explained_variance)
+    return FeatureProjection(mean, components[:n_components], ratios[:n_components], scaled_stats_df.columns, method=method)
+
+
+def reduce_dimensions(scaled_stats_df, explained_variance=0.90, method='pca', cache_path='feature_projection.npz'):
+    """
+    Etapa opcional entre scale_data y el clustering: proyecta los datos escalados a las
+    componentes principales que explican `explained_variance` de la varianza. La matriz de
+    proyección y las coordenadas 2-D se guardan en `cache_path` y se reutilizan mientras
+    los datos escalados y la configuración no cambien.
+
+    Args:
+        scaled_stats_df (pd.DataFrame): DataFrame de estadísticas escaladas.
+        explained_variance (float): Fracción de la varianza a conservar (p. ej. 0.90).
+        method (str): 'pca' o 'randomized'.
+        cache_path (str, optional): Archivo .npz de la proyección cacheada; None para no cachear.
+
+    Returns:
+        tuple: (DataFrame reducido PC1..PCn, FeatureProjection, DataFrame de coordenadas 2-D PC1/PC2)
+    """
+    data_key = _data_key(scaled_stats_df, explained_variance, method)
+    projection, projection_2d = load_projection(cache_path) if cache_path else (None, None)
+    if projection is not None and projection.data_key == data_key:
+        print(f"Proyección cacheada reutilizada desde: {cache_path}")
+    else:
+        start = time.perf_counter()
+        projection = fit_projection(scaled_stats_df, explained_variance=explained_variance, method=method)
+        projection.data_key = data_key
+        projection_2d = None
+        print(f"Proyección ajustada con '{method}' en {time.perf_counter() - start:.3f} s.")
+
+    reduced_stats_df = projection.transform(scaled_stats_df)
+    if projection_2d is None or not projection_2d.index.equals(scaled_stats_df.index):
+        projection_2d = reduced_stats_df[['PC1', 'PC2']].copy()
+        if cache_path:
+            projection.save(cache_path, projection_2d=projection_2d)
+
+    print(f"Dimensiones reducidas de {len(projection.columns)} a {projection.n_components} componentes "
+          f"({projection.explained_variance_ratio.sum():.1%} de la varianza).")
+    return reduced_stats_df, projection, projection_2d
+
+
+def find_similar_players(reduced_stats_df, player_names, player_name, n_neighbors=5):
+    """
+    Busca los jugadores más parecidos a uno dado por distancia euclídea en el espacio reducido.
+
+    Args:
+        reduced_stats_df (pd.DataFrame): Datos en el espacio reducido (o escalado).
+        player_names (pd.Series): Nombres de los jugadores, con el mismo índice.
+        player_name (str): Jugador de referencia.
+        n_neighbors (int): Número de vecinos a devolver.
+
+    Returns:
+        pd.DataFrame: Vecinos con su distancia, o None si el jugador no existe.
+    """
+    matches = player_names.index[player_names == player_name]
+    if len(matches) == 0:
+        print(f"Error: Jugador '{player_name}' no encontrado en el dataset.")
+        return None
+
+    X = reduced_stats_df.to_numpy(dtype=float)
+    position = reduced_stats_df.index.get_loc(matches[0])
+    distances = np.sqrt(np.sum((X - X[position]) ** 2, axis=1))
+    distances[player_names.to_numpy() == player_name] = np.inf # Excluye al propio jugador (y su fila TOT)
+    n_neighbors = min(n_neighbors, int(np.isfinite(distances).sum()))
+    nearest = np.argpartition(distances, n_neighbors - 1)[:n_neighbors] if n_neighbors > 0 else np.array([], dtype=int)
+    nearest = nearest[np.argsort(distances[nearest])]
+    return pd.DataFrame({'PLAYER_NAME': player_names.to_numpy()[nearest], 'DISTANCE': distances[nearest]},
+                        index=reduced_stats_df.index[nearest])
+
+
+def plot_cluster_map(projection_2d, clusters, output_path='cluster_map.png', cluster_roles=None, dpi=100):
+    """
+    Dibuja el mapa de dispersión de los jugadores en las dos primeras componentes, coloreado por clúster.
+    Usa las coordenadas 2-D ya calculadas, así que no repite ninguna proyección.
+
+    Args:
+        projection_2d (pd.DataFrame): Coordenadas PC1/PC2 de reduce_dimensions.
+        clusters (array-like): Clúster de cada jugador, en el mismo orden.
+        output_path (str): Ruta del PNG de salida.
+        cluster_roles (dict, optional): Rol de cada clúster, para la leyenda.
+        dpi (int): Resolución de la imagen.
+    """
+    clusters = np.asarray(clusters)
+    fig = Figure(figsize=(9, 7))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    for cluster_id in np.unique(clusters):
+        mask = clusters == cluster_id
+        label = f"Clúster {cluster_id}" + (f" - {cluster_roles[cluster_id]}" if cluster_roles and cluster_id in cluster_roles else "")
+        ax.scatter(projection_2d['PC1'].to_numpy()[mask], projection_2d['PC2'].to_numpy()[mask], s=14, alpha=0.7, label=label)
+    ax.set_xlabel('PC1')
+    ax.set_ylabel('PC2')
+    ax.set_title('Mapa de jugadores por clúster (componentes principales)')
+    ax.legend(loc='best', fontsize=8)
+    ax.grid(True, alpha=0.3)
+    fig.savefig(output_path, dpi=dpi, bbox_inches='tight')
+    fig.clear()
+    print(f"Mapa de clústeres guardado en: {output_path}")
+
+
+if __name__ == '__main__':
+    from nba_data_processor import load_and_preprocess_data, scale_data, perform_kmeans_clustering
+
+    filepath = 'nba_active_player_stats_2023-24_Regular_Season_100min.xlsx'
+    clustering_stats_columns = [
+        'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT',
+        'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB', 'AST', 'STL',
+        'BLK', 'TOV', 'PF', 'PTS', 'GP', 'GS'
+    ]
+
+    stats_for_clustering, player_data_cleaned, player_names = load_and_preprocess_data(filepath, clustering_stats_columns)
+
+    if stats_for_clustering is not None:
+        scaled_stats_df, scaler = scale_data(stats_for_clustering)
+        reduced_stats_df, projection, projection_2d = reduce_dimensions(scaled_stats_df, explained_variance=0.90)
+
+        for label, data in [('completo', scaled_stats_df), ('reducido', reduced_stats_df)]:
+            start = time.perf_counter()
+            clusters, kmeans_model = perform_kmeans_clustering(data, 5)
+            print(f"KMeans en el espacio {label} ({data.shape[1]} columnas): {time.perf_counter() - start:.3f} s")
+
+        plot_cluster_map(projection_2d, clusters)
+        print(find_similar_players(reduced_stats_df, player_names, player_names.iloc[0]))
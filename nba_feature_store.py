@@ -0,0 +1,263 @@
+import pandas as pd
+import numpy as np
+import os
+import hashlib
+
+# Capa de características derivadas: tasas por partido, por 36 minutos, TS% y aproximaciones
+# de uso, definidas una vez y calculadas de forma vectorizada sobre toda la liga. Cada columna
+# se materializa solo cuando se pide y queda cacheada (en memoria y en disco, por versión del
+# dataset), así que cambiar de conjunto de características no recalcula nada.
+
+# Estadísticas de conteo (totales de temporada) que admiten tasas por partido y por 36 minutos
+COUNTING_STATS = [
+    'MIN', 'FGM', 'FGA', 'FG3M', 'FG3A', 'FTM', 'FTA', 'OREB', 'DREB', 'REB',
+    'AST', 'STL', 'BLK', 'TOV', 'PF', 'PTS'
+]
+
+# Columnas base de las que dependen las características (el hash del dataset se calcula sobre ellas)
+BASE_COLUMNS = COUNTING_STATS + ['GP', 'GS', 'FG_PCT', 'FG3_PCT', 'FT_PCT']
+
+
+def _safe_ratio(numerator, denominator, scale=1.0):
+    """numerator / denominator * scale, con 0 donde el denominador es 0 (como FG_PCT sin intentos)."""
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / denominator * scale, 0.0)
+
+
+def _per_game(stat):
+    return lambda col: _safe_ratio(col(stat), col('GP'))
+
+
+def _per_36(stat):
+    return lambda col: _safe_ratio(col(stat), col('MIN'), 36.0)
+
+
+# Definiciones: nombre -> función que recibe `col` (acceso a columnas base o derivadas) y
+# devuelve el array de la característica. Se pueden añadir más con register_feature.
+FEATURE_DEFINITIONS = {}
+for _stat in COUNTING_STATS:
+    FEATURE_DEFINITIONS[f'{_stat}_PER_GP'] = _per_game(_stat)
+    if _stat != 'MIN':
+        FEATURE_DEFINITIONS[f'{_stat}_PER36'] = _per_36(_stat)
+FEATURE_DEFINITIONS.update({
+    'GS_PCT': lambda col: _safe_ratio(col('GS'), col('GP')),
+    # True shooting: PTS / (2 * (FGA + 0.44 * FTA))
+    'TS_PCT': lambda col: _safe_ratio(col('PTS'), 2.0 * (col('FGA') + 0.44 * col('FTA'))),
+    'EFG_PCT': lambda col: _safe_ratio(col('FGM') + 0.5 * col('FG3M'), col('FGA')),
+    # Aproximación de uso: posesiones que termina el jugador por 36 minutos (sin datos de equipo)
+    'USG_PROXY_PER36': lambda col: _safe_ratio(col('FGA') + 0.44 * col('FTA') + col('TOV'), col('MIN'), 36.0),
+    'AST_TOV': lambda col: _safe_ratio(col('AST'), col('TOV')),
+    'FG3A_RATE': lambda col: _safe_ratio(col('FG3A'), col('FGA')),
+    'FTA_RATE': lambda col: _safe_ratio(col('FTA'), col('FGA')),
+})
+del _stat
+
+# Conjuntos de características para load_and_preprocess_data. 'raw' usa las columnas tal cual;
+# el resto sustituye cada estadística de conteo por su tasa y deja los porcentajes como están.
+FEATURE_SETS = ['raw', 'per_game', 'per36', 'advanced']
+ADVANCED_FEATURES = ['TS_PCT', 'EFG_PCT', 'USG_PROXY_PER36', 'AST_TOV', 'FG3A_RATE', 'FTA_RATE']
+
+
+def register_feature(name, definition):
+    """
+    Añade (o reemplaza) una característica derivada.
+
+    Args:
+        name (str): Nombre de la columna.
+        definition (callable): Función `col -> array`, donde `col(nombre)` devuelve una columna base o derivada.
+    """
+    FEATURE_DEFINITIONS[name] = definition
+
+
+def resolve_feature_set(feature_set, stats_columns):
+    """
+    Traduce un conjunto de características a la lista de columnas a usar.
+
+    Args:
+        feature_set (str o list): 'raw', 'per_game', 'per36', 'advanced' o una lista explícita de columnas.
+        stats_columns (list): Columnas base pedidas (las de clustering).
+
+    Returns:
+        list: Columnas (base o derivadas) del conjunto, o None si el conjunto no existe.
+    """
+    if not isinstance(feature_set, str):
+        return list(feature_set)
+    if feature_set == 'raw':
+        return list(stats_columns)
+    if feature_set not in FEATURE_SETS:
+        print(f"Error: Conjunto de características '{feature_set}' no reconocido. Opciones: {', '.join(FEATURE_SETS)}")
+        return None
+
+    columns = []
+    for stat in stats_columns:
+        if stat == 'GS':
+            columns.append('GS_PCT')
+        elif stat in COUNTING_STATS and (feature_set == 'per_game' or stat == 'MIN'):
+            columns.append(f'{stat}_PER_GP')
+        elif stat in COUNTING_STATS:
+            columns.append(f'{stat}_PER36')
+        else:
+            columns.append(stat)
+    if feature_set == 'advanced':
+        columns += [name for name in ADVANCED_FEATURES if name not in columns]
+    return columns
+
+
+def _code_fingerprint(code, names, module_globals, _seen_code=None):
+    """
+    Partes de un code object que determinan su resultado: bytecode, constantes y el código
+    de las funciones de este módulo a las que llama (_safe_ratio, ...). Las constantes de
+    texto (nombres de columna) se añaden a `names`.
+    """
+    seen_code = set() if _seen_code is None else _seen_code
+    seen_code.add(code)
+    parts = [code.co_code, code.co_names]
+    for const in code.co_consts:
+        if hasattr(const, 'co_code'):
+            parts.append(_code_fingerprint(const, names, module_globals, seen_code))
+        else:
+            parts.append(repr(const))
+            if isinstance(const, str):
+                names.append(const)
+    for global_name in code.co_names:
+        helper = module_globals.get(global_name)
+        if getattr(helper, '__module__', None) == __name__ and hasattr(helper, '__code__') and helper.__code__ not in seen_code:
+            parts.append(_code_fingerprint(helper.__code__, names, module_globals, seen_code))
+    return parts
+
+
+def definition_key(name, _seen=None):
+    """
+    Hash de la definición de una característica: código de la función, valores capturados
+    (p. ej. la estadística de _per_game) y, recursivamente, las definiciones de las
+    características derivadas que usa. Cambiar o reemplazar una fórmula cambia el hash.
+
+    Args:
+        name (str): Nombre de la característica (debe estar en FEATURE_DEFINITIONS).
+
+    Returns:
+        str: Hash corto de la definición.
+    """
+    seen = set() if _seen is None else _seen
+    seen.add(name)
+    definition = FEATURE_DEFINITIONS[name]
+    names = []
+    parts = [name, _code_fingerprint(definition.__code__, names, definition.__globals__)]
+    for cell in definition.__closure__ or ():
+        value = cell.cell_contents
+        if hasattr(value, '__code__'):
+            parts.append(_code_fingerprint(value.__code__, names, value.__globals__))
+        else:
+            parts.append(repr(value))
+            if isinstance(value, str):
+                names.append(value)
+    for dependency in names:
+        if dependency in FEATURE_DEFINITIONS and dependency not in seen:
+            parts.append(definition_key(dependency, seen))
+    return hashlib.sha256(repr(parts).encode()).hexdigest()[:12]
+
+
+def dataset_key(player_data):
+    """Hash de las columnas base del dataset: identifica la versión de los datos para la caché."""
+    base_columns = [col for col in BASE_COLUMNS if col in player_data.columns]
+    digest = hashlib.sha256()
+    digest.update(repr((base_columns, len(player_data))).encode())
+    digest.update(pd.util.hash_pandas_object(player_data[base_columns], index=True).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+class FeatureStore:
+    """
+    Características derivadas de un dataset, materializadas bajo demanda.
+
+    Cada columna se calcula una sola vez por versión del dataset y de su definición: queda en
+    memoria y, si hay `cache_dir`, en `cache_dir/<hash del dataset>/<columna>-<hash de la
+    definición>.npy`, que se abre con memory-map en las siguientes ejecuciones.
+    """
+
+    def __init__(self, player_data, cache_dir='feature_store'):
+        """
+        Args:
+            player_data (pd.DataFrame): Dataset con las columnas base (totales de temporada).
+            cache_dir (str, optional): Directorio de la caché en disco; None para cachear solo en memoria.
+        """
+        self.player_data = player_data
+        self.index = player_data.index
+        self.key = dataset_key(player_data)
+        self.cache_dir = os.path.join(cache_dir, self.key) if cache_dir else None
+        self._columns = {}
+        self.computed = [] # Columnas calculadas en esta sesión (no leídas de la caché)
+
+    def _path(self, name):
+        return os.path.join(self.cache_dir, f"{name}-{definition_key(name)}.npy")
+
+    def column(self, name):
+        """
+        Devuelve una columna base o derivada como array, calculándola solo la primera vez.
+
+        Args:
+            name (str): Nombre de la columna.
+
+        Returns:
+            numpy.ndarray: Valores de la columna en el orden del dataset (KeyError si no existe).
+        """
+        is_base = name in self.player_data.columns
+        if not is_base and name not in FEATURE_DEFINITIONS:
+            raise KeyError(f"Característica '{name}' no definida ni presente en el dataset.")
+        # La caché en memoria también va por definición: register_feature puede reemplazarla
+        memo_key = (name, None if is_base else definition_key(name))
+        if memo_key in self._columns:
+            return self._columns[memo_key]
+        if is_base:
+            values = pd.to_numeric(self.player_data[name], errors='coerce').to_numpy(dtype=float)
+        elif self.cache_dir and os.path.exists(self._path(name)):
+            values = np.load(self._path(name), mmap_mode='r')
+        else:
+            values = np.asarray(FEATURE_DEFINITIONS[name](self.column), dtype=float)
+            self.computed.append(name)
+            if self.cache_dir:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                np.save(self._path(name), values)
+        self._columns[memo_key] = values
+        return values
+
+    def frame(self, columns):
+        """
+        Devuelve varias columnas (base o derivadas) como DataFrame con el índice del dataset.
+
+        Args:
+            columns (list): Nombres de las columnas.
+
+        Returns:
+            pd.DataFrame: Las columnas pedidas.
+        """
+        return pd.DataFrame({name: self.column(name) for name in columns}, index=self.index)
+
+    def feature_set(self, feature_set, stats_columns):
+        """Devuelve el DataFrame de un conjunto de características (ver resolve_feature_set)."""
+        columns = resolve_feature_set(feature_set, stats_columns)
+        return None if columns is None else self.frame(columns)
+
+
+if __name__ == '__main__':
+    import time
+
+    filepath = 'nba_active_player_stats_2023-24_Regular_Season_100min.xlsx'
+    clustering_stats_columns = [
+        'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT',
+        'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB', 'AST', 'STL',
+        'BLK', 'TOV', 'PF', 'PTS', 'GP', 'GS'
+    ]
+
+    player_data = pd.read_excel(filepath)
+    for feature_set in FEATURE_SETS:
+        store = FeatureStore(player_data)
+        start = time.perf_counter()
+        features = store.feature_set(feature_set, clustering_stats_columns)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"{feature_set}: {features.shape[1]} columnas en {elapsed_ms:.2f} ms "
+              f"({len(store.computed)} calculadas, el resto desde la caché)")
+
+    print(FeatureStore(player_data).feature_set('advanced', clustering_stats_columns).describe().T.round(3).to_string())
@@ -0,0 +1,290 @@
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import requests
+from requests.adapters import HTTPAdapter
+
+# Sesión HTTP compartida para nba_api: una sola requests.Session con pool de conexiones
+# keep-alive, compresión gzip y timeouts configurables, instalada con NBAStatsHTTP.set_session
+# para que todos los endpoints (PlayerCareerStats, ...) reutilicen las mismas conexiones.
+# nba_api ya guarda una requests.Session de clase que reutiliza conexiones; lo que añade esta
+# sesión es un Accept-Encoding que requests sabe descomprimir, timeouts propios y métricas.
+
+# (conexión, lectura) en segundos
+DEFAULT_TIMEOUT = (5.0, 30.0)
+
+# Sin brotli instalado requests no sabe descomprimir 'br', así que solo se anuncia lo que puede leer
+try:
+    import brotli # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+
+class InstrumentedAdapter(HTTPAdapter):
+    """HTTPAdapter que cuenta peticiones, bytes transferidos y tiempo de respuesta."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        self.reset_metrics()
+
+    def reset_metrics(self):
+        with self._lock:
+            self.n_requests = 0
+            self.wire_bytes = 0 # Bytes del cuerpo tal como llegan (comprimidos)
+            self.body_bytes = 0 # Bytes del cuerpo ya descomprimido
+            self.elapsed_s = 0.0
+        self._connections_at_reset = self._connections_opened()
+
+    def _connections_opened(self):
+        # urllib3 lleva la cuenta de conexiones nuevas de cada pool en num_connections
+        pools = getattr(self.poolmanager, 'pools', None)
+        if pools is None:
+            return 0
+        return sum(pools[key].num_connections for key in pools.keys()) # keys() copia la lista con bloqueo
+
+    def send(self, request, **kwargs):
+        start = time.perf_counter()
+        response = super().send(request, **kwargs)
+        body = response.content # Lee el cuerpo para que la conexión vuelva al pool
+        elapsed = time.perf_counter() - start
+        wire = int(response.headers.get('Content-Length', len(body)))
+        with self._lock:
+            self.n_requests += 1
+            self.wire_bytes += wire
+            self.body_bytes += len(body)
+            self.elapsed_s += elapsed
+        return response
+
+    def metrics(self):
+        """
+        Métricas desde el último reset_metrics.
+
+        Returns:
+            dict: Peticiones, conexiones abiertas y reutilizadas, bytes y latencia media.
+        """
+        with self._lock:
+            n_requests = self.n_requests
+            connections = self._connections_opened() - self._connections_at_reset
+            return {
+                'requests': n_requests,
+                'connections_opened': connections,
+                'connections_reused': max(0, n_requests - connections),
+                'reuse_ratio': (n_requests - connections) / n_requests if n_requests else 0.0,
+                'wire_bytes': self.wire_bytes,
+                'body_bytes': self.body_bytes,
+                'compression_ratio': self.body_bytes / self.wire_bytes if self.wire_bytes else 1.0,
+                'mean_latency_ms': self.elapsed_s / n_requests * 1000 if n_requests else 0.0,
+            }
+
+
+class PooledSession(requests.Session):
+    """
+    requests.Session con pool keep-alive, timeout propio y Accept-Encoding forzado.
+
+    nba_api pasa sus propias cabeceras y su timeout en cada petición; la sesión sustituye
+    Accept-Encoding por el que sabe descomprimir y, si tiene `timeout`, usa ese valor.
+    """
+
+    def __init__(self, pool_maxsize=10, timeout=DEFAULT_TIMEOUT, max_retries=0):
+        super().__init__()
+        self.timeout = timeout
+        self.adapter = InstrumentedAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=max_retries)
+        self.mount('https://', self.adapter)
+        self.mount('http://', self.adapter)
+        self.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        self.headers['Connection'] = 'keep-alive'
+
+    def request(self, method, url, **kwargs):
+        headers = dict(kwargs.get('headers') or {})
+        headers['Accept-Encoding'] = ACCEPT_ENCODING
+        kwargs['headers'] = headers
+        if self.timeout is not None:
+            kwargs['timeout'] = self.timeout
+        return super().request(method, url, **kwargs)
+
+    def metrics(self):
+        return self.adapter.metrics()
+
+    def reset_metrics(self):
+        self.adapter.reset_metrics()
+
+
+def install_pooled_session(pool_maxsize=10, timeout=DEFAULT_TIMEOUT, max_retries=0):
+    """
+    Crea una PooledSession y la instala como sesión de todos los endpoints de estadísticas de nba_api.
+
+    Args:
+        pool_maxsize (int): Conexiones keep-alive que se conservan por host.
+        timeout (float o tuple): Timeout de conexión y lectura en segundos; None respeta el de cada endpoint.
+        max_retries (int): Reintentos de conexión de urllib3.
+
+    Returns:
+        PooledSession: La sesión instalada (con sus métricas).
+    """
+    from nba_api.stats.library.http import NBAStatsHTTP
+
+    session = PooledSession(pool_maxsize=pool_maxsize, timeout=timeout, max_retries=max_retries)
+    NBAStatsHTTP.set_session(session)
+    return session
+
+
+def print_session_metrics(session):
+    """Imprime un resumen de las métricas de la sesión."""
+    metrics = session.metrics()
+    print(f"HTTP: {metrics['requests']} peticiones, {metrics['connections_opened']} conexiones abiertas "
+          f"({metrics['reuse_ratio']:.0%} reutilizadas), {metrics['wire_bytes'] / 1024:.0f} KB recibidos "
+          f"({metrics['compression_ratio']:.1f}x comprimido), {metrics['mean_latency_ms']:.1f} ms/petición")
+
+
+# --- Servidor local de prueba (sustituto de stats.nba.com) ---
+
+def _stub_career_payload(player_id, n_seasons=12):
+    """Respuesta con la forma de PlayerCareerStats y `n_seasons` temporadas sintéticas."""
+    from nba_api.stats.endpoints.playercareerstats import PlayerCareerStats
+
+    # SeasonTotalsRegularSeason primero y SeasonTotalsPostSeason después, como en la respuesta real
+    order = ['SeasonTotalsRegularSeason', 'SeasonTotalsPostSeason']
+    order += [name for name in PlayerCareerStats.expected_data if name not in order]
+    result_sets = []
+    for name in order:
+        headers = PlayerCareerStats.expected_data[name]
+        rows = []
+        if name == 'SeasonTotalsRegularSeason':
+            for i in range(n_seasons):
+                year = 2023 - n_seasons + 1 + i
+                values = {'PLAYER_ID': player_id, 'SEASON_ID': f"{year}-{(year + 1) % 100:02d}", 'LEAGUE_ID': '00',
+                          'TEAM_ID': 1610612737 + i % 30, 'TEAM_ABBREVIATION': 'ATL', 'PLAYER_AGE': 20.0 + i}
+                rows.append([values.get(header, (player_id * 7 + i * 13 + j) % 900 + 0.5) for j, header in enumerate(headers)])
+        result_sets.append({'name': name, 'headers': headers, 'rowSet': rows})
+    return {'resource': 'playercareerstats', 'parameters': {'PlayerID': player_id}, 'resultSets': result_sets}
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' # keep-alive
+    # Cabeceras y cuerpo en un solo envío: con keep-alive, dos escrituras pequeñas chocan con
+    # Nagle + ACK retardado y añaden ~40 ms por petición que el servidor real no tiene
+    wbufsize = 1 << 16
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.server.stats_lock:
+            self.server.connections += 1
+        # Coste de establecer la conexión (TCP + TLS) en el servidor real
+        if self.server.handshake_delay_s:
+            time.sleep(self.server.handshake_delay_s)
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        player_id = int(query.get('PlayerID', ['0'])[0])
+        body = json.dumps(_stub_career_payload(player_id)).encode()
+        self.server.accept_encoding = self.headers.get('Accept-Encoding', '')
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body, compresslevel=6)
+            encoding = 'gzip'
+        else:
+            encoding = None
+        if self.server.response_delay_s:
+            time.sleep(self.server.response_delay_s)
+        with self.server.stats_lock:
+            self.server.requests += 1
+            self.server.wire_bytes += len(body)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_stub_server(handshake_delay_s=0.0, response_delay_s=0.0):
+    """
+    Arranca en un hilo un servidor HTTP local que responde como el endpoint playercareerstats.
+
+    Args:
+        handshake_delay_s (float): Retraso al abrir cada conexión nueva (simula TCP + TLS).
+        response_delay_s (float): Retraso por petición (simula el tiempo del servidor).
+
+    Returns:
+        tuple: (servidor, URL base con '{endpoint}' para NBAStatsHTTP.base_url)
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StubHandler)
+    server.daemon_threads = True
+    server.handshake_delay_s = handshake_delay_s
+    server.response_delay_s = response_delay_s
+    # Conexiones, peticiones y bytes vistos por el servidor (valen para cualquier sesión cliente)
+    server.stats_lock = threading.Lock()
+    server.connections = server.requests = server.wire_bytes = 0
+    server.accept_encoding = None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/stats/{{endpoint}}"
+
+
+def benchmark_http_sessions(n_calls=200, handshake_delay_s=0.02, response_delay_s=0.0):
+    """
+    Mide PlayerCareerStats contra el servidor local con la sesión por defecto de nba_api
+    (una requests.Session de clase que ya reutiliza conexiones) y con la PooledSession.
+
+    Las dos sesiones mantienen la conexión abierta, así que la latencia es parecida; lo que
+    cambia es que la PooledSession solo anuncia las codificaciones que sabe descomprimir (sin
+    brotli, nba_api pide 'br' igualmente), aplica su propio timeout y expone métricas.
+
+    Returns:
+        dict: Métricas de cada modo ('default' y 'pooled'): 'ms_per_call', 'connections'
+        y 'wire_bytes' vistos por el servidor y la cabecera Accept-Encoding enviada.
+    """
+    from nba_api.stats.library.http import NBAStatsHTTP
+    from nba_api.stats.endpoints import playercareerstats
+
+    server, stub_url = start_stub_server(handshake_delay_s, response_delay_s)
+    original_url, original_session = NBAStatsHTTP.base_url, NBAStatsHTTP._session
+    NBAStatsHTTP.base_url = stub_url
+    results = {}
+    try:
+        for mode in ('default', 'pooled'):
+            if mode == 'default':
+                NBAStatsHTTP.set_session(None) # get_session crea y guarda una requests.Session
+            else:
+                install_pooled_session()
+            with server.stats_lock:
+                server.connections = server.requests = server.wire_bytes = 0
+            start = time.perf_counter()
+            for i in range(n_calls):
+                playercareerstats.PlayerCareerStats(player_id=1000 + i).get_data_frames()[0]
+            elapsed = time.perf_counter() - start
+            session = NBAStatsHTTP.get_session()
+            results[mode] = {
+                'ms_per_call': elapsed / n_calls * 1000,
+                'connections': server.connections,
+                'requests': server.requests,
+                'wire_bytes': server.wire_bytes,
+                'accept_encoding': server.accept_encoding,
+            }
+            if mode == 'pooled':
+                results[mode].update(session.metrics())
+            session.close()
+    finally:
+        NBAStatsHTTP.base_url = original_url
+        NBAStatsHTTP.set_session(original_session)
+        server.shutdown()
+        server.server_close()
+
+    print(f"Servidor local (conexión {handshake_delay_s * 1000:.0f} ms), {n_calls} llamadas:")
+    for mode, label in (('default', 'Sesión por defecto de nba_api'), ('pooled', 'PooledSession')):
+        r = results[mode]
+        print(f"  {label}: {r['ms_per_call']:.1f} ms/llamada, {r['connections']} conexiones, "
+              f"{r['wire_bytes'] / 1024:.0f} KB recibidos, Accept-Encoding '{r['accept_encoding']}'")
+    return results
+
+
+if __name__ == '__main__':
+    benchmark_http_sessions()
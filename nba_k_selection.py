@@ -0,0 +1,234 @@
+import pandas as pd
+import numpy as np
+import time
+from sklearn.cluster import KMeans
+
+# find_optimal_k reajusta todo el dataset para cada K con 10 reinicios. Para elegir un solo
+# entero basta con estimar la curva WCSS sobre una muestra estratificada o un coreset
+# ponderado, repetir varias veces para tener una banda de confianza y confirmar el K
+# elegido con un único ajuste completo.
+
+
+def elbow_k(k_values, wcss):
+    """
+    Elige el codo de una curva WCSS: el K cuyo punto está más lejos de la recta que une
+    el primer y el último punto (curva normalizada a [0, 1] en ambos ejes).
+
+    Args:
+        k_values (array-like): Valores de K probados, en orden creciente.
+        wcss (array-like): WCSS de cada K.
+
+    Returns:
+        int: K del codo.
+    """
+    k_values = np.asarray(k_values, dtype=float)
+    wcss = np.asarray(wcss, dtype=float)
+    if len(k_values) < 3:
+        return int(k_values[-1])
+    x = (k_values - k_values[0]) / (k_values[-1] - k_values[0])
+    y = (wcss - wcss[-1]) / ((wcss[0] - wcss[-1]) or 1.0)
+    # Con la curva normalizada decreciente, la recta es y = 1 - x
+    distance = (1.0 - x) - y
+    return int(k_values[int(np.argmax(distance))])
+
+
+def exact_k_sweep(scaled_stats_df, max_k=10, n_init=10):
+    """
+    Barrido exacto, igual que find_optimal_k pero sin gráfico: ajusta el dataset completo para cada K.
+
+    Returns:
+        pd.Series: WCSS por K (índice de 1 a max_k).
+    """
+    X = np.asarray(scaled_stats_df, dtype=float)
+    wcss = [KMeans(n_clusters=k, init='k-means++', max_iter=300, n_init=n_init, random_state=42).fit(X).inertia_
+            for k in range(1, max_k + 1)]
+    return pd.Series(wcss, index=pd.RangeIndex(1, max_k + 1, name='K'), name='WCSS')
+
+
+def stratified_subsample(X, sample_size, n_strata=10, rng=None):
+    """
+    Muestra estratificada por la distancia al centro de los datos: cada decil de distancia
+    aporta filas en proporción a su tamaño, así que los jugadores atípicos (los que más
+    pesan en la WCSS) no se pierden en muestras pequeñas.
+
+    Returns:
+        tuple: (filas muestreadas, pesos de cada fila para que la WCSS estime la del total)
+    """
+    rng = rng if rng is not None else np.random.default_rng(42)
+    n_rows = len(X)
+    if sample_size >= n_rows:
+        return X, np.ones(n_rows)
+    sq_distances = np.sum((X - X.mean(axis=0)) ** 2, axis=1)
+    edges = np.quantile(sq_distances, np.linspace(0, 1, n_strata + 1)[1:-1])
+    strata = np.searchsorted(edges, sq_distances, side='right')
+
+    chosen = []
+    for stratum in range(n_strata):
+        members = np.flatnonzero(strata == stratum)
+        if len(members) == 0:
+            continue
+        n_take = max(1, int(round(sample_size * len(members) / n_rows)))
+        chosen.append(rng.choice(members, size=min(n_take, len(members)), replace=False))
+    chosen = np.concatenate(chosen)
+    # Peso = filas del estrato / filas muestreadas del estrato
+    counts = np.bincount(strata, minlength=n_strata)
+    sampled_counts = np.bincount(strata[chosen], minlength=n_strata)
+    weights = counts[strata[chosen]] / sampled_counts[strata[chosen]]
+    return X[chosen], weights
+
+
+def lightweight_coreset(X, sample_size, rng=None):
+    """
+    Coreset ligero (Bachem et al., 2018): muestrea cada fila con probabilidad
+    q(x) = 1/(2n) + d(x, media)^2 / (2 Σ d^2) y le da peso 1 / (m q(x)), de modo que la
+    WCSS ponderada del coreset es un estimador insesgado de la del dataset completo.
+
+    Returns:
+        tuple: (filas del coreset, pesos)
+    """
+    rng = rng if rng is not None else np.random.default_rng(42)
+    n_rows = len(X)
+    if sample_size >= n_rows:
+        return X, np.ones(n_rows)
+    sq_distances = np.sum((X - X.mean(axis=0)) ** 2, axis=1)
+    q = 0.5 / n_rows + 0.5 * sq_distances / sq_distances.sum()
+    chosen = rng.choice(n_rows, size=sample_size, replace=True, p=q)
+    return X[chosen], 1.0 / (sample_size * q[chosen])
+
+
+def approximate_optimal_k(scaled_stats_df, max_k=10, method='coreset', sample_size=2000, n_repeats=5,
+                          n_init=3, verify=True, random_state=42):
+    """
+    Selección aproximada de K: estima la curva WCSS sobre `n_repeats` muestras (estratificadas
+    o coresets ponderados), elige el codo de cada una y devuelve el K más votado con una banda
+    de confianza de la curva. Opcionalmente verifica el K elegido con un ajuste completo.
+
+    Args:
+        scaled_stats_df (pd.DataFrame): DataFrame de estadísticas escaladas (o reducidas).
+        max_k (int): Número máximo de clústeres a probar.
+        method (str): 'coreset' o 'stratified'.
+        sample_size (int): Filas por muestra.
+        n_repeats (int): Número de muestras independientes (para la banda de confianza).
+        n_init (int): Reinicios de KMeans en cada ajuste sobre la muestra.
+        verify (bool): Si True, ajusta el dataset completo con el K elegido y comprueba que
+            su WCSS cae dentro de la banda estimada.
+        random_state (int): Semilla.
+
+    Returns:
+        dict: 'k' (K elegido), 'k_votes' (votos por K), 'wcss' (DataFrame con media, inferior y
+              superior de la banda del 95% por K), 'verification' (WCSS completa y si cae en la banda)
+              y 'elapsed_s'.
+    """
+    if method not in ('coreset', 'stratified'):
+        raise ValueError(f"Método de muestreo desconocido: '{method}'. Usa 'coreset' o 'stratified'.")
+    start = time.perf_counter()
+    X = np.asarray(scaled_stats_df, dtype=float)
+    rng = np.random.default_rng(random_state)
+    k_values = np.arange(1, max_k + 1)
+    sampler = lightweight_coreset if method == 'coreset' else stratified_subsample
+
+    curves = np.empty((n_repeats, max_k))
+    chosen_ks = []
+    for repeat in range(n_repeats):
+        sample, weights = sampler(X, sample_size, rng=rng)
+        for i, k in enumerate(k_values):
+            model = KMeans(n_clusters=k, init='k-means++', max_iter=300, n_init=n_init, random_state=random_state + repeat)
+            model.fit(sample, sample_weight=weights)
+            curves[repeat, i] = model.inertia_ # Con pesos, inertia_ ya estima la WCSS del total
+        chosen_ks.append(elbow_k(k_values, curves[repeat]))
+
+    mean = curves.mean(axis=0)
+    half_width = 1.96 * curves.std(axis=0, ddof=1) / np.sqrt(n_repeats) if n_repeats > 1 else np.zeros(max_k)
+    wcss = pd.DataFrame({'mean': mean, 'lower': mean - half_width, 'upper': mean + half_width},
+                        index=pd.RangeIndex(1, max_k + 1, name='K'))
+    k_votes = pd.Series(chosen_ks).value_counts().sort_index()
+    # Empate de votos: gana el codo de la curva media si está entre los empatados
+    tied = list(k_votes[k_votes == k_votes.max()].index)
+    mean_elbow = elbow_k(k_values, mean)
+    k = int(mean_elbow if mean_elbow in tied else tied[0])
+
+    verification = None
+    if verify:
+        full_wcss = KMeans(n_clusters=k, init='k-means++', max_iter=300, n_init=10, random_state=random_state).fit(X).inertia_
+        lower, upper = wcss.loc[k, 'lower'], wcss.loc[k, 'upper']
+        verification = {
+            'full_wcss': float(full_wcss),
+            'estimated_wcss': float(wcss.loc[k, 'mean']),
+            'relative_error': float(abs(wcss.loc[k, 'mean'] - full_wcss) / full_wcss) if full_wcss else 0.0,
+            'within_band': bool(lower <= full_wcss <= upper),
+        }
+
+    elapsed = time.perf_counter() - start
+    print(f"K aproximado ({method}, {n_repeats} muestras de {min(sample_size, len(X))} filas): K={k} "
+          f"(votos: {({int(key): int(count) for key, count in k_votes.items()})}) en {elapsed:.2f} s")
+    if verification is not None:
+        print(f"Verificación con ajuste completo: WCSS {verification['full_wcss']:.1f} vs estimada "
+              f"{verification['estimated_wcss']:.1f} (error {verification['relative_error']:.1%}, "
+              f"{'dentro' if verification['within_band'] else 'fuera'} de la banda)")
+    return {'k': k, 'k_votes': k_votes, 'wcss': wcss, 'verification': verification, 'elapsed_s': elapsed}
+
+
+def _synthetic_league(X, n_rows, rng, noise=0.05):
+    """Agranda el dataset remuestreando filas con un poco de ruido, para simular varias temporadas."""
+    rows = rng.integers(0, len(X), size=n_rows)
+    return X[rows] + rng.normal(scale=noise, size=(n_rows, X.shape[1]))
+
+
+def benchmark_k_selection(scaled_stats_df, sizes=(2000, 10000, 50000), max_k=10, sample_size=2000,
+                          methods=('coreset', 'stratified'), random_state=42):
+    """
+    Compara el barrido exacto con la selección aproximada en datasets de varios tamaños
+    (generados remuestreando las filas reales): tiempo, aceleración y acuerdo en el K elegido.
+
+    Returns:
+        pd.DataFrame: Una fila por (tamaño, método).
+    """
+    rng = np.random.default_rng(random_state)
+    X = np.asarray(scaled_stats_df, dtype=float)
+    k_values = np.arange(1, max_k + 1)
+    rows = []
+    for size in sizes:
+        data = _synthetic_league(X, size, rng)
+        start = time.perf_counter()
+        exact_wcss = exact_k_sweep(data, max_k=max_k)
+        exact_s = time.perf_counter() - start
+        exact_k = elbow_k(k_values, exact_wcss.to_numpy())
+
+        for method in methods:
+            result = approximate_optimal_k(data, max_k=max_k, method=method, sample_size=sample_size,
+                                           verify=False, random_state=random_state)
+            curve_error = np.abs(result['wcss']['mean'].to_numpy() - exact_wcss.to_numpy()) / exact_wcss.to_numpy()
+            rows.append({
+                'rows': size,
+                'method': method,
+                'exact_s': exact_s,
+                'approx_s': result['elapsed_s'],
+                'speedup': exact_s / result['elapsed_s'],
+                'exact_k': exact_k,
+                'approx_k': result['k'],
+                'agrees': exact_k == result['k'],
+                'max_wcss_error': float(curve_error.max()),
+            })
+
+    results_df = pd.DataFrame(rows)
+    print("\nSelección de K exacta vs aproximada:")
+    print(results_df.round(3).to_string(index=False))
+    return results_df
+
+
+if __name__ == '__main__':
+    from nba_data_processor import load_and_preprocess_data, scale_data
+
+    filepath = 'nba_active_player_stats_2023-24_Regular_Season_100min.xlsx'
+    clustering_stats_columns = [
+        'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT',
+        'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB', 'AST', 'STL',
+        'BLK', 'TOV', 'PF', 'PTS', 'GP', 'GS'
+    ]
+
+    stats_for_clustering, player_data_cleaned, player_names = load_and_preprocess_data(filepath, clustering_stats_columns)
+
+    if stats_for_clustering is not None:
+        scaled_stats_df, scaler = scale_data(stats_for_clustering)
+        approximate_optimal_k(scaled_stats_df, max_k=10, sample_size=300)
+        benchmark_k_selection(scaled_stats_df)
@@ -0,0 +1,275 @@
+import pandas as pd
+import numpy as np
+import os
+import json
+import time
+from nba_player_analyzer import NBA_DRILLS, compute_weak_spot_arrays, describe_weak_area, find_drill_key
+
+# Versión del formato en disco; súbela si cambian los arrays o los metadatos guardados
+SNAPSHOT_FORMAT_VERSION = 1
+
+# Campos numéricos de la instantánea. Cada uno se guarda en su propio archivo .npy
+# con forma (n_jugadores, n_stats), salvo CLUSTER que es un vector (n_jugadores,).
+SNAPSHOT_ARRAY_FIELDS = [
+    'player_stats', 'cluster_avg', 'difference', 'pct_difference',
+    'weak_mask', 'projected_stats', 'drill_codes', 'cluster'
+]
+
+# Claves de NBA_DRILLS en orden fijo; drill_codes guarda el índice en esta lista (-1 = sin drill)
+DRILL_KEYS = list(NBA_DRILLS.keys())
+
+
+class LeagueSnapshot:
+    """
+    Tabla materializada de toda la liga tras el clustering: estadísticas del jugador,
+    promedio de su clúster, diferencias, áreas débiles, proyecciones y drills asignados.
+
+    Los datos se guardan por columnas (un .npy por campo) y se pueden abrir con
+    memory-map, de modo que consultar un jugador es un acceso por índice y no
+    requiere recalcular nada.
+    """
+
+    def __init__(self, arrays, metadata):
+        self.arrays = arrays
+        self.metadata = metadata
+        self.stats_columns = metadata['stats_columns']
+        self.player_names = metadata['player_names']
+        self.row_labels = metadata['row_labels']
+        self.cluster_roles = {int(k): v for k, v in metadata['cluster_roles'].items()}
+
+        # Índice nombre -> posición. Igual que en analyze_player_weak_spots, si un jugador
+        # aparece varias veces (traspasos) se usa su primera fila.
+        self._positions = {}
+        for position, name in enumerate(self.player_names):
+            self._positions.setdefault(name, position)
+
+    def __len__(self):
+        return len(self.player_names)
+
+    def __contains__(self, player_name):
+        return player_name in self._positions
+
+    def position(self, player_name):
+        """Devuelve la posición (fila) del jugador en la instantánea."""
+        return self._positions[player_name]
+
+    def row_label(self, player_name):
+        """Devuelve la etiqueta de índice del jugador en el DataFrame original."""
+        return self.row_labels[self._positions[player_name]]
+
+    def get_player(self, player_name):
+        """
+        Devuelve todos los datos materializados de un jugador.
+
+        Args:
+            player_name (str): Nombre del jugador.
+
+        Returns:
+            dict: Series indexadas por estadística ('player_stats', 'cluster_avg', 'difference',
+                  'pct_difference', 'projected_stats'), la máscara 'weak_mask', las claves de drills
+                  'drill_keys', el clúster, su rol y la lista 'stats_columns'.
+        """
+        position = self._positions[player_name]
+        cluster = int(self.arrays['cluster'][position])
+        entry = {
+            'player_name': player_name,
+            'row_label': self.row_labels[position],
+            'cluster': cluster,
+            'role': self.cluster_roles.get(cluster, "Rol Desconocido"),
+            'stats_columns': self.stats_columns,
+            'weak_mask': np.asarray(self.arrays['weak_mask'][position], dtype=bool),
+        }
+        for field in ['player_stats', 'cluster_avg', 'difference', 'pct_difference', 'projected_stats']:
+            entry[field] = pd.Series(np.asarray(self.arrays[field][position]), index=self.stats_columns, name=player_name)
+        drill_codes = np.asarray(self.arrays['drill_codes'][position])
+        entry['drill_keys'] = {
+            stat: DRILL_KEYS[code]
+            for stat, code in zip(self.stats_columns, drill_codes) if code >= 0
+        }
+        return entry
+
+    def comparison_frame(self, player_name):
+        """Devuelve la tabla jugador vs. promedio de clúster con las mismas columnas que el análisis por jugador."""
+        entry = self.get_player(player_name)
+        return pd.DataFrame({
+            'Player Stats': entry['player_stats'],
+            'Cluster Average': entry['cluster_avg'],
+            'Difference': entry['difference'],
+            'Percentage Difference': entry['pct_difference']
+        })
+
+    def weak_areas(self, player_name):
+        """Devuelve las descripciones de las áreas débiles del jugador."""
+        entry = self.get_player(player_name)
+        return [
+            describe_weak_area(stat, entry['player_stats'][stat], entry['cluster_avg'][stat])
+            for stat, is_weak in zip(self.stats_columns, entry['weak_mask']) if is_weak
+        ]
+
+    def field_frame(self, field):
+        """Devuelve un campo de la instantánea para toda la liga como DataFrame (jugadores x estadísticas)."""
+        return pd.DataFrame(np.asarray(self.arrays[field]), index=self.player_names, columns=self.stats_columns)
+
+    def save(self, directory):
+        """
+        Guarda la instantánea en un directorio: un .npy por campo más metadata.json.
+
+        Args:
+            directory (str): Directorio de destino (se crea si no existe).
+        """
+        os.makedirs(directory, exist_ok=True)
+        for field in SNAPSHOT_ARRAY_FIELDS:
+            np.save(os.path.join(directory, f"{field}.npy"), np.ascontiguousarray(self.arrays[field]))
+        with open(os.path.join(directory, 'metadata.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.metadata, f, ensure_ascii=False)
+        print(f"Instantánea de la liga guardada en: {directory}")
+
+
+def build_league_snapshot(player_data_with_clusters, cluster_means, cluster_roles, stats_columns, threshold_multiplier=0.75):
+    """
+    Materializa la comparación con el clúster, las áreas débiles, las proyecciones
+    y los drills de todos los jugadores en una sola pasada vectorizada.
+
+    Args:
+        player_data_with_clusters (pd.DataFrame): DataFrame de jugadores con la columna 'CLUSTER'.
+        cluster_means (pd.DataFrame): Estadísticas promedio por clúster (salida de analyze_clusters).
+        cluster_roles (dict): Rol asignado a cada clúster (salida de assign_cluster_roles).
+        stats_columns (list): Columnas de estadísticas a materializar.
+        threshold_multiplier (float): Mismo umbral que usa analyze_player_weak_spots.
+
+    Returns:
+        LeagueSnapshot: Instantánea de la liga lista para consultar o guardar.
+    """
+    stats_columns = [s for s in stats_columns if s in player_data_with_clusters.columns and s in cluster_means.columns]
+    clusters = player_data_with_clusters['CLUSTER'].to_numpy()
+
+    player_values = player_data_with_clusters[stats_columns].to_numpy(dtype=float)
+    cluster_avg_values = cluster_means.loc[clusters, stats_columns].to_numpy(dtype=float)
+    if 'GP' in player_data_with_clusters.columns:
+        games_played = player_data_with_clusters['GP'].to_numpy(dtype=float)
+    else:
+        games_played = np.full(len(player_data_with_clusters), np.nan)
+
+    weak_mask, projected_values = compute_weak_spot_arrays(
+        player_values, cluster_avg_values, games_played, stats_columns, threshold_multiplier
+    )
+
+    difference = player_values - cluster_avg_values
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct_difference = difference / cluster_avg_values * 100
+
+    # La clave de drill depende solo de la estadística (la descripción no cambia con los valores)
+    column_drill_codes = np.array([
+        DRILL_KEYS.index(key) if key is not None else -1
+        for key in (find_drill_key(describe_weak_area(stat, 0.0, 0.0)) for stat in stats_columns)
+    ], dtype=np.int8)
+    drill_codes = np.where(weak_mask, column_drill_codes, np.int8(-1)).astype(np.int8)
+
+    arrays = {
+        'player_stats': player_values,
+        'cluster_avg': cluster_avg_values,
+        'difference': difference,
+        'pct_difference': pct_difference,
+        'weak_mask': weak_mask,
+        'projected_stats': projected_values,
+        'drill_codes': drill_codes,
+        'cluster': clusters.astype(np.int32),
+    }
+    metadata = {
+        'format_version': SNAPSHOT_FORMAT_VERSION,
+        'stats_columns': stats_columns,
+        'player_names': player_data_with_clusters['PLAYER_NAME'].astype(str).tolist(),
+        'row_labels': player_data_with_clusters.index.tolist(),
+        'cluster_roles': {str(int(k)): v for k, v in cluster_roles.items()},
+        'threshold_multiplier': threshold_multiplier,
+        'drill_keys': DRILL_KEYS,
+    }
+    return LeagueSnapshot(arrays, metadata)
+
+
+def load_league_snapshot(directory, mmap=True):
+    """
+    Carga una instantánea guardada con LeagueSnapshot.save.
+
+    Args:
+        directory (str): Directorio de la instantánea.
+        mmap (bool): Si es True, los arrays se abren con memory-map (solo lectura) en lugar de leerse a RAM.
+
+    Returns:
+        LeagueSnapshot: La instantánea, o None si no existe o su formato no es compatible.
+    """
+    metadata_path = os.path.join(directory, 'metadata.json')
+    if not os.path.exists(metadata_path):
+        print(f"Error: No se encontró una instantánea de la liga en '{directory}'")
+        return None
+
+    with open(metadata_path, encoding='utf-8') as f:
+        metadata = json.load(f)
+    if metadata.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+        print(f"Error: La instantánea en '{directory}' tiene un formato incompatible ({metadata.get('format_version')}).")
+        return None
+
+    mmap_mode = 'r' if mmap else None
+    arrays = {
+        field: np.load(os.path.join(directory, f"{field}.npy"), mmap_mode=mmap_mode)
+        for field in SNAPSHOT_ARRAY_FIELDS
+    }
+    return LeagueSnapshot(arrays, metadata)
+
+
+def benchmark_league_snapshot(player_data_with_clusters, cluster_means, cluster_roles, stats_columns,
+                              directory='league_snapshot', n_lookups=1000):
+    """
+    Mide el tiempo de construir, guardar y cargar la instantánea, y la latencia
+    media de una consulta por jugador sobre la instantánea cargada con memory-map.
+
+    Returns:
+        dict: Tiempos en segundos ('build_s', 'save_s', 'load_s') y latencia media por consulta en microsegundos ('lookup_us').
+    """
+    start = time.perf_counter()
+    snapshot = build_league_snapshot(player_data_with_clusters, cluster_means, cluster_roles, stats_columns)
+    build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    snapshot.save(directory)
+    save_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    loaded = load_league_snapshot(directory, mmap=True)
+    load_s = time.perf_counter() - start
+
+    names = list(dict.fromkeys(loaded.player_names))
+    rng = np.random.default_rng(42)
+    sample = [names[i] for i in rng.integers(0, len(names), size=n_lookups)]
+    start = time.perf_counter()
+    for name in sample:
+        loaded.get_player(name)
+    lookup_us = (time.perf_counter() - start) / n_lookups * 1e6
+
+    results = {'players': len(snapshot), 'build_s': build_s, 'save_s': save_s, 'load_s': load_s, 'lookup_us': lookup_us}
+    print(f"\nInstantánea de {results['players']} jugadores: construcción {build_s * 1000:.1f} ms, "
+          f"guardado {save_s * 1000:.1f} ms, carga {load_s * 1000:.1f} ms, consulta {lookup_us:.1f} µs/jugador")
+    return results
+
+
+if __name__ == '__main__':
+    from nba_data_processor import load_and_preprocess_data, scale_data, perform_kmeans_clustering, analyze_clusters
+    from nba_player_analyzer import assign_cluster_roles
+
+    filepath = 'nba_active_player_stats_2023-24_Regular_Season_100min.xlsx'
+    clustering_stats_columns = [
+        'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT',
+        'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB', 'AST', 'STL',
+        'BLK', 'TOV', 'PF', 'PTS', 'GP', 'GS'
+    ]
+
+    stats_for_clustering, player_data_cleaned, player_names = load_and_preprocess_data(filepath, clustering_stats_columns)
+
+    if stats_for_clustering is not None:
+        scaled_stats_df, scaler = scale_data(stats_for_clustering)
+        clusters, kmeans_model = perform_kmeans_clustering(scaled_stats_df, 5)
+        player_data_cleaned['CLUSTER'] = clusters
+        cluster_means = analyze_clusters(player_data_cleaned, clustering_stats_columns)
+        cluster_roles = assign_cluster_roles(cluster_means)
+
+        benchmark_league_snapshot(player_data_cleaned, cluster_means, cluster_roles, clustering_stats_columns)
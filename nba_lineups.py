@@ -0,0 +1,237 @@
+import pandas as pd
+import numpy as np
+import time
+from math import comb
+from itertools import combinations, chain
+
+# Evaluador de quintetos: enumera todas las combinaciones C(n, 5) de la plantilla de cada
+# equipo y las puntúa con operaciones por lotes sobre arrays (sin un bucle de Python por
+# quinteto). Las estadísticas se pasan a promedios por partido para que jugadores con
+# distinto número de partidos sean comparables.
+
+LINEUP_SIZE = 5
+
+# Valor de un quinteto: suma lineal de las estadísticas por partido de sus jugadores
+LINEUP_SCORE_WEIGHTS = {'PTS': 1.0, 'REB': 1.2, 'AST': 1.5, 'STL': 2.0, 'BLK': 2.0, 'TOV': -1.0}
+
+# Estadísticas por partido que se suman en el perfil del quinteto, y tiros cuyo porcentaje
+# se recalcula como anotados / intentados del quinteto
+PROFILE_STATS = ['PTS', 'REB', 'OREB', 'DREB', 'AST', 'STL', 'BLK', 'TOV', 'PF', 'FGM', 'FGA', 'FG3M', 'FG3A', 'FTM', 'FTA']
+SHOOTING_PCTS = {'FG_PCT': ('FGM', 'FGA'), 'FG3_PCT': ('FG3M', 'FG3A'), 'FT_PCT': ('FTM', 'FTA')}
+
+_combination_cache = {}
+
+
+def lineup_combinations(n_players, size=LINEUP_SIZE):
+    """Devuelve (y guarda en caché) la matriz (C(n, size), size) con los índices de cada combinación."""
+    key = (n_players, size)
+    if key not in _combination_cache:
+        count = comb(n_players, size)
+        flat = np.fromiter(chain.from_iterable(combinations(range(n_players), size)), dtype=np.int16, count=count * size)
+        _combination_cache[key] = flat.reshape(count, size)
+    return _combination_cache[key]
+
+
+def role_mix_scores(role_codes, combos, n_roles, max_per_role=2):
+    """
+    Puntuación de variedad de roles de cada quinteto, entre 0 y 1: fracción de roles distintos
+    (respecto al máximo posible) menos una penalización por cada jugador que exceda
+    `max_per_role` jugadores del mismo rol.
+
+    Args:
+        role_codes (numpy.ndarray): Código de rol de cada jugador de la plantilla.
+        combos (numpy.ndarray): Matriz de combinaciones (quintetos x 5).
+        n_roles (int): Número de roles distintos en la liga.
+        max_per_role (int): Jugadores del mismo rol permitidos sin penalización.
+
+    Returns:
+        tuple: (puntuaciones, matriz quintetos x roles con el número de jugadores de cada rol)
+    """
+    one_hot = np.eye(n_roles, dtype=np.int8)[role_codes]
+    role_counts = one_hot[combos].sum(axis=1)
+    distinct = (role_counts > 0).sum(axis=1)
+    overload = np.maximum(role_counts - max_per_role, 0).sum(axis=1)
+    scores = distinct / min(LINEUP_SIZE, n_roles) - 0.25 * overload
+    return np.clip(scores, 0.0, 1.0), role_counts
+
+
+def _roster_arrays(roster, stats_source, score_weights):
+    """Estadísticas por partido de la plantilla y contribución lineal de cada jugador al valor del quinteto."""
+    games = roster['GP'].to_numpy(dtype=float)
+    games = np.where(games > 0, games, np.nan)
+    profile_cols = [col for col in PROFILE_STATS if col in stats_source.columns]
+    per_game = np.nan_to_num(stats_source[profile_cols].to_numpy(dtype=float) / games[:, None])
+    weights = np.array([score_weights.get(col, 0.0) for col in profile_cols])
+    return profile_cols, per_game, per_game @ weights
+
+
+def evaluate_team_lineups(roster, stats_source, role_codes, n_roles, top_k=10, role_weight=10.0,
+                          score_weights=LINEUP_SCORE_WEIGHTS, prune=True):
+    """
+    Evalúa todos los quintetos de una plantilla y devuelve los `top_k` mejores.
+
+    La puntuación es valor lineal (suma de contribuciones por jugador) + role_weight x variedad
+    de roles. Como la variedad está acotada por 1, un quinteto con valor lineal + role_weight
+    por debajo del k-ésimo mejor quinteto conocido no puede entrar en el top-k: se descarta
+    antes de calcular su perfil completo.
+
+    Args:
+        roster (pd.DataFrame): Filas de la plantilla (con 'PLAYER_NAME' y 'GP').
+        stats_source (pd.DataFrame): Estadísticas a usar (reales o proyectadas), mismo índice que roster.
+        role_codes (numpy.ndarray): Código de rol de cada jugador.
+        n_roles (int): Número de roles de la liga.
+        top_k (int): Quintetos a devolver.
+        role_weight (float): Peso de la variedad de roles en la puntuación.
+        score_weights (dict): Pesos del valor lineal por estadística.
+        prune (bool): Si False, evalúa todos los quintetos (para comparar en el benchmark).
+
+    Returns:
+        tuple: (DataFrame de los mejores quintetos, dict con quintetos totales y evaluados)
+    """
+    n_players = len(roster)
+    if n_players < LINEUP_SIZE:
+        return pd.DataFrame(), {'lineups': 0, 'evaluated': 0}
+    profile_cols, per_game, contributions = _roster_arrays(roster, stats_source, score_weights)
+    combos = lineup_combinations(n_players)
+    linear = contributions[combos].sum(axis=1)
+
+    candidates = np.arange(len(combos))
+    if prune and len(combos) > top_k:
+        # Umbral: k-ésima mejor puntuación real entre los quintetos de los mejores jugadores individuales
+        n_best = LINEUP_SIZE
+        while comb(n_best, LINEUP_SIZE) < top_k and n_best < n_players:
+            n_best += 1
+        best_players = np.argsort(-contributions)[:n_best]
+        seed = best_players[lineup_combinations(n_best)]
+        seed_scores = contributions[seed].sum(axis=1) + role_weight * role_mix_scores(role_codes, seed, n_roles)[0]
+        threshold = np.partition(seed_scores, -top_k)[-top_k]
+        candidates = np.flatnonzero(linear + role_weight >= threshold)
+
+    role_mix, role_counts = role_mix_scores(role_codes, combos[candidates], n_roles)
+    scores = linear[candidates] + role_weight * role_mix
+    order = np.argsort(-scores, kind='stable')[:top_k]
+    chosen = combos[candidates[order]]
+
+    # Perfil agregado solo de los quintetos elegidos
+    profile = per_game[chosen].sum(axis=1)
+    result = pd.DataFrame(profile, columns=[f"{col}_PG" for col in profile_cols])
+    for pct, (made, attempted) in SHOOTING_PCTS.items():
+        if made in profile_cols and attempted in profile_cols:
+            made_sum = profile[:, profile_cols.index(made)]
+            attempted_sum = profile[:, profile_cols.index(attempted)]
+            result[pct] = np.divide(made_sum, attempted_sum, out=np.full(len(chosen), np.nan), where=attempted_sum > 0)
+
+    names = roster['PLAYER_NAME'].to_numpy()
+    result.insert(0, 'rank', np.arange(1, len(chosen) + 1))
+    result.insert(1, 'players', [' / '.join(row) for row in names[chosen]])
+    result.insert(2, 'score', scores[order])
+    result.insert(3, 'value', linear[candidates[order]])
+    result.insert(4, 'role_mix', role_mix[order])
+    result.insert(5, 'role_counts', [row for row in role_counts[order]])
+    return result, {'lineups': len(combos), 'evaluated': len(candidates)}
+
+
+def evaluate_league_lineups(player_data_with_clusters, cluster_roles, snapshot=None, use_projected=False, top_k=10,
+                            role_weight=10.0, min_games=10, prune=True, verbose=True):
+    """
+    Evalúa los quintetos de los 30 equipos y devuelve los `top_k` mejores de cada uno.
+
+    Args:
+        player_data_with_clusters (pd.DataFrame): DataFrame de jugadores con 'CLUSTER' y 'TEAM_ABBREVIATION'.
+        cluster_roles (dict): Rol de cada clúster.
+        snapshot (LeagueSnapshot, optional): Necesaria si use_projected es True.
+        use_projected (bool): Si True, usa las estadísticas proyectadas de la instantánea.
+        top_k (int): Quintetos a devolver por equipo.
+        role_weight (float): Peso de la variedad de roles.
+        min_games (int): Partidos mínimos para entrar en la plantilla evaluada.
+        prune (bool): Poda por cotas (False = evaluación exhaustiva).
+        verbose (bool): Si True, imprime el resumen.
+
+    Returns:
+        tuple: (DataFrame con los mejores quintetos por equipo, dict de estadísticas de la ejecución)
+    """
+    start = time.perf_counter()
+    # Las filas 'TOT' suman los equipos de un jugador traspasado: no pertenecen a ninguna plantilla
+    teams_data = player_data_with_clusters[player_data_with_clusters['TEAM_ABBREVIATION'] != 'TOT']
+    teams_data = teams_data[teams_data['GP'] >= min_games]
+
+    stats_source = teams_data
+    if use_projected:
+        if snapshot is None:
+            print("Error: Se necesita la instantánea de la liga para usar estadísticas proyectadas.")
+            return None, None
+        positions = pd.Series(range(len(snapshot.row_labels)), index=snapshot.row_labels)
+        projected = np.asarray(snapshot.arrays['projected_stats'])[positions.loc[teams_data.index].to_numpy()]
+        stats_source = pd.DataFrame(projected, index=teams_data.index, columns=snapshot.stats_columns)
+
+    role_names = list(dict.fromkeys(cluster_roles.values()))
+    role_codes_all = pd.Series([role_names.index(cluster_roles.get(c, role_names[0])) for c in teams_data['CLUSTER']],
+                               index=teams_data.index)
+
+    results, lineups, evaluated = [], 0, 0
+    for team, roster in teams_data.groupby('TEAM_ABBREVIATION'):
+        team_result, counts = evaluate_team_lineups(roster, stats_source.loc[roster.index], role_codes_all.loc[roster.index].to_numpy(),
+                                                    len(role_names), top_k=top_k, role_weight=role_weight, prune=prune)
+        lineups += counts['lineups']
+        evaluated += counts['evaluated']
+        if not team_result.empty:
+            team_result.insert(0, 'TEAM_ABBREVIATION', team)
+            team_result['role_counts'] = [dict(zip(role_names, map(int, row))) for row in team_result['role_counts']]
+            results.append(team_result)
+
+    elapsed = time.perf_counter() - start
+    lineups_df = pd.concat(results, ignore_index=True) if results else pd.DataFrame()
+    run_stats = {'teams': len(results), 'lineups': lineups, 'evaluated': evaluated, 'elapsed_s': elapsed}
+    if verbose:
+        print(f"Quintetos: {lineups:,} posibles en {len(results)} equipos, {evaluated:,} evaluados tras la poda, "
+              f"{elapsed:.2f} s")
+    return lineups_df, run_stats
+
+
+def benchmark_lineups(player_data_with_clusters, cluster_roles, top_k=10, min_games=0):
+    """
+    Compara la evaluación con poda y la exhaustiva en toda la liga, y comprueba que los
+    mejores quintetos coinciden.
+
+    Returns:
+        dict: Tiempos, quintetos evaluados y si los resultados son idénticos.
+    """
+    exhaustive, exhaustive_stats = evaluate_league_lineups(player_data_with_clusters, cluster_roles, top_k=top_k,
+                                                           min_games=min_games, prune=False, verbose=False)
+    pruned, pruned_stats = evaluate_league_lineups(player_data_with_clusters, cluster_roles, top_k=top_k,
+                                                   min_games=min_games, prune=True, verbose=False)
+    same = exhaustive[['TEAM_ABBREVIATION', 'players']].equals(pruned[['TEAM_ABBREVIATION', 'players']]) and \
+        np.allclose(exhaustive['score'], pruned['score'])
+    print(f"Quintetos de la liga ({exhaustive_stats['lineups']:,}): exhaustivo {exhaustive_stats['elapsed_s']:.2f} s, "
+          f"con poda {pruned_stats['elapsed_s']:.2f} s ({pruned_stats['evaluated']:,} evaluados); "
+          f"resultados {'idénticos' if same else 'DISTINTOS'}")
+    return {'exhaustive': exhaustive_stats, 'pruned': pruned_stats, 'identical': same}
+
+
+if __name__ == '__main__':
+    from nba_data_processor import load_and_preprocess_data, scale_data, perform_kmeans_clustering, analyze_clusters
+    from nba_player_analyzer import assign_cluster_roles
+    from nba_league_snapshot import build_league_snapshot
+
+    filepath = 'nba_active_player_stats_2023-24_Regular_Season_100min.xlsx'
+    clustering_stats_columns = [
+        'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT',
+        'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB', 'AST', 'STL',
+        'BLK', 'TOV', 'PF', 'PTS', 'GP', 'GS'
+    ]
+
+    stats_for_clustering, player_data_cleaned, player_names = load_and_preprocess_data(filepath, clustering_stats_columns)
+
+    if stats_for_clustering is not None:
+        scaled_stats_df, scaler = scale_data(stats_for_clustering)
+        clusters, kmeans_model = perform_kmeans_clustering(scaled_stats_df, 5)
+        player_data_cleaned['CLUSTER'] = clusters
+        cluster_means = analyze_clusters(player_data_cleaned, clustering_stats_columns)
+        cluster_roles = assign_cluster_roles(cluster_means)
+        league_snapshot = build_league_snapshot(player_data_cleaned, cluster_means, cluster_roles, clustering_stats_columns)
+
+        lineups_df, _ = evaluate_league_lineups(player_data_cleaned, cluster_roles, top_k=3)
+        print(lineups_df[['TEAM_ABBREVIATION', 'rank', 'players', 'score', 'role_mix', 'PTS_PG', 'FG_PCT']].head(9).round(3).to_string(index=False))
+        projected_df, _ = evaluate_league_lineups(player_data_cleaned, cluster_roles, snapshot=league_snapshot, use_projected=True, top_k=1)
+        print(projected_df[['TEAM_ABBREVIATION', 'players', 'score']].head(5).round(2).to_string(index=False))
+        benchmark_lineups(player_data_cleaned, cluster_roles)
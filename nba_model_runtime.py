@@ -0,0 +1,190 @@
+import numpy as np
+import time
+import warnings
+
+# Este módulo solo depende de NumPy: sirve para asignar clúster y rol a nuevas líneas
+# estadísticas sin cargar pandas ni scikit-learn.
+
+MODEL_FORMAT_VERSION = 1
+
+
+def export_cluster_model(scaler, kmeans_model, stats_columns, cluster_roles, filepath='cluster_model.npz'):
+    """
+    Exporta lo mínimo necesario para asignar clústeres: media y escala del StandardScaler,
+    centroides de KMeans, orden de columnas y roles de assign_cluster_roles.
+
+    Args:
+        scaler (sklearn.preprocessing.StandardScaler): Escalador entrenado.
+        kmeans_model (sklearn.cluster.KMeans): Modelo KMeans entrenado (o cualquiera con cluster_centers_).
+        stats_columns (list): Columnas usadas para el clustering, en el orden del escalador.
+        cluster_roles (dict): Rol de cada clúster.
+        filepath (str): Ruta del archivo .npz de salida.
+    """
+    columns = list(getattr(scaler, 'feature_names_in_', stats_columns))
+    centroids = np.asarray(kmeans_model.cluster_centers_, dtype=float)
+    roles = [cluster_roles.get(cluster_id, "Rol Desconocido") for cluster_id in range(len(centroids))]
+    np.savez(
+        filepath,
+        format_version=np.array(MODEL_FORMAT_VERSION),
+        mean=np.asarray(scaler.mean_, dtype=float),
+        scale=np.asarray(scaler.scale_, dtype=float),
+        centroids=centroids,
+        columns=np.array(columns),
+        roles=np.array(roles),
+    )
+    print(f"Modelo de clústeres exportado en: {filepath}")
+
+
+class ClusterScorer:
+    """
+    Asignador de clúster y rol en NumPy puro, equivalente a scaler.transform + kmeans_model.predict.
+    """
+
+    def __init__(self, mean, scale, centroids, columns, roles):
+        self.mean = np.asarray(mean, dtype=float)
+        self.scale = np.asarray(scale, dtype=float)
+        self.centroids = np.ascontiguousarray(centroids, dtype=float)
+        self.columns = [str(col) for col in columns]
+        self.roles = [str(role) for role in roles]
+        self._column_positions = {col: i for i, col in enumerate(self.columns)}
+        # Igual que KMeans.predict: distancia^2 = ||c||^2 - 2 x·c (el término ||x||^2 no cambia el argmin)
+        self._centroids_sq_norms = np.einsum('ij,ij->i', self.centroids, self.centroids)
+
+    def _to_matrix(self, rows):
+        if isinstance(rows, dict):
+            rows = [rows]
+        if isinstance(rows, (list, tuple)) and rows and isinstance(rows[0], dict):
+            return np.array([[row[col] for col in self.columns] for row in rows], dtype=float)
+        return np.atleast_2d(np.asarray(rows, dtype=float))
+
+    def assign_batch(self, rows):
+        """
+        Asigna clúster a un lote de líneas estadísticas (sin escalar).
+
+        Args:
+            rows (array-like): Matriz (n, n_columnas) en el orden de `columns`, o lista de dicts {columna: valor}.
+
+        Returns:
+            numpy.ndarray: Etiqueta de clúster de cada fila.
+        """
+        scaled = (self._to_matrix(rows) - self.mean) / self.scale
+        distances = self._centroids_sq_norms - 2.0 * (scaled @ self.centroids.T)
+        return np.argmin(distances, axis=1)
+
+    def assign(self, row):
+        """
+        Asigna clúster y rol a una sola línea estadística.
+
+        Args:
+            row (array-like o dict): Valores en el orden de `columns`, o dict {columna: valor}.
+
+        Returns:
+            tuple: (clúster, rol)
+        """
+        if isinstance(row, dict):
+            row = [row[col] for col in self.columns]
+        scaled = (np.asarray(row, dtype=float) - self.mean) / self.scale
+        cluster = int(np.argmin(self._centroids_sq_norms - 2.0 * (self.centroids @ scaled)))
+        return cluster, self.roles[cluster]
+
+    def roles_for(self, labels):
+        """Convierte un array de etiquetas de clúster en la lista de roles correspondiente."""
+        return [self.roles[label] for label in labels]
+
+
+def load_cluster_model(filepath='cluster_model.npz'):
+    """
+    Carga un modelo exportado con export_cluster_model.
+
+    Returns:
+        ClusterScorer: El asignador, o None si el archivo no existe o su formato no es compatible.
+    """
+    try:
+        with np.load(filepath, allow_pickle=False) as data:
+            if int(data['format_version']) != MODEL_FORMAT_VERSION:
+                print(f"Error: El modelo en '{filepath}' tiene un formato incompatible ({int(data['format_version'])}).")
+                return None
+            return ClusterScorer(data['mean'], data['scale'], data['centroids'], data['columns'].tolist(), data['roles'].tolist())
+    except FileNotFoundError:
+        print(f"Error: El archivo no se encontró en '{filepath}'")
+        return None
+
+
+def verify_against_kmeans(scorer, kmeans_model, scaler, stats_df):
+    """
+    Comprueba que las etiquetas del asignador coinciden exactamente con kmeans_model.predict.
+
+    Args:
+        scorer (ClusterScorer): Asignador a verificar.
+        kmeans_model (sklearn.cluster.KMeans): Modelo de referencia.
+        scaler (sklearn.preprocessing.StandardScaler): Escalador de referencia.
+        stats_df (pd.DataFrame): Estadísticas sin escalar, con las columnas del modelo.
+
+    Returns:
+        int: Número de filas cuya etiqueta no coincide (0 si todo coincide).
+    """
+    with warnings.catch_warnings():
+        # KMeans se entrenó con un DataFrame y aquí recibe el array escalado: el aviso de nombres no aplica
+        warnings.simplefilter('ignore', category=UserWarning)
+        expected = kmeans_model.predict(scaler.transform(stats_df[scorer.columns]))
+    labels = scorer.assign_batch(stats_df[scorer.columns].to_numpy(dtype=float))
+    mismatches = int(np.sum(labels != expected))
+    single_row_mismatches = sum(
+        scorer.assign(row)[0] != label for row, label in zip(stats_df[scorer.columns].to_numpy(dtype=float), expected)
+    )
+    print(f"Verificación contra KMeans.predict: {mismatches} diferencias en lote, {single_row_mismatches} fila a fila (de {len(expected)})")
+    return mismatches + single_row_mismatches
+
+
+def benchmark_scorer(scorer, rows, n_single=10000):
+    """
+    Mide la latencia de asignar una sola fila y el rendimiento del lote vectorizado.
+
+    Args:
+        scorer (ClusterScorer): Asignador a medir.
+        rows (numpy.ndarray): Matriz de líneas estadísticas (n, n_columnas).
+        n_single (int): Número de asignaciones individuales a medir.
+
+    Returns:
+        dict: 'single_row_us' (µs por fila) y 'batch_rows_per_s'.
+    """
+    rows = np.asarray(rows, dtype=float)
+    start = time.perf_counter()
+    for i in range(n_single):
+        scorer.assign(rows[i % len(rows)])
+    single_row_us = (time.perf_counter() - start) / n_single * 1e6
+
+    # Lote grande replicando las filas para que el tiempo sea medible
+    batch = np.tile(rows, (max(1, 1_000_000 // len(rows)), 1))
+    start = time.perf_counter()
+    scorer.assign_batch(batch)
+    batch_rows_per_s = len(batch) / (time.perf_counter() - start)
+
+    print(f"Asignación individual: {single_row_us:.1f} µs/fila | lote vectorizado: {batch_rows_per_s:,.0f} filas/s")
+    return {'single_row_us': single_row_us, 'batch_rows_per_s': batch_rows_per_s}
+
+
+if __name__ == '__main__':
+    from nba_data_processor import load_and_preprocess_data, scale_data, perform_kmeans_clustering, analyze_clusters
+    from nba_player_analyzer import assign_cluster_roles
+
+    filepath = 'nba_active_player_stats_2023-24_Regular_Season_100min.xlsx'
+    clustering_stats_columns = [
+        'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT',
+        'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB', 'AST', 'STL',
+        'BLK', 'TOV', 'PF', 'PTS', 'GP', 'GS'
+    ]
+
+    stats_for_clustering, player_data_cleaned, player_names = load_and_preprocess_data(filepath, clustering_stats_columns)
+
+    if stats_for_clustering is not None:
+        scaled_stats_df, scaler = scale_data(stats_for_clustering)
+        clusters, kmeans_model = perform_kmeans_clustering(scaled_stats_df, 5)
+        player_data_cleaned['CLUSTER'] = clusters
+        cluster_means = analyze_clusters(player_data_cleaned, clustering_stats_columns)
+        cluster_roles = assign_cluster_roles(cluster_means)
+
+        export_cluster_model(scaler, kmeans_model, clustering_stats_columns, cluster_roles)
+        scorer = load_cluster_model()
+        assert verify_against_kmeans(scorer, kmeans_model, scaler, stats_for_clustering) == 0, "Las etiquetas no coinciden con KMeans.predict"
+        benchmark_scorer(scorer, stats_for_clustering[scorer.columns].to_numpy(dtype=float))
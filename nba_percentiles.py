@@ -0,0 +1,151 @@
+import pandas as pd
+import numpy as np
+
+
+class PercentileEngine:
+    """
+    Motor de percentiles de la liga. Ordena cada columna de estadísticas una sola vez,
+    para toda la liga y por clúster, y responde percentiles con búsqueda binaria
+    (numpy.searchsorted) sin volver a ordenar en cada consulta.
+
+    El percentil es de rango medio: (valores menores + 0.5 * valores iguales) / total * 100,
+    de modo que el jugador con el valor más alto no llega exactamente a 100.
+    """
+
+    def __init__(self, player_data_with_clusters, stats_columns):
+        """
+        Args:
+            player_data_with_clusters (pd.DataFrame): DataFrame de jugadores; si tiene la columna
+                'CLUSTER' también se preparan los percentiles por clúster.
+            stats_columns (list): Columnas de estadísticas para las que se calculan percentiles.
+        """
+        self.stats_columns = [s for s in stats_columns if s in player_data_with_clusters.columns]
+        self._sorted = {}
+        self._sorted_by_cluster = {}
+        self.add_rows(player_data_with_clusters)
+
+    def add_rows(self, new_rows):
+        """
+        Añade jugadores al motor de forma incremental: los valores nuevos se ordenan
+        y se intercalan en los arrays ya ordenados, sin reordenar todo.
+
+        Args:
+            new_rows (pd.DataFrame): Filas nuevas con las mismas columnas de estadísticas
+                (y 'CLUSTER' si se usan percentiles por clúster).
+        """
+        has_clusters = 'CLUSTER' in new_rows.columns
+        for stat in self.stats_columns:
+            values = pd.to_numeric(new_rows[stat], errors='coerce').to_numpy(dtype=float)
+            self._sorted[stat] = _merge_sorted(self._sorted.get(stat), values)
+            if not has_clusters:
+                continue
+            for cluster, cluster_values in pd.Series(values, index=new_rows.index).groupby(new_rows['CLUSTER'].to_numpy()):
+                by_stat = self._sorted_by_cluster.setdefault(cluster, {})
+                by_stat[stat] = _merge_sorted(by_stat.get(stat), cluster_values.to_numpy())
+
+    def _sorted_values(self, stat, cluster=None):
+        if cluster is None:
+            return self._sorted[stat]
+        return self._sorted_by_cluster.get(cluster, {}).get(stat, np.empty(0))
+
+    def percentile(self, value, stat, cluster=None):
+        """
+        Devuelve el percentil (0-100) de un valor dentro de la liga o de un clúster.
+
+        Args:
+            value (float): Valor de la estadística.
+            stat (str): Nombre de la estadística.
+            cluster (int, optional): Si se indica, el percentil se calcula dentro de ese clúster.
+
+        Returns:
+            float: Percentil, o NaN si el valor es NaN o no hay datos de referencia.
+        """
+        return float(self.percentiles(np.array([value], dtype=float), stat, cluster)[0])
+
+    def percentiles(self, values, stat, cluster=None):
+        """Versión por lotes de `percentile` para un array de valores de una misma estadística."""
+        sorted_values = self._sorted_values(stat, cluster)
+        values = np.asarray(values, dtype=float)
+        if len(sorted_values) == 0:
+            return np.full(values.shape, np.nan)
+        below = np.searchsorted(sorted_values, values, side='left')
+        below_or_equal = np.searchsorted(sorted_values, values, side='right')
+        result = (below + 0.5 * (below_or_equal - below)) / len(sorted_values) * 100
+        return np.where(np.isnan(values), np.nan, result)
+
+    def percentile_frame(self, player_data_with_clusters, by_cluster=False):
+        """
+        Calcula los percentiles de todos los jugadores de un DataFrame en lote.
+
+        Args:
+            player_data_with_clusters (pd.DataFrame): Jugadores a evaluar.
+            by_cluster (bool): Si es True, cada jugador se compara con su propio clúster ('CLUSTER').
+
+        Returns:
+            pd.DataFrame: Percentiles con el mismo índice y las columnas de estadísticas.
+        """
+        result = pd.DataFrame(index=player_data_with_clusters.index, columns=self.stats_columns, dtype=float)
+        for stat in self.stats_columns:
+            values = pd.to_numeric(player_data_with_clusters[stat], errors='coerce').to_numpy(dtype=float)
+            if not by_cluster:
+                result[stat] = self.percentiles(values, stat)
+                continue
+            clusters = player_data_with_clusters['CLUSTER'].to_numpy()
+            column = np.full(len(values), np.nan)
+            for cluster in np.unique(clusters):
+                in_cluster = clusters == cluster
+                column[in_cluster] = self.percentiles(values[in_cluster], stat, cluster)
+            result[stat] = column
+        return result
+
+    def player_percentiles(self, player_stats_raw, player_cluster=None):
+        """
+        Devuelve los percentiles de liga y de clúster de un jugador.
+
+        Args:
+            player_stats_raw (pd.Series): Estadísticas del jugador indexadas por nombre de estadística.
+            player_cluster (int, optional): Clúster del jugador.
+
+        Returns:
+            pd.DataFrame: Columnas 'League Percentile' y 'Cluster Percentile' indexadas por estadística.
+        """
+        stats = [s for s in self.stats_columns if s in player_stats_raw.index]
+        league = [self.percentile(player_stats_raw[s], s) for s in stats]
+        if player_cluster is None:
+            cluster = [np.nan] * len(stats)
+        else:
+            cluster = [self.percentile(player_stats_raw[s], s, player_cluster) for s in stats]
+        return pd.DataFrame({'League Percentile': league, 'Cluster Percentile': cluster}, index=stats)
+
+
+def _merge_sorted(sorted_values, new_values):
+    """Intercala valores nuevos (ignorando NaN) en un array ya ordenado."""
+    new_values = np.sort(new_values[~np.isnan(new_values)])
+    if sorted_values is None or len(sorted_values) == 0:
+        return new_values
+    positions = np.searchsorted(sorted_values, new_values, side='right')
+    return np.insert(sorted_values, positions, new_values)
+
+
+if __name__ == '__main__':
+    from nba_data_processor import load_and_preprocess_data, scale_data, perform_kmeans_clustering
+
+    filepath = 'nba_active_player_stats_2023-24_Regular_Season_100min.xlsx'
+    clustering_stats_columns = [
+        'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT',
+        'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB', 'AST', 'STL',
+        'BLK', 'TOV', 'PF', 'PTS', 'GP', 'GS'
+    ]
+
+    stats_for_clustering, player_data_cleaned, player_names = load_and_preprocess_data(filepath, clustering_stats_columns)
+
+    if stats_for_clustering is not None:
+        scaled_stats_df, scaler = scale_data(stats_for_clustering)
+        clusters, kmeans_model = perform_kmeans_clustering(scaled_stats_df, 5)
+        player_data_cleaned['CLUSTER'] = clusters
+
+        engine = PercentileEngine(player_data_cleaned, clustering_stats_columns)
+        print("\nPercentiles de liga (primeros 5 jugadores):")
+        print(engine.percentile_frame(player_data_cleaned).head())
+        print("\nPercentiles dentro del clúster (primeros 5 jugadores):")
+        print(engine.percentile_frame(player_data_cleaned, by_cluster=True).head())
@@ -1,13 +1,21 @@
 import pandas as pd
 from nba_api.stats.static import teams
 from nba_data_processor import load_and_preprocess_data, scale_data, perform_kmeans_clustering, analyze_clusters
+from nba_percentiles import PercentileEngine
+from nba_model_runtime import export_cluster_model
 import os
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import numpy as np
 import math
 from xhtml2pdf import pisa
 import datetime 
 
+# Versión de la plantilla del reporte PDF. Súbela al cambiar el HTML o los gráficos
+# para que el caché de reportes (nba_report_cache) regenere todo.
+REPORT_TEMPLATE_VERSION = 1
+
 # Define categorías de estadísticas para gráficos de radar más legibles
 radar_stats_categories = {
     "Ofensivas Clave": ['PTS', 'AST', 'FGM', 'FGA', 'TOV'],
@@ -203,6 +211,8 @@ def create_radar_chart(player_name, stats_to_plot, cluster_avg_stats, projected_
 
 
     plt.show()
+    # Cerrar la figura al terminar: pyplot la mantiene registrada hasta que se cierra
+    plt.close(fig)
 
 # Esta función es una copia de create_radar_chart pero para guardar en archivo, no mostrar.
 # Es necesario pasarle `ax` (el Axes de matplotlib) en lugar de crearlo internamente.
@@ -254,13 +264,154 @@ def create_radar_chart_to_file(ax, player_name, stats_to_plot, cluster_avg_stats
     ax.legend(loc='upper right', bbox_to_anchor=(1.3, 1.3), fontsize=9)
 
 
-def analyze_player_weak_spots(player_name, player_data_with_clusters, cluster_means, cluster_roles, stats_columns, scaler, threshold_multiplier=0.75):
+# Estadísticas donde un valor alto es "malo": la mejora es una reducción
+LOWER_IS_BETTER_STATS = ['TOV', 'PF']
+
+# Reglas de proyección de mejora de las áreas débiles:
+#   porcentajes: +pct_gain, sin pasar de promedio del clúster + pct_cap_margin
+#   TOV/PF: x lower_factor, sin bajar de promedio del clúster x lower_floor
+#   resto: x volume_factor, sin pasar de promedio del clúster x volume_cap
+DEFAULT_IMPROVEMENT_RULES = {
+    'pct_gain': 0.03,
+    'pct_cap_margin': 0.01,
+    'lower_factor': 0.90,
+    'lower_floor': 0.95,
+    'volume_factor': 1.15,
+    'volume_cap': 0.95,
+}
+
+def apply_improvement_rules(player_values, cluster_avg_values, weak_mask, stats_columns, improvement_rules=None):
+    """
+    Proyecta la mejora de las áreas débiles según las reglas de mejora.
+
+    Los valores de `improvement_rules` pueden ser escalares o arrays que se combinan por
+    broadcasting con las matrices de jugadores, p. ej. de forma (n_escenarios, 1, 1) para
+    evaluar muchos escenarios a la vez.
+
+    Args:
+        player_values (numpy.ndarray): Estadísticas de cada jugador (..., n_stats).
+        cluster_avg_values (numpy.ndarray): Promedio del clúster de cada jugador, misma forma.
+        weak_mask (numpy.ndarray): Máscara booleana de áreas débiles.
+        stats_columns (list): Nombres de las columnas (último eje).
+        improvement_rules (dict, optional): Reglas que sustituyen a las de DEFAULT_IMPROVEMENT_RULES.
+
+    Returns:
+        numpy.ndarray: Estadísticas proyectadas.
+    """
+    rules = {**DEFAULT_IMPROVEMENT_RULES, **(improvement_rules or {})}
+    is_pct = np.array(['_PCT' in stat for stat in stats_columns], dtype=bool)
+    is_lower_better = np.array([stat in LOWER_IS_BETTER_STATS for stat in stats_columns], dtype=bool) & ~is_pct
+    is_volume = ~is_pct & ~is_lower_better
+
+    projected_values = player_values
+    # Mejora de 3 puntos porcentuales, sin superar demasiado el promedio del clúster
+    projected_values = np.where(weak_mask & is_pct, np.minimum(player_values + rules['pct_gain'], cluster_avg_values + rules['pct_cap_margin']), projected_values)
+    # Reducción del 10% hacia el promedio del clúster
+    projected_values = np.where(weak_mask & is_lower_better, np.maximum(player_values * rules['lower_factor'], cluster_avg_values * rules['lower_floor']), projected_values)
+    # Aumento del 15% hacia el promedio del clúster
+    projected_values = np.where(weak_mask & is_volume, np.minimum(player_values * rules['volume_factor'], cluster_avg_values * rules['volume_cap']), projected_values)
+    return projected_values
+
+def compute_weak_spot_arrays(player_values, cluster_avg_values, games_played, stats_columns, threshold_multiplier=0.75,
+                             improvement_rules=None):
+    """
+    Aplica de forma vectorizada las reglas de áreas débiles y de proyección de mejora
+    a una matriz de jugadores, comparando cada uno con el promedio de su clúster.
+
+    Args:
+        player_values (numpy.ndarray): Matriz (n_jugadores, n_stats) con las estadísticas de cada jugador.
+        cluster_avg_values (numpy.ndarray): Matriz (n_jugadores, n_stats) con el promedio del clúster de cada jugador.
+        games_played (array-like): Partidos jugados (GP) de cada jugador; los porcentajes solo cuentan con GP > 10.
+        stats_columns (list): Nombres de las columnas de ambas matrices, en el mismo orden.
+        threshold_multiplier (float): Fracción del promedio del clúster por debajo de la cual una estadística es débil.
+        improvement_rules (dict, optional): Reglas de proyección (ver DEFAULT_IMPROVEMENT_RULES).
+
+    Returns:
+        tuple: (matriz booleana de áreas débiles, matriz de estadísticas proyectadas)
+    """
+    player_values = np.asarray(player_values, dtype=float)
+    cluster_avg_values = np.asarray(cluster_avg_values, dtype=float)
+    games_played = np.asarray(games_played, dtype=float).reshape(-1, 1)
+
+    is_pct = np.array(['_PCT' in stat for stat in stats_columns], dtype=bool)
+    is_lower_better = np.array([stat in LOWER_IS_BETTER_STATS for stat in stats_columns], dtype=bool) & ~is_pct
+    is_volume = ~is_pct & ~is_lower_better
+
+    # Con NaN o con promedio de clúster 0 no se considera debilidad ni se proyecta nada
+    comparable = ~np.isnan(player_values) & ~np.isnan(cluster_avg_values) & (cluster_avg_values != 0)
+
+    with np.errstate(invalid='ignore'):
+        # Porcentajes: más de 5 puntos porcentuales por debajo, con un mínimo de partidos
+        pct_weak = is_pct & (games_played > 10) & ((cluster_avg_values - player_values) > 0.05)
+        # TOV/PF: 20% por encima del promedio del clúster
+        lower_weak = is_lower_better & (player_values > cluster_avg_values * 1.20) & (cluster_avg_values > 0)
+        # Resto: por debajo de threshold_multiplier veces el promedio del clúster
+        volume_weak = is_volume & (player_values < cluster_avg_values * threshold_multiplier)
+
+    weak_mask = comparable & (pct_weak | lower_weak | volume_weak)
+
+    projected_values = apply_improvement_rules(player_values, cluster_avg_values, weak_mask, stats_columns, improvement_rules)
+
+    return weak_mask, projected_values
+
+def describe_weak_area(stat, player_val, cluster_avg_val):
+    """Devuelve la descripción legible de un área débil, tal como aparece en consola y en el PDF."""
+    if '_PCT' in stat:
+        return f"{stat}: {player_val:.3f} (Promedio Clúster: {cluster_avg_val:.3f}) - [Necesita mejorar puntería/eficiencia]"
+    if stat in LOWER_IS_BETTER_STATS:
+        return f"{stat}: {player_val} (Promedio Clúster: {cluster_avg_val:.2f}) - [Reducir {stat}]"
+    return f"{stat}: {player_val} (Promedio Clúster: {cluster_avg_val:.2f}) - [Necesita mejorar {stat}]"
+
+def find_drill_key(area_desc):
+    """
+    Busca la clave de NBA_DRILLS que corresponde a la descripción de un área débil.
+    Devuelve None si no hay ejercicios detallados para esa área.
+    """
+    for drill_key in NBA_DRILLS.keys():
+        # Busca si la clave del drill está en la descripción de la debilidad
+        # Normaliza ambas cadenas a minúsculas para una búsqueda más robusta
+        if drill_key.lower() in area_desc.lower():
+            return drill_key
+    return None
+
+def build_drills_html(weak_areas):
+    """
+    Genera la sección HTML de sugerencias de entrenamiento para el reporte PDF
+    a partir de las descripciones de las áreas débiles.
+    """
+    if not weak_areas:
+        return "<p>El jugador no presenta debilidades significativas en comparación con su clúster.</p>"
+
+    detailed_drills_html = "<h3>Sugerencias de Entrenamiento Detalladas:</h3><ul>"
+    for area_desc in weak_areas:
+        found_key = find_drill_key(area_desc)
+        if found_key:
+            detailed_drills_html += f"<li><strong>{area_desc.split(':')[0]}</strong><ul>" # Título del área en HTML
+            for drill in NBA_DRILLS[found_key]:
+                detailed_drills_html += f"<li>{drill}</li>"
+            detailed_drills_html += "</ul></li>"
+        else:
+            detailed_drills_html += f"<li><strong>{area_desc.split(':')[0]}</strong>: No hay sugerencias detalladas disponibles.</li>"
+    detailed_drills_html += "</ul>"
+    return detailed_drills_html
+
+def analyze_player_weak_spots(player_name, player_data_with_clusters, cluster_means, cluster_roles, stats_columns, scaler, threshold_multiplier=0.75, snapshot=None, percentile_engine=None, report_cache=None):
     """
     Analiza las áreas débiles de un jugador comparando sus estadísticas con
     las de su clúster promedio y genera gráficos de radar con proyección de mejora,
     además de preparar el contenido para el reporte PDF.
+
+    Si se pasa una `snapshot` (ver nba_league_snapshot.LeagueSnapshot), la fila del
+    jugador, las áreas débiles y la proyección se leen de ella en lugar de recalcularse
+    (solo si se construyó con el mismo `threshold_multiplier`; si no, se recalculan).
+    Si se pasa un `percentile_engine` (ver nba_percentiles.PercentileEngine), la tabla de
+    comparación incluye el percentil del jugador en la liga y dentro de su clúster.
+    Si se pasa un `report_cache`, el PDF y sus gráficos solo se regeneran si cambiaron sus entradas.
     """
-    player_row = player_data_with_clusters[player_data_with_clusters['PLAYER_NAME'] == player_name]
+    if snapshot is not None and player_name in snapshot:
+        player_row = player_data_with_clusters.loc[[snapshot.row_label(player_name)]]
+    else:
+        player_row = player_data_with_clusters[player_data_with_clusters['PLAYER_NAME'] == player_name]
 
     if player_row.empty:
         print(f"Error: Jugador '{player_name}' no encontrado en el dataset preprocesado. Asegúrate de que haya jugado suficientes minutos.")
@@ -283,91 +434,70 @@ def analyze_player_weak_spots(player_name, player_data_with_clusters, cluster_me
         'Difference': player_stats_raw - cluster_avg_stats_raw,
         'Percentage Difference': (player_stats_raw - cluster_avg_stats_raw) / cluster_avg_stats_raw * 100
     })
+
+    if percentile_engine is not None:
+        # Los arrays ya están ordenados en el motor: cada percentil es una búsqueda binaria
+        comparison_df = comparison_df.join(percentile_engine.player_percentiles(player_stats_raw, player_cluster))
     
     # Formatear el porcentaje para una mejor lectura
     comparison_df['Percentage Difference'] = comparison_df['Percentage Difference'].apply(lambda x: f"{x:.2f}%" if pd.notna(x) else "N/A")
 
     print(comparison_df)
 
-    weak_areas = []
     print("\nÁreas Potencialmente Débiles (significativamente por debajo del promedio del clúster):")
-    
-    # Para la proyección, haremos una copia de las estadísticas del jugador
-    projected_stats_raw = player_stats_raw.copy()
-
-    # Identificar áreas débiles y simular mejora
-    for stat in stats_columns:
-        if stat in player_stats_raw.index and stat in cluster_avg_stats_raw.index:
-            player_val = player_stats_raw[stat]
-            cluster_avg_val = cluster_avg_stats_raw[stat]
-
-            # Manejo de valores NaN y cero para evitar errores y lógica inconsistente
-            if pd.isna(player_val) or pd.isna(cluster_avg_val):
-                projected_stats_raw[stat] = player_val # No proyectar si es NaN
-                continue
-            if cluster_avg_val == 0:
-                if player_val == 0:
-                    continue # Ambos son 0, no es una debilidad significativa
-                else:
-                    # Si el promedio es 0 pero el jugador tiene valor, no es una debilidad (ej. BLK=5 pero promedio=0).
-                    # A menos que sea un porcentaje y el jugador tenga 0, lo cual es una debilidad.
-                    if '_PCT' in stat and player_val == 0: # Caso especial para porcentajes si son 0
-                         weak_areas.append(f"{stat}: {player_val:.3f} (Promedio Clúster: {cluster_avg_val:.3f}) - [Necesita mejorar {stat}]")
-                         projected_stats_raw[stat] = 0.05 # Proyectar a un mínimo de 0.05 (5%) si era 0
-                    continue 
-            
-            # Lógica para identificar debilidades y proyectar mejoras
-            if '_PCT' in stat: # Para porcentajes, la mejora es un incremento en puntos porcentuales
-                # Considerar un mínimo de GP para que los porcentajes sean significativos
-                if player_data_with_clusters.loc[player_row.index[0], 'GP'] > 10 and (cluster_avg_val - player_val) > 0.05: # Umbral de 5 puntos porcentuales
-                    weak_areas.append(f"{stat}: {player_val:.3f} (Promedio Clúster: {cluster_avg_val:.3f}) - [Necesita mejorar puntería/eficiencia]")
-                    # Proyectar mejora: acercarse al promedio del clúster, sin superarlo demasiado
-                    projected_stats_raw[stat] = min(player_val + 0.03, cluster_avg_val + 0.01) # Mejora de 3 puntos porcentuales
-            elif stat in ['TOV', 'PF']: # Estadísticas donde un valor alto es "malo", la mejora es una reducción
-                if player_val > (cluster_avg_val * 1.20) and cluster_avg_val > 0: # Si está 20% por encima del promedio del clúster
-                    weak_areas.append(f"{stat}: {player_val} (Promedio Clúster: {cluster_avg_val:.2f}) - [Reducir {stat}]")
-                    # Proyectar mejora: reducir hacia el promedio del clúster
-                    projected_stats_raw[stat] = max(player_val * 0.90, cluster_avg_val * 0.95) # Reducción del 10%
-            elif player_val < (cluster_avg_val * threshold_multiplier): # Generalmente, si está 25% por debajo del promedio del clúster
-                weak_areas.append(f"{stat}: {player_val} (Promedio Clúster: {cluster_avg_val:.2f}) - [Necesita mejorar {stat}]")
-                # Proyectar mejora: aumentar hacia el promedio del clúster
-                projected_stats_raw[stat] = min(player_val * 1.15, cluster_avg_val * 0.95) # Aumento del 15%
-
-    detailed_drills_html = "" # Inicializar aquí para usarlo en el PDF incluso si no hay debilidades
+
+    snapshot_threshold = snapshot.metadata.get('threshold_multiplier') if snapshot is not None else None
+    if snapshot is not None and player_name in snapshot and snapshot_threshold == threshold_multiplier:
+        # La instantánea de la liga ya tiene la comparación y la proyección materializadas
+        player_entry = snapshot.get_player(player_name)
+        stats_to_check = player_entry['stats_columns']
+        weak_mask = player_entry['weak_mask']
+        projected_stats_raw = player_stats_raw.copy()
+        projected_stats_raw[stats_to_check] = player_entry['projected_stats'].values
+    else:
+        # Identificar áreas débiles y simular mejora con las mismas reglas que usa la instantánea
+        stats_to_check = [s for s in stats_columns if s in player_stats_raw.index and s in cluster_avg_stats_raw.index]
+        games_played = player_row['GP'].iloc[0] if 'GP' in player_row.columns else np.nan
+        weak_mask, projected_values = compute_weak_spot_arrays(
+            player_stats_raw[stats_to_check].values.reshape(1, -1),
+            cluster_avg_stats_raw[stats_to_check].values.reshape(1, -1),
+            [games_played],
+            stats_to_check,
+            threshold_multiplier
+        )
+        weak_mask = weak_mask[0]
+        # Para la proyección, haremos una copia de las estadísticas del jugador
+        projected_stats_raw = player_stats_raw.copy()
+        projected_stats_raw[stats_to_check] = projected_values[0]
+
+    weak_areas = [
+        describe_weak_area(stat, player_stats_raw[stat], cluster_avg_stats_raw[stat])
+        for stat, is_weak in zip(stats_to_check, weak_mask) if is_weak
+    ]
+
     if weak_areas:
         for area in weak_areas:
             print(f"- {area}")
         
         print("\n--- Sugerencias de Entrenamiento Generalizadas para Áreas Débiles ---")
-        # Aquí es donde enlazaremos con los drills detallados
-        detailed_drills_html = "<h3>Sugerencias de Entrenamiento Detalladas:</h3><ul>"
         for area_desc in weak_areas:
             # Intentar mapear la descripción general a una clave en NBA_DRILLS
-            found_key = None
-            for drill_key in NBA_DRILLS.keys():
-                # Busca si la clave del drill está en la descripción de la debilidad
-                # Normaliza ambas cadenas a minúsculas para una búsqueda más robusta
-                if drill_key.lower() in area_desc.lower(): 
-                    found_key = drill_key
-                    break
-            
+            found_key = find_drill_key(area_desc)
+
             if found_key:
                 print(f"  - Área: {area_desc.split(':')[0]}") # Imprime el nombre de la estadística
                 print(f"    Sugerencias:")
-                detailed_drills_html += f"<li><strong>{area_desc.split(':')[0]}</strong><ul>" # Título del área en HTML
                 for drill in NBA_DRILLS[found_key]:
                     print(f"      - {drill}")
-                    detailed_drills_html += f"<li>{drill}</li>"
-                detailed_drills_html += "</ul></li>"
             else:
                 print(f"  - No hay sugerencias detalladas para: {area_desc.split(':')[0]}")
-                detailed_drills_html += f"<li><strong>{area_desc.split(':')[0]}</strong>: No hay sugerencias detalladas disponibles.</li>"
-        detailed_drills_html += "</ul>"
     else:
         print("¡Este jugador no muestra áreas de debilidad significativas en comparación con su clúster!")
         print("Podría ser un jugador muy completo o estar en un clúster con compañeros de equipo de rendimiento similar.")
         projected_stats_raw = player_stats_raw.copy() # Si no hay debilidades, la proyección es la misma que la actual
-        detailed_drills_html = "<p>El jugador no presenta debilidades significativas en comparación con su clúster.</p>"
+
+    # Se genera aquí para usarlo en el PDF incluso si no hay debilidades
+    detailed_drills_html = build_drills_html(weak_areas)
 
     # --- Generación de Gráficos de Radar (en pantalla) ---
     print("\n--- Generando Gráficos de Rendimiento en pantalla ---")
@@ -443,84 +573,155 @@ def analyze_player_weak_spots(player_name, player_data_with_clusters, cluster_me
         weak_areas,
         detailed_drills_html,
         stats_columns,
-        radar_stats_categories
+        radar_stats_categories,
+        report_cache=report_cache
     )
+    if report_cache is not None:
+        report_cache.save()
     print("Reporte PDF generado exitosamente.")
 
 
-def generate_player_report_pdf(player_name, player_row, player_cluster, cluster_roles, player_stats_raw, 
-                               cluster_avg_stats_raw, projected_stats_raw, comparison_df, 
-                               weak_areas_list, detailed_drills_html,
-                               all_stats_columns, radar_categories):
-    player_cluster_role = cluster_roles.get(player_cluster, "Rol Desconocido")
+def build_report_chart_specs(player_name, player_stats_raw, cluster_avg_stats_raw, projected_stats_raw,
+                             all_stats_columns, radar_categories):
     """
-    Genera un reporte PDF con el análisis del jugador, incluyendo gráficos y rutinas.
+    Prepara los datos normalizados de cada gráfico de radar del reporte PDF
+    (uno global y uno por categoría), sin dibujar nada.
+
+    Returns:
+        list: Lista de dicts con 'category' (None para el global), 'filename', 'stats', 'title',
+              'figsize', 'dpi' y las Series normalizadas 'player', 'cluster_avg' y 'projected'.
     """
-    # 1. Crear las imágenes de los gráficos de radar
-    # Guardar los gráficos temporalmente como PNG
-    img_filenames = []
+    chart_specs = []
 
     # Gráfico global para el PDF
     all_radar_stats_for_pdf = [s for s in all_stats_columns if s not in ['PLAYER_ID', 'SEASON_ID', 'LEAGUE_ID', 'TEAM_ID', 'PLAYER_AGE']]
-    player_stats_all_pdf = player_stats_raw[all_radar_stats_for_pdf].fillna(0)
-    cluster_avg_stats_all_pdf = cluster_avg_stats_raw[all_radar_stats_for_pdf].fillna(0)
-    projected_stats_all_pdf = projected_stats_raw[all_radar_stats_for_pdf].fillna(0)
-    
-    max_val_all_pdf = max(player_stats_all_pdf.max(), cluster_avg_stats_all_pdf.max(), projected_stats_all_pdf.max())
-    max_val_all_pdf = max_val_all_pdf if max_val_all_pdf > 0 else 1
-    
-    normalized_player_stats_all_pdf = player_stats_all_pdf / max_val_all_pdf
-    normalized_cluster_avg_stats_all_pdf = cluster_avg_stats_all_pdf / max_val_all_pdf
-    normalized_projected_stats_all_pdf = projected_stats_all_pdf / max_val_all_pdf
-    
-    fig_global, ax_global = plt.subplots(figsize=(10, 10), subplot_kw=dict(polar=True)) #
-    create_radar_chart_to_file(ax_global, player_name, normalized_player_stats_all_pdf, normalized_cluster_avg_stats_all_pdf, 
-                               normalized_projected_stats_all_pdf, all_radar_stats_for_pdf, 
-                               player_cluster_role,
-                               title=f'Rendimiento Global de {player_name} vs. Clúster y Proyección') #
-    
-    # MODIFICACIÓN 3: Aplicar tight_layout a la figura antes de guardar
-    fig_global.tight_layout(pad=3.0) # Puedes ajustar el valor de pad según sea necesario
-
-    global_radar_img = f"radar_global_{player_name.replace(' ', '_')}.png" #
-    fig_global.savefig(global_radar_img, bbox_inches='tight', dpi=150) #
-    plt.close(fig_global) #
-    img_filenames.append(global_radar_img)
-
+    charts = [(None, all_radar_stats_for_pdf, f"radar_global_{player_name.replace(' ', '_')}.png",
+               f'Rendimiento Global de {player_name} vs. Clúster y Proyección', (10, 10), 150)]
 
     # Gráficos por categoría
     for category_name, stats_list in radar_categories.items():
         current_stats_to_plot_pdf = [s for s in stats_list if s in all_stats_columns]
         if not current_stats_to_plot_pdf: continue
+        charts.append((category_name, current_stats_to_plot_pdf,
+                       f"radar_{category_name.replace(' ', '_')}_{player_name.replace(' ', '_')}.png",
+                       f'Rendimiento de {player_name} - {category_name}', (8, 8), 120))
+
+    for category_name, stats_to_plot, filename, title, figsize, dpi in charts:
+        player_stats_pdf = player_stats_raw[stats_to_plot].fillna(0)
+        cluster_avg_stats_pdf = cluster_avg_stats_raw[stats_to_plot].fillna(0)
+        projected_stats_pdf = projected_stats_raw[stats_to_plot].fillna(0)
+
+        max_val_pdf = max(player_stats_pdf.max(), cluster_avg_stats_pdf.max(), projected_stats_pdf.max())
+        max_val_pdf = max_val_pdf if max_val_pdf > 0 else 1
+
+        chart_specs.append({
+            'category': category_name,
+            'filename': filename,
+            'stats': stats_to_plot,
+            'title': title,
+            'figsize': figsize,
+            'dpi': dpi,
+            'player': player_stats_pdf / max_val_pdf,
+            'cluster_avg': cluster_avg_stats_pdf / max_val_pdf,
+            'projected': projected_stats_pdf / max_val_pdf,
+        })
+    return chart_specs
+
+def render_report_chart(chart_spec, player_name, player_cluster_role, output_path):
+    """
+    Dibuja un gráfico de radar del reporte (según build_report_chart_specs) y lo guarda como PNG.
+    Usa Figure/FigureCanvasAgg directamente, sin pasar por el gestor global de figuras de pyplot,
+    para que nada quede retenido entre reportes en procesos de larga duración.
+    """
+    fig = Figure(figsize=chart_spec['figsize'])
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(projection='polar') #
+    create_radar_chart_to_file(ax, player_name, chart_spec['player'], chart_spec['cluster_avg'],
+                               chart_spec['projected'], chart_spec['stats'],
+                               player_cluster_role,
+                               title=chart_spec['title']) #
 
-        player_stats_cat_pdf = player_stats_raw[current_stats_to_plot_pdf].fillna(0)
-        cluster_avg_stats_cat_pdf = cluster_avg_stats_raw[current_stats_to_plot_pdf].fillna(0)
-        projected_stats_cat_pdf = projected_stats_raw[current_stats_to_plot_pdf].fillna(0)
-        
-        max_for_category_pdf = max(player_stats_cat_pdf.max(), cluster_avg_stats_cat_pdf.max(), projected_stats_cat_pdf.max())
-        max_for_category_pdf = max_for_category_pdf if max_for_category_pdf > 0 else 1
-        
-        # Estas son las variables que causaban el error de "no definida"
-        normalized_player_stats_pdf = player_stats_cat_pdf / max_for_category_pdf
-        normalized_cluster_avg_stats_pdf = cluster_avg_stats_cat_pdf / max_for_category_pdf
-        normalized_projected_stats_pdf = projected_stats_cat_pdf / max_for_category_pdf
-
-        fig_cat, ax_cat = plt.subplots(figsize=(8, 8), subplot_kw=dict(polar=True)) #
-        create_radar_chart_to_file(ax_cat, player_name, normalized_player_stats_pdf, normalized_cluster_avg_stats_pdf, 
-                                   normalized_projected_stats_pdf, current_stats_to_plot_pdf, 
-                                   player_cluster_role,
-                                   title=f'Rendimiento de {player_name} - {category_name}') #
-        
-        # MODIFICACIÓN 3: Aplicar tight_layout a la figura antes de guardar
-        fig_cat.tight_layout(pad=3.0) # Puedes ajustar el valor de pad
+    # MODIFICACIÓN 3: Aplicar tight_layout a la figura antes de guardar
+    fig.tight_layout(pad=3.0) # Puedes ajustar el valor de pad según sea necesario
 
-        cat_radar_img = f"radar_{category_name.replace(' ', '_')}_{player_name.replace(' ', '_')}.png" #
-        fig_cat.savefig(cat_radar_img, bbox_inches='tight', dpi=120) #
-        plt.close(fig_cat) #
-        img_filenames.append(cat_radar_img)
+    fig.savefig(output_path, bbox_inches='tight', dpi=chart_spec['dpi']) #
+    fig.clear()
 
+def generate_player_report_pdf(player_name, player_row, player_cluster, cluster_roles, player_stats_raw, 
+                               cluster_avg_stats_raw, projected_stats_raw, comparison_df, 
+                               weak_areas_list, detailed_drills_html,
+                               all_stats_columns, radar_categories, report_cache=None):
+    player_cluster_role = cluster_roles.get(player_cluster, "Rol Desconocido")
+    """
+    Genera un reporte PDF con el análisis del jugador, incluyendo gráficos y rutinas.
+
+    Si se pasa un `report_cache` (ver nba_report_cache.ReportCache), se calcula un hash de
+    las entradas de cada gráfico y del reporte completo: si coincide con el del manifiesto
+    y el archivo existe, se reutiliza en lugar de volver a generarlo.
+
+    Returns:
+        bool: True si el PDF se generó (o se reutilizó del caché) sin errores.
+    """
+    output_filename = f"Reporte_{player_name.replace(' ', '_')}.pdf"
+
+    # 1. Preparar los datos de los gráficos de radar
+    chart_specs = build_report_chart_specs(player_name, player_stats_raw, cluster_avg_stats_raw, projected_stats_raw,
+                                           all_stats_columns, radar_categories)
+
+    if report_cache is not None:
+        chart_keys = [
+            report_cache.key(REPORT_TEMPLATE_VERSION, player_name, player_cluster_role, cluster_avg_stats_raw.name,
+                             spec['title'], spec['stats'], spec['figsize'], spec['dpi'],
+                             spec['player'], spec['cluster_avg'], spec['projected'])
+            for spec in chart_specs
+        ]
+        header_values = [player_row[col].iloc[0] for col in ['SEASON_ID', 'TEAM_ABBREVIATION', 'PLAYER_AGE'] if col in player_row.columns]
+        report_key = report_cache.key(REPORT_TEMPLATE_VERSION, player_name, header_values, player_cluster, player_cluster_role,
+                                      player_stats_raw, cluster_avg_stats_raw, projected_stats_raw,
+                                      comparison_df.drop(columns=['Percentage Difference'], errors='ignore'),
+                                      weak_areas_list, detailed_drills_html, chart_keys)
+        if report_cache.is_fresh('reports', output_filename, report_key):
+            print(f"Reporte sin cambios, se reutiliza: {output_filename}")
+            return True
+
+    # Crear las imágenes de los gráficos de radar. Sin caché se guardan temporalmente como PNG
+    img_filenames = []
+    for i, spec in enumerate(chart_specs):
+        if report_cache is None:
+            spec['path'] = spec['filename']
+            render_report_chart(spec, player_name, player_cluster_role, spec['path'])
+            img_filenames.append(spec['path'])
+            continue
+
+        spec['path'] = report_cache.chart_path(spec['filename'])
+        if not report_cache.is_fresh('charts', spec['path'], chart_keys[i]):
+            render_report_chart(spec, player_name, player_cluster_role, spec['path'])
+            report_cache.record('charts', spec['path'], chart_keys[i])
 
     # 2. Crear el contenido HTML del reporte
+    report_html = build_report_html(player_name, player_row, player_cluster, player_cluster_role, cluster_avg_stats_raw,
+                                    comparison_df, weak_areas_list, detailed_drills_html, all_stats_columns, chart_specs)
+
+    # 3. Guardar el HTML y convertirlo a PDF
+    pdf_ok = write_report_pdf(report_html, output_filename, player_name)
+    if pdf_ok and report_cache is not None:
+        report_cache.record('reports', output_filename, report_key)
+
+    # 4. Limpiar las imágenes temporales (las del caché se conservan para la próxima ejecución)
+    for img_file in img_filenames:
+        if os.path.exists(img_file):
+            os.remove(img_file)
+            print(f"Imagen temporal eliminada: {img_file}")
+    return pdf_ok
+
+def build_report_html(player_name, player_row, player_cluster, player_cluster_role, cluster_avg_stats_raw,
+                      comparison_df, weak_areas_list, detailed_drills_html, all_stats_columns, chart_specs):
+    """
+    Construye el HTML del reporte PDF. Las imágenes de los gráficos se toman de la
+    clave 'path' de cada elemento de chart_specs (el primero es el gráfico global).
+    """
+    global_radar_img = chart_specs[0]['path']
+
     report_html = f"""
     <!DOCTYPE html>
     <html lang="es">
@@ -571,6 +772,10 @@ def generate_player_report_pdf(player_name, player_row, player_cluster, cluster_
                 </thead>
                 <tbody>
     """
+    # Columnas de percentiles, solo si el análisis se hizo con un motor de percentiles
+    has_percentiles = 'League Percentile' in comparison_df.columns
+    percentile_headers = "<th>Percentil Liga</th><th>Percentil Clúster</th>" if has_percentiles else ""
+
     # MODIFICACIÓN AQUI: Muestra las estadísticas promedio del clúster con nombres completos
     for stat in [s for s in all_stats_columns if s in cluster_avg_stats_raw.index]:
         display_stat_name = STAT_NAMES_MAP.get(stat, stat) # Obtener el nombre completo
@@ -591,10 +796,11 @@ def generate_player_report_pdf(player_name, player_row, player_cluster, cluster_
                         <th>Promedio Clúster</th>
                         <th>Diferencia</th>
                         <th>% Diferencia</th>
+                        {percentile_headers}
                     </tr>
                 </thead>
                 <tbody>
-    """.format(player_name=player_name)
+    """.format(player_name=player_name, percentile_headers=percentile_headers)
     # MODIFICACIÓN AQUI: Usar el comparison_df para la tabla con nombres completos y formato condicional
     for index, row in comparison_df.iterrows():
         player_val = row['Player Stats']
@@ -623,6 +829,12 @@ def generate_player_report_pdf(player_name, player_row, player_cluster, cluster_
         
         # Obtener el nombre completo de la estadística
         display_stat_name = STAT_NAMES_MAP.get(index, index) # 'index' es el nombre de la estadística en comparison_df
+
+        percentile_cells = ""
+        if has_percentiles:
+            for percentile_col in ['League Percentile', 'Cluster Percentile']:
+                percentile_val = row[percentile_col]
+                percentile_cells += f"<td>{percentile_val:.0f}</td>" if pd.notna(percentile_val) else "<td>N/A</td>"
         
         report_html += f"""
                     <tr>
@@ -631,6 +843,7 @@ def generate_player_report_pdf(player_name, player_row, player_cluster, cluster_
                         <td>{cluster_val:.2f}</td>
                         <td>{diff_val:.2f}</td>
                         <td class="{color_class}">{percent_diff_str}</td>
+                        {percentile_cells}
                     </tr>
         """
     report_html += """
@@ -659,8 +872,9 @@ def generate_player_report_pdf(player_name, player_row, player_cluster, cluster_
     """.format(global_radar_img=global_radar_img, player_name=player_name) # Formato para la imagen global
 
     # Añadir los gráficos por categoría
-    for category_name, stats_list in radar_categories.items():
-        cat_radar_img = f"radar_{category_name.replace(' ', '_')}_{player_name.replace(' ', '_')}.png"
+    for spec in chart_specs[1:]:
+        category_name = spec['category']
+        cat_radar_img = spec['path']
         if os.path.exists(cat_radar_img): # Solo si la imagen existe
             report_html += f"""
             <div class="chart-container">
@@ -681,10 +895,15 @@ def generate_player_report_pdf(player_name, player_row, player_cluster, cluster_
     </body>
     </html>
     """
+    return report_html
 
-    # 3. Guardar el HTML y convertirlo a PDF
-    output_filename = f"Reporte_{player_name.replace(' ', '_')}.pdf"
-    
+def write_report_pdf(report_html, output_filename, player_name):
+    """
+    Convierte el HTML del reporte a PDF con xhtml2pdf.
+
+    Returns:
+        bool: True si el PDF se generó sin errores.
+    """
     # xhtml2pdf
     try:
         with open(output_filename, "wb") as f:
@@ -700,14 +919,10 @@ def generate_player_report_pdf(player_name, player_row, player_cluster, cluster_
             print(pisa_status.err) # Imprimir detalles del error
         else:
             print(f"Reporte PDF generado y guardado como: {output_filename}")
+            return True
     except Exception as e:
         print(f"Error inesperado al generar PDF: {e}")
-
-    # 4. Limpiar las imágenes temporales
-    for img_file in img_filenames:
-        if os.path.exists(img_file):
-            os.remove(img_file)
-            print(f"Imagen temporal eliminada: {img_file}")
+    return False
 
 def assign_cluster_roles(cluster_means):
     """
@@ -835,6 +1050,16 @@ if __name__ == '__main__':
     for c_id, role_name in cluster_roles.items():
         print(f"Clúster {c_id}: {role_name}")
 
+    # --- Exportar el Modelo Ligero de Asignación (solo NumPy) ---
+    export_cluster_model(scaler, kmeans_model, clustering_stats_columns, cluster_roles)
+
+    # --- Materializar la Instantánea de la Liga ---
+    # Se importa aquí para evitar una importación circular con nba_league_snapshot
+    from nba_league_snapshot import build_league_snapshot
+    from nba_report_cache import ReportCache
+    league_snapshot = build_league_snapshot(player_data_cleaned, cluster_means, cluster_roles, clustering_stats_columns)
+    percentile_engine = PercentileEngine(player_data_cleaned, clustering_stats_columns)
+
     # --- Menú de Selección de Jugadores ---
     all_nba_teams = pd.DataFrame(teams.get_teams())
     
@@ -863,7 +1088,10 @@ if __name__ == '__main__':
                 cluster_means, 
                 cluster_roles, # Asegúrate de que este esté aquí
                 clustering_stats_columns, # Este también es necesario
-                scaler # <-- ¡Asegúrate de que 'scaler' esté aquí!
+                scaler, # <-- ¡Asegúrate de que 'scaler' esté aquí!
+                snapshot=league_snapshot,
+                percentile_engine=percentile_engine,
+                report_cache=ReportCache()
             )
         else:
             print("No se seleccionó ningún jugador.")
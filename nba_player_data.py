@@ -3,8 +3,12 @@ from nba_api.stats.static import players
 from nba_api.stats.endpoints import playercareerstats
 import time
 import math
+from nba_career_store import build_career_store
+from nba_workbook_export import export_dataframe
+from nba_http_session import install_pooled_session, print_session_metrics, DEFAULT_TIMEOUT
 
-def get_nba_active_player_stats(season='2023-24', season_type='Regular Season', min_minutes_played=100):
+def get_nba_active_player_stats(season='2023-24', season_type='Regular Season', min_minutes_played=100, career_store_dir=None,
+                                request_timeout=DEFAULT_TIMEOUT, request_delay=0.5, pool_maxsize=10):
     """
     Obtiene estadísticas de carrera por temporada para jugadores activos de la NBA
     y con un mínimo de minutos jugados en la temporada especificada.
@@ -13,6 +17,11 @@ def get_nba_active_player_stats(season='2023-24', season_type='Regular Season',
         season (str): La temporada de la que obtener las estadísticas (ej. '2023-24').
         season_type (str): Tipo de temporada ('Regular Season', 'Playoffs').
         min_minutes_played (int): Mínimo de minutos jugados para incluir al jugador.
+        career_store_dir (str, optional): Si se indica, guarda ahí las carreras completas de todos
+                                          los jugadores procesados (ver nba_career_store).
+        request_timeout (float o tuple): Timeout (conexión, lectura) en segundos de cada petición.
+        request_delay (float): Pausa entre peticiones para no saturar stats.nba.com.
+        pool_maxsize (int): Conexiones keep-alive que conserva la sesión compartida.
 
     Returns:
         pandas.DataFrame: Un DataFrame con las estadísticas de los jugadores por temporada.
@@ -20,6 +29,9 @@ def get_nba_active_player_stats(season='2023-24', season_type='Regular Season',
     # Obtener solo jugadores activos
     active_nba_players = players.get_active_players()
     all_player_stats = []
+    career_tables = [] # Tablas de carrera completas (solo si se pide el almacén de carreras)
+    # Todas las peticiones comparten una sesión keep-alive con gzip (ver nba_http_session)
+    session = install_pooled_session(pool_maxsize=pool_maxsize, timeout=request_timeout)
     
     print(f"Obteniendo IDs de {len(active_nba_players)} jugadores activos...")
     
@@ -37,7 +49,7 @@ def get_nba_active_player_stats(season='2023-24', season_type='Regular Season',
         
         # Pequeño retraso para evitar time-outs
         # Puedes ajustar este valor si aún experimentas muchos errores
-        time.sleep(0.5) 
+        time.sleep(request_delay)
         
         print(f"Procesando jugador {i+1}/{len(active_nba_players)}: {player_name} (ID: {player_id})")
 
@@ -59,6 +71,9 @@ def get_nba_active_player_stats(season='2023-24', season_type='Regular Season',
                 print(f"Tipo de temporada '{season_type}' no manejado. Saltando a {player_name}.")
                 continue
 
+            if career_store_dir is not None and not player_df.empty:
+                career_tables.append(player_df.assign(PLAYER_NAME=player_name))
+
             # Filtrar por la temporada deseada
             season_stats = player_df[player_df['SEASON_ID'] == season].copy()
             
@@ -84,6 +99,13 @@ def get_nba_active_player_stats(season='2023-24', season_type='Regular Season',
             # Puedes añadir un retraso más largo aquí si el error es persistente
             # time.sleep(2) 
             
+    print_session_metrics(session)
+
+    if career_tables:
+        career_store = build_career_store(career_tables)
+        if career_store is not None:
+            career_store.save(career_store_dir)
+
     if all_player_stats:
         combined_df = pd.concat(all_player_stats, ignore_index=True)
         return combined_df
@@ -100,7 +122,8 @@ if __name__ == '__main__':
     player_data = get_nba_active_player_stats(
         season=target_season, 
         season_type=target_season_type,
-        min_minutes_played=min_minutes
+        min_minutes_played=min_minutes,
+        career_store_dir='career_store' # Carreras completas para nba_career_store
     )
 
     if not player_data.empty:
@@ -109,7 +132,7 @@ if __name__ == '__main__':
         player_data = player_data[cols]
 
         output_filename = f'nba_active_player_stats_{target_season}_{target_season_type.replace(" ", "_")}_{min_minutes}min.xlsx'
-        player_data.to_excel(output_filename, index=False)
+        export_dataframe(player_data, output_filename) # Igual que to_excel(index=False), escribiendo por lotes
         print(f"\n¡Dataset guardado exitosamente en '{output_filename}'!")
         print(f"Dimensiones del dataset: {player_data.shape}")
         print("\nPrimeras 5 filas del dataset:")
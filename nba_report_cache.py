@@ -0,0 +1,202 @@
+import pandas as pd
+import numpy as np
+import os
+import json
+import hashlib
+from nba_player_analyzer import REPORT_TEMPLATE_VERSION, radar_stats_categories, generate_player_report_pdf, build_drills_html
+
+
+class ReportCache:
+    """
+    Caché incremental de reportes, al estilo de un sistema de build: guarda en un
+    manifiesto el hash de las entradas de cada gráfico de radar y de cada PDF, y
+    permite reutilizar el archivo existente cuando el hash no ha cambiado.
+    """
+
+    def __init__(self, cache_dir='report_cache'):
+        """
+        Args:
+            cache_dir (str): Directorio del caché. Los gráficos se guardan en '<cache_dir>/charts'
+                y el manifiesto en '<cache_dir>/manifest.json'.
+        """
+        self.cache_dir = cache_dir
+        self.chart_dir = os.path.join(cache_dir, 'charts')
+        self.manifest_path = os.path.join(cache_dir, 'manifest.json')
+        os.makedirs(self.chart_dir, exist_ok=True)
+
+        self.manifest = {'template_version': REPORT_TEMPLATE_VERSION, 'charts': {}, 'reports': {}}
+        if os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path, encoding='utf-8') as f:
+                    stored_manifest = json.load(f)
+                # Un cambio de plantilla invalida todo el caché
+                if stored_manifest.get('template_version') == REPORT_TEMPLATE_VERSION:
+                    self.manifest = stored_manifest
+            except (OSError, ValueError) as e:
+                print(f"Error al leer el manifiesto de reportes, se regenerará todo: {e}")
+
+        self.counts = {kind: {'skipped': 0, 'rebuilt': 0} for kind in ['charts', 'reports']}
+
+    def key(self, *parts):
+        """Devuelve el hash SHA-256 de las entradas (valores, Series, DataFrames, textos...)."""
+        digest = hashlib.sha256()
+        for part in parts:
+            _update_hash(digest, part)
+        return digest.hexdigest()
+
+    def chart_path(self, filename):
+        """Devuelve la ruta dentro del caché para un gráfico."""
+        return os.path.join(self.chart_dir, filename)
+
+    def is_fresh(self, kind, path, key):
+        """
+        Indica si el archivo existe y fue generado con las mismas entradas.
+        Si es así, se cuenta como reutilizado.
+
+        Args:
+            kind (str): 'charts' o 'reports'.
+            path (str): Ruta del archivo generado.
+            key (str): Hash de las entradas actuales.
+        """
+        if self.manifest[kind].get(path) == key and os.path.exists(path):
+            self.counts[kind]['skipped'] += 1
+            return True
+        return False
+
+    def record(self, kind, path, key):
+        """Registra en el manifiesto un archivo recién generado."""
+        self.manifest[kind][path] = key
+        self.counts[kind]['rebuilt'] += 1
+
+    def summary(self):
+        """Devuelve (e imprime) cuántos gráficos y reportes se reutilizaron y cuántos se regeneraron."""
+        for kind, label in [('reports', 'Reportes'), ('charts', 'Gráficos')]:
+            print(f"{label}: {self.counts[kind]['rebuilt']} regenerados, {self.counts[kind]['skipped']} reutilizados")
+        return {kind: dict(counts) for kind, counts in self.counts.items()}
+
+    def save(self):
+        """Guarda el manifiesto, incluyendo los contadores de la última ejecución."""
+        self.manifest['last_run'] = self.counts
+        with open(self.manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=1)
+
+
+def _update_hash(digest, part):
+    """Añade una entrada al hash con una representación estable según su tipo."""
+    if isinstance(part, pd.DataFrame):
+        _update_hash(digest, list(part.columns))
+        _update_hash(digest, list(part.index))
+        for col in part.columns:
+            _update_hash(digest, part[col])
+    elif isinstance(part, pd.Series):
+        _update_hash(digest, list(part.index))
+        _update_hash(digest, part.to_numpy())
+    elif isinstance(part, np.ndarray):
+        if part.dtype.kind in 'biuf':
+            digest.update(part.dtype.str.encode())
+            digest.update(np.ascontiguousarray(part).tobytes())
+        else:
+            _update_hash(digest, part.tolist())
+    elif isinstance(part, (list, tuple)):
+        digest.update(b'[')
+        for item in part:
+            _update_hash(digest, item)
+        digest.update(b']')
+    elif isinstance(part, dict):
+        _update_hash(digest, sorted(part.items(), key=lambda kv: str(kv[0])))
+    else:
+        if isinstance(part, np.generic):
+            part = part.item() # np.int32(3) y 3 deben dar el mismo hash
+        digest.update(type(part).__name__.encode())
+        digest.update(str(part).encode('utf-8'))
+    digest.update(b'|')
+
+
+def generate_player_report_from_snapshot(snapshot, player_data_with_clusters, player_name, report_cache=None, percentile_engine=None):
+    """
+    Genera el reporte PDF de un jugador leyendo su análisis de la instantánea de la liga,
+    sin recalcular la comparación ni mostrar gráficos en pantalla.
+
+    Returns:
+        bool: True si el jugador estaba en la instantánea y el PDF se generó sin errores.
+    """
+    if player_name not in snapshot:
+        print(f"Error: Jugador '{player_name}' no encontrado en la instantánea de la liga.")
+        return False
+
+    entry = snapshot.get_player(player_name)
+    player_row = player_data_with_clusters.loc[[entry['row_label']]]
+    cluster_avg_stats_raw = entry['cluster_avg'].rename(entry['cluster']) # El nombre se usa en la leyenda del gráfico
+    comparison_df = snapshot.comparison_frame(player_name)
+    if percentile_engine is not None:
+        comparison_df = comparison_df.join(percentile_engine.player_percentiles(entry['player_stats'], entry['cluster']))
+    weak_areas = snapshot.weak_areas(player_name)
+
+    return generate_player_report_pdf(
+        player_name,
+        player_row,
+        entry['cluster'],
+        snapshot.cluster_roles,
+        entry['player_stats'],
+        cluster_avg_stats_raw,
+        entry['projected_stats'],
+        comparison_df,
+        weak_areas,
+        build_drills_html(weak_areas),
+        snapshot.stats_columns,
+        radar_stats_categories,
+        report_cache=report_cache
+    )
+
+
+def regenerate_league_reports(snapshot, player_data_with_clusters, report_cache=None, player_names=None, percentile_engine=None):
+    """
+    Regenera los reportes PDF de la liga (o de una lista de jugadores) leyendo el análisis
+    de la instantánea de la liga. Con el caché, solo se rehacen los jugadores cuyos números cambiaron.
+
+    Args:
+        snapshot (LeagueSnapshot): Instantánea de la liga (nba_league_snapshot).
+        player_data_with_clusters (pd.DataFrame): DataFrame de jugadores con clúster (para la cabecera del reporte).
+        report_cache (ReportCache, optional): Caché a usar; por defecto se abre el del directorio 'report_cache'.
+        player_names (list, optional): Jugadores a procesar. Por defecto, todos los de la instantánea.
+        percentile_engine (PercentileEngine, optional): Si se pasa, los reportes incluyen percentiles.
+
+    Returns:
+        dict: Conteo de gráficos y reportes regenerados y reutilizados.
+    """
+    report_cache = report_cache if report_cache is not None else ReportCache()
+    player_names = player_names if player_names is not None else list(dict.fromkeys(snapshot.player_names))
+
+    for player_name in player_names:
+        generate_player_report_from_snapshot(snapshot, player_data_with_clusters, player_name,
+                                             report_cache=report_cache, percentile_engine=percentile_engine)
+
+    report_cache.save()
+    return report_cache.summary()
+
+
+if __name__ == '__main__':
+    import matplotlib
+    matplotlib.use('Agg') # Regeneración nocturna: sin ventanas
+    from nba_data_processor import load_and_preprocess_data, scale_data, perform_kmeans_clustering, analyze_clusters
+    from nba_player_analyzer import assign_cluster_roles
+    from nba_league_snapshot import build_league_snapshot
+
+    filepath = 'nba_active_player_stats_2023-24_Regular_Season_100min.xlsx'
+    clustering_stats_columns = [
+        'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT',
+        'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB', 'AST', 'STL',
+        'BLK', 'TOV', 'PF', 'PTS', 'GP', 'GS'
+    ]
+
+    stats_for_clustering, player_data_cleaned, player_names = load_and_preprocess_data(filepath, clustering_stats_columns)
+
+    if stats_for_clustering is not None:
+        scaled_stats_df, scaler = scale_data(stats_for_clustering)
+        clusters, kmeans_model = perform_kmeans_clustering(scaled_stats_df, 5)
+        player_data_cleaned['CLUSTER'] = clusters
+        cluster_means = analyze_clusters(player_data_cleaned, clustering_stats_columns)
+        cluster_roles = assign_cluster_roles(cluster_means)
+
+        league_snapshot = build_league_snapshot(player_data_cleaned, cluster_means, cluster_roles, clustering_stats_columns)
+        regenerate_league_reports(league_snapshot, player_data_cleaned)
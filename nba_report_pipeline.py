@@ -0,0 +1,367 @@
+import os
+import io
+import time
+import queue
+import shutil
+import tempfile
+import threading
+import contextlib
+import multiprocessing as mp
+from nba_resource_governor import get_governor, apply_worker_limits
+
+# Procesos por etapa por defecto: el rasterizado de gráficos suele ser el cuello de botella
+DEFAULT_STAGE_WORKERS = {'analysis': 1, 'render': 2, 'pdf': 2}
+
+# Cada cuánto (s) se comprueba, sin eventos nuevos, si algún proceso de etapa murió
+EVENT_TIMEOUT_S = 1.0
+
+
+def _run_stage_loop(stage_name, process_item, in_queue, out_queue, events_queue):
+    """
+    Bucle común de una etapa: toma elementos de la cola de entrada, los procesa y los
+    pasa a la cola de salida (acotada, por lo que `put` bloquea si la etapa siguiente
+    va atrasada). Al recibir None, envía al proceso principal sus tiempos de trabajo,
+    de espera de entrada y de bloqueo de salida.
+    """
+    busy_s = wait_s = blocked_s = 0.0
+    items = 0
+    stage_start = time.perf_counter()
+    while True:
+        t0 = time.perf_counter()
+        item = in_queue.get()
+        wait_s += time.perf_counter() - t0
+        if item is None:
+            break
+
+        t0 = time.perf_counter()
+        if 'error' in item:
+            result = item # Los errores de etapas anteriores solo se reenvían
+        else:
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    result = process_item(item)
+            except Exception as e:
+                result = {'player_name': item['player_name'], 'error': f"{stage_name}: {e}"}
+        busy_s += time.perf_counter() - t0
+        items += 1
+
+        t0 = time.perf_counter()
+        out_queue.put(result)
+        blocked_s += time.perf_counter() - t0
+
+    events_queue.put(('stats', stage_name, os.getpid(), {
+        'items': items, 'busy_s': busy_s, 'wait_s': wait_s, 'blocked_s': blocked_s,
+        'wall_s': time.perf_counter() - stage_start
+    }))
+
+
+def _analysis_stage(in_queue, out_queue, events_queue, snapshot_dir, player_data_with_clusters, work_dir):
+    """Etapa 1: lee el análisis del jugador de la instantánea y prepara los datos de sus gráficos."""
+    from nba_league_snapshot import load_league_snapshot
+    from nba_player_analyzer import radar_stats_categories, build_report_chart_specs, build_drills_html
+
+    snapshot = load_league_snapshot(snapshot_dir, mmap=True)
+
+    def process_item(item):
+        player_name = item['player_name']
+        if player_name not in snapshot:
+            return {'player_name': player_name, 'error': "analysis: jugador no encontrado en la instantánea"}
+        entry = snapshot.get_player(player_name)
+        cluster_avg_stats_raw = entry['cluster_avg'].rename(entry['cluster'])
+        weak_areas = snapshot.weak_areas(player_name)
+        chart_specs = build_report_chart_specs(player_name, entry['player_stats'], cluster_avg_stats_raw,
+                                               entry['projected_stats'], snapshot.stats_columns, radar_stats_categories)
+        for spec in chart_specs:
+            spec['path'] = os.path.join(work_dir, spec['filename'])
+        return {
+            'player_name': player_name,
+            'player_row': player_data_with_clusters.loc[[entry['row_label']]],
+            'player_cluster': entry['cluster'],
+            'player_cluster_role': entry['role'],
+            'cluster_avg_stats_raw': cluster_avg_stats_raw,
+            'comparison_df': snapshot.comparison_frame(player_name),
+            'weak_areas': weak_areas,
+            'detailed_drills_html': build_drills_html(weak_areas),
+            'stats_columns': snapshot.stats_columns,
+            'chart_specs': chart_specs,
+        }
+
+    _run_stage_loop('analysis', process_item, in_queue, out_queue, events_queue)
+
+
+def _render_stage(in_queue, out_queue, events_queue):
+    """Etapa 2: rasteriza los gráficos de radar del reporte a PNG."""
+    import matplotlib
+    matplotlib.use('Agg')
+    from nba_player_analyzer import render_report_chart
+
+    def process_item(item):
+        for spec in item['chart_specs']:
+            render_report_chart(spec, item['player_name'], item['player_cluster_role'], spec['path'])
+            # Los valores ya no hacen falta: se envía menos a la etapa de PDF
+            for key in ['player', 'cluster_avg', 'projected']:
+                spec.pop(key)
+        return item
+
+    _run_stage_loop('render', process_item, in_queue, out_queue, events_queue)
+
+
+def _pdf_stage(in_queue, events_queue, output_dir):
+    """Etapa 3: construye el HTML, genera el PDF con xhtml2pdf y elimina las imágenes temporales."""
+    from nba_player_analyzer import build_report_html, write_report_pdf
+
+    def process_item(item):
+        player_name = item['player_name']
+        report_html = build_report_html(player_name, item['player_row'], item['player_cluster'], item['player_cluster_role'],
+                                        item['cluster_avg_stats_raw'], item['comparison_df'], item['weak_areas'],
+                                        item['detailed_drills_html'], item['stats_columns'], item['chart_specs'])
+        output_filename = os.path.join(output_dir, f"Reporte_{player_name.replace(' ', '_')}.pdf")
+        success = write_report_pdf(report_html, output_filename, player_name)
+        for spec in item['chart_specs']:
+            if os.path.exists(spec['path']):
+                os.remove(spec['path'])
+        if not success:
+            return {'player_name': player_name, 'error': "pdf: xhtml2pdf no pudo generar el reporte"}
+        return {'player_name': player_name, 'output': output_filename}
+
+    # La salida de la última etapa va directamente a la cola de eventos del proceso principal
+    out_queue = _ReportEventQueue(events_queue)
+    _run_stage_loop('pdf', process_item, in_queue, out_queue, events_queue)
+
+
+def _start_stage(inner_threads, target, *args):
+    """Punto de entrada de cada proceso de etapa: aplica el límite de hilos nativos y arranca la etapa."""
+    apply_worker_limits(inner_threads)
+    target(*args)
+
+
+class _ReportEventQueue:
+    """Adaptador para que la etapa de PDF publique sus resultados como eventos 'report'."""
+
+    def __init__(self, events_queue):
+        self.events_queue = events_queue
+
+    def put(self, result):
+        self.events_queue.put(('report', result))
+
+
+def fit_stage_workers(stage_workers, governor=None):
+    """
+    Ajusta los procesos por etapa al presupuesto de núcleos del gobernador: si la suma pasa
+    del presupuesto, se reducen en proporción (cada etapa conserva al menos un proceso).
+
+    Args:
+        stage_workers (dict): Procesos pedidos por etapa.
+        governor (ResourceGovernor, optional): Por defecto, el global.
+
+    Returns:
+        tuple: (procesos por etapa, hilos nativos por proceso).
+    """
+    governor = governor or get_governor()
+    requested = sum(stage_workers.values())
+    budget, _ = governor.plan(requested, outer_workers=requested)
+    if budget < len(stage_workers):
+        print(f"Aviso: el pipeline necesita un proceso por etapa ({len(stage_workers)}) y el presupuesto es de "
+              f"{governor.total_cores} núcleos; se usa un proceso por etapa.")
+        budget = len(stage_workers)
+    if requested > budget:
+        # Un proceso por etapa y el resto, uno a uno, a la etapa más por debajo de su parte proporcional
+        shares = {stage: n * budget / requested for stage, n in stage_workers.items()}
+        fitted = {stage: 1 for stage in stage_workers}
+        for _ in range(budget - len(fitted)):
+            stage = max(fitted, key=lambda s: shares[s] - fitted[s])
+            fitted[stage] += 1
+        print(f"Aviso: {requested} procesos pedidos para {governor.total_cores} núcleos; se usan {fitted}.")
+        stage_workers = fitted
+    # Las etapas trabajan a la vez: sus procesos se reparten los núcleos del gobernador
+    inner_threads = max(1, governor.total_cores // sum(stage_workers.values()))
+    return stage_workers, inner_threads
+
+
+def run_report_pipeline(player_names, snapshot_dir, player_data_with_clusters, output_dir='reportes',
+                        stage_workers=None, queue_size=8):
+    """
+    Genera reportes PDF en un pipeline productor/consumidor de tres etapas
+    (análisis -> gráficos -> PDF), cada una con su propio número de procesos y
+    conectadas por colas acotadas que frenan a la etapa anterior si la siguiente se atrasa.
+
+    Args:
+        player_names (list): Jugadores a procesar.
+        snapshot_dir (str): Directorio de la instantánea de la liga (LeagueSnapshot.save).
+        player_data_with_clusters (pd.DataFrame): DataFrame de jugadores con clúster.
+        output_dir (str): Directorio donde se guardan los PDF.
+        stage_workers (dict, optional): Procesos por etapa, p. ej. {'render': 4, 'pdf': 2}. Se
+            reducen si su suma pasa del presupuesto de núcleos del gobernador (fit_stage_workers).
+        queue_size (int): Capacidad de cada cola entre etapas.
+
+    Si un proceso de etapa muere sin terminar su bucle (falta de memoria, fallo en xhtml2pdf
+    o matplotlib...), el pipeline se aborta: se terminan las demás etapas y los jugadores
+    sin reporte se devuelven con 'error' en lugar de bloquear las colas para siempre.
+
+    Returns:
+        dict: 'reports' (resultados por jugador), 'stages' (utilización por etapa),
+              'elapsed_s', 'reports_per_s' y 'aborted' (motivo, o None).
+    """
+    stage_workers, inner_threads = fit_stage_workers({**DEFAULT_STAGE_WORKERS, **(stage_workers or {})})
+    snapshot_dir = os.path.abspath(snapshot_dir)
+    output_dir = os.path.abspath(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    # xhtml2pdf solo lee imágenes dentro del directorio actual, así que los PNG temporales van ahí
+    work_dir = tempfile.mkdtemp(prefix='nba_report_charts_', dir=os.getcwd())
+
+    names_queue = mp.Queue(maxsize=queue_size)
+    charts_queue = mp.Queue(maxsize=queue_size)
+    pdf_queue = mp.Queue(maxsize=queue_size)
+    events_queue = mp.Queue()
+
+    stage_args = {
+        'analysis': (_analysis_stage, (names_queue, charts_queue, events_queue, snapshot_dir, player_data_with_clusters, work_dir)),
+        'render': (_render_stage, (charts_queue, pdf_queue, events_queue)),
+        'pdf': (_pdf_stage, (pdf_queue, events_queue, output_dir)),
+    }
+    stage_inputs = {'analysis': names_queue, 'render': charts_queue, 'pdf': pdf_queue}
+
+    start = time.perf_counter()
+    processes = {}
+    for stage_name, (target, args) in stage_args.items():
+        processes[stage_name] = [mp.Process(target=_start_stage, args=(inner_threads, target) + args, daemon=True)
+                                 for _ in range(stage_workers[stage_name])]
+        for process in processes[stage_name]:
+            process.start()
+
+    abort = threading.Event()
+
+    def put_unless_aborted(target_queue, item):
+        # Las colas son acotadas: si una etapa murió nadie las vacía y un put sin timeout no volvería
+        while not abort.is_set():
+            try:
+                target_queue.put(item, timeout=EVENT_TIMEOUT_S)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def feed_and_close():
+        # Alimenta la primera etapa y cierra cada etapa cuando la anterior ha terminado
+        for player_name in player_names:
+            if not put_unless_aborted(names_queue, {'player_name': player_name}):
+                return
+        for stage_name in ['analysis', 'render', 'pdf']:
+            for _ in processes[stage_name]:
+                if not put_unless_aborted(stage_inputs[stage_name], None):
+                    return
+            for process in processes[stage_name]:
+                while process.is_alive() and not abort.is_set():
+                    process.join(timeout=EVENT_TIMEOUT_S)
+                if abort.is_set():
+                    return
+        events_queue.put(('finished',))
+
+    closer = threading.Thread(target=feed_and_close, daemon=True)
+    closer.start()
+
+    def handle(event):
+        if event[0] == 'report':
+            reports.append(event[1])
+        elif event[0] == 'stats':
+            worker_stats[event[1]].append(event[3])
+
+    reports = []
+    worker_stats = {stage_name: [] for stage_name in stage_args}
+    aborted = None
+    while True:
+        try:
+            event = events_queue.get(timeout=EVENT_TIMEOUT_S)
+        except queue.Empty:
+            event = None
+        if event is not None and event[0] == 'finished':
+            break
+        if event is not None:
+            handle(event)
+
+        # Un proceso que sale con código distinto de 0 murió sin terminar su bucle
+        dead = [(stage_name, process.exitcode) for stage_name, stage_processes in processes.items()
+                for process in stage_processes if process.exitcode not in (None, 0)]
+        if dead:
+            aborted = f"proceso de la etapa '{dead[0][0]}' terminó con código {dead[0][1]}"
+            print(f"Error: {aborted}; se aborta el pipeline.")
+            abort.set()
+            while True: # Lo que ya llegó se conserva
+                try:
+                    handle(events_queue.get_nowait())
+                except queue.Empty:
+                    break
+            for stage_processes in processes.values():
+                for process in stage_processes:
+                    if process.is_alive():
+                        process.terminate()
+                    process.join()
+            for stage_queue in (names_queue, charts_queue, pdf_queue, events_queue):
+                stage_queue.cancel_join_thread() # No esperar a vaciar colas que nadie va a leer
+            break
+    closer.join(timeout=EVENT_TIMEOUT_S * 5)
+    elapsed = time.perf_counter() - start
+
+    if aborted:
+        # Los jugadores sin resultado (en curso en el proceso muerto o sin procesar) cuentan como errores
+        pending = list(player_names)
+        for report in reports:
+            if report['player_name'] in pending:
+                pending.remove(report['player_name'])
+        reports += [{'player_name': player_name, 'error': f"pipeline abortado: {aborted}"} for player_name in pending]
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    stages = {}
+    for stage_name, stats_list in worker_stats.items():
+        wall_s = sum(stats['wall_s'] for stats in stats_list) or 1.0
+        items = sum(stats['items'] for stats in stats_list)
+        busy_s = sum(stats['busy_s'] for stats in stats_list)
+        stages[stage_name] = {
+            'workers': len(stats_list),
+            'items': items,
+            'busy_s': busy_s,
+            'utilization': busy_s / wall_s,
+            'input_wait': sum(stats['wait_s'] for stats in stats_list) / wall_s,
+            'output_blocked': sum(stats['blocked_s'] for stats in stats_list) / wall_s,
+            'seconds_per_item': busy_s / items if items else 0.0,
+        }
+
+    print(f"\nPipeline de reportes: {len(reports)} reportes en {elapsed:.1f} s ({len(reports) / elapsed:.2f} reportes/s)")
+    print(f"{'Etapa':<10}{'Procesos':>9}{'Utilización':>13}{'Espera entrada':>16}{'Bloqueo salida':>16}{'s/elemento':>12}")
+    for stage_name, stats in stages.items():
+        print(f"{stage_name:<10}{stats['workers']:>9}{stats['utilization']:>13.0%}{stats['input_wait']:>16.0%}"
+              f"{stats['output_blocked']:>16.0%}{stats['seconds_per_item']:>12.3f}")
+    bottleneck = max(stages, key=lambda name: stages[name]['utilization'])
+    print(f"Cuello de botella probable: '{bottleneck}' (súbele procesos en stage_workers)")
+
+    errors = [report for report in reports if 'error' in report]
+    for report in errors:
+        print(f"Error en el reporte de {report['player_name']}: {report['error']}")
+
+    return {'reports': reports, 'stages': stages, 'elapsed_s': elapsed, 'reports_per_s': len(reports) / elapsed,
+            'aborted': aborted}
+
+
+if __name__ == '__main__':
+    from nba_data_processor import load_and_preprocess_data, scale_data, perform_kmeans_clustering, analyze_clusters
+    from nba_player_analyzer import assign_cluster_roles
+    from nba_league_snapshot import build_league_snapshot
+
+    filepath = 'nba_active_player_stats_2023-24_Regular_Season_100min.xlsx'
+    clustering_stats_columns = [
+        'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT',
+        'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB', 'AST', 'STL',
+        'BLK', 'TOV', 'PF', 'PTS', 'GP', 'GS'
+    ]
+
+    stats_for_clustering, player_data_cleaned, player_names = load_and_preprocess_data(filepath, clustering_stats_columns)
+
+    if stats_for_clustering is not None:
+        scaled_stats_df, scaler = scale_data(stats_for_clustering)
+        clusters, kmeans_model = perform_kmeans_clustering(scaled_stats_df, 5)
+        player_data_cleaned['CLUSTER'] = clusters
+        cluster_means = analyze_clusters(player_data_cleaned, clustering_stats_columns)
+        cluster_roles = assign_cluster_roles(cluster_means)
+
+        build_league_snapshot(player_data_cleaned, cluster_means, cluster_roles, clustering_stats_columns).save('league_snapshot')
+        run_report_pipeline(list(player_data_cleaned['PLAYER_NAME'].unique()), 'league_snapshot', player_data_cleaned)
@@ -0,0 +1,211 @@
+import os
+import sys
+import io
+import gc
+import time
+import queue
+import contextlib
+import multiprocessing as mp
+import numpy as np
+from nba_resource_governor import get_governor, apply_worker_limits
+
+# Por encima de esta memoria residente (MB) un proceso de reportes se recicla
+DEFAULT_RSS_LIMIT_MB = 1024
+
+
+def current_rss_mb():
+    """
+    Devuelve la memoria residente (RSS) actual del proceso en MB.
+    En Linux se lee de /proc; en otros sistemas se usa el máximo de getrusage como aproximación.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS devuelve bytes; Linux y BSD, kilobytes
+    return max_rss / 1024 ** 2 if sys.platform == 'darwin' else max_rss / 1024
+
+
+def _report_worker(task_queue, result_queue, snapshot_dir, player_data_with_clusters, output_dir, rss_limit_mb, inner_threads=1):
+    """
+    Proceso de reportes: toma nombres de jugadores de la cola, genera su PDF y, después
+    de cada reporte, libera recursos y comprueba la RSS. Si supera el límite, avisa al
+    proceso principal y termina para que este lo sustituya por uno nuevo.
+    """
+    apply_worker_limits(inner_threads)
+    import matplotlib
+    matplotlib.use('Agg')
+    from nba_league_snapshot import load_league_snapshot
+    from nba_report_cache import generate_player_report_from_snapshot
+
+    snapshot = load_league_snapshot(snapshot_dir, mmap=True)
+    os.makedirs(output_dir, exist_ok=True)
+    os.chdir(output_dir) # generate_player_report_pdf escribe en el directorio actual
+    pid = os.getpid()
+
+    while True:
+        player_name = task_queue.get()
+        if player_name is None:
+            result_queue.put(('exit', pid, None, None, current_rss_mb(), 0.0))
+            return
+
+        result_queue.put(('start', pid, player_name, None, None, None))
+        start = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                report_ok = generate_player_report_from_snapshot(snapshot, player_data_with_clusters, player_name)
+            status = 'ok' if report_ok else 'error: PDF no generado'
+        except Exception as e:
+            status = f"error: {e}"
+
+        # Limpieza por reporte: ciclos de referencias de matplotlib/xhtml2pdf
+        gc.collect()
+        rss = current_rss_mb()
+        result_queue.put(('done', pid, player_name, status, rss, time.perf_counter() - start))
+
+        if rss > rss_limit_mb:
+            result_queue.put(('recycle', pid, player_name, None, rss, 0.0))
+            return
+
+
+def render_reports(player_names, snapshot_dir, player_data_with_clusters, output_dir='reportes',
+                   n_workers=1, rss_limit_mb=DEFAULT_RSS_LIMIT_MB):
+    """
+    Genera los reportes PDF de una lista de jugadores en procesos de trabajo con
+    vigilancia de memoria: cada proceso se recicla cuando su RSS supera `rss_limit_mb`.
+
+    Args:
+        player_names (list): Jugadores a procesar.
+        snapshot_dir (str): Directorio de la instantánea de la liga (LeagueSnapshot.save).
+        player_data_with_clusters (pd.DataFrame): DataFrame de jugadores con clúster.
+        output_dir (str): Directorio donde se guardan los PDF.
+        n_workers (int): Número de procesos de reportes (el gobernador de recursos lo limita a
+            los núcleos disponibles y reparte el resto como hilos nativos por proceso).
+        rss_limit_mb (float): Límite de RSS por proceso, en MB.
+
+    Returns:
+        dict: 'reports' (lista de (jugador, estado, rss_mb, segundos)), 'recycled' (procesos reciclados)
+              y 'failed' (jugadores cuyo proceso terminó de forma inesperada).
+    """
+    snapshot_dir = os.path.abspath(snapshot_dir)
+    output_dir = os.path.abspath(output_dir)
+    task_queue = mp.Queue()
+    result_queue = mp.Queue()
+    for player_name in player_names:
+        task_queue.put(player_name)
+    n_workers, inner_threads = get_governor().plan(len(player_names), n_workers)
+
+    def start_worker():
+        worker = mp.Process(target=_report_worker,
+                            args=(task_queue, result_queue, snapshot_dir, player_data_with_clusters, output_dir, rss_limit_mb, inner_threads),
+                            daemon=True)
+        worker.start()
+        return worker
+
+    workers = {}
+    for _ in range(n_workers):
+        worker = start_worker()
+        workers[worker.pid] = worker
+
+    reports, failed = [], []
+    in_flight = {}
+    recycled = 0
+    pending = len(player_names)
+
+    while pending > 0:
+        try:
+            kind, pid, player_name, status, rss, elapsed = result_queue.get(timeout=5)
+        except queue.Empty:
+            # Un proceso que murió sin avisar (p. ej. por falta de memoria) pierde su reporte en curso
+            for pid, worker in list(workers.items()):
+                if not worker.is_alive():
+                    del workers[pid]
+                    if pid in in_flight:
+                        failed.append(in_flight.pop(pid))
+                        pending -= 1
+                    if pending > 0:
+                        replacement = start_worker()
+                        workers[replacement.pid] = replacement
+            continue
+
+        if kind == 'start':
+            in_flight[pid] = player_name
+        elif kind == 'done':
+            in_flight.pop(pid, None)
+            reports.append((player_name, status, rss, elapsed))
+            pending -= 1
+        elif kind == 'recycle':
+            recycled += 1
+            workers.pop(pid).join()
+            if pending > 0:
+                replacement = start_worker()
+                workers[replacement.pid] = replacement
+
+    for _ in workers:
+        task_queue.put(None)
+    for worker in workers.values():
+        worker.join()
+
+    print(f"Reportes generados: {len(reports)} | procesos reciclados por memoria: {recycled} | fallidos: {len(failed)}")
+    return {'reports': reports, 'recycled': recycled, 'failed': failed}
+
+
+def soak_test_renderer(player_names, snapshot_dir, player_data_with_clusters, n_reports=1000,
+                       output_dir='soak_reportes', max_growth_mb=50.0):
+    """
+    Prueba de resistencia: genera `n_reports` reportes en un único proceso (sin reciclado)
+    y comprueba que la RSS se mantiene plana, comparando la mediana del primer y del
+    último 10% de los reportes (el primer 10% sirve de calentamiento).
+
+    Returns:
+        dict: RSS inicial y final (MB), crecimiento y las muestras de RSS por reporte.
+    """
+    names = [player_names[i % len(player_names)] for i in range(n_reports)]
+    start = time.perf_counter()
+    results = render_reports(names, snapshot_dir, player_data_with_clusters, output_dir=output_dir,
+                             n_workers=1, rss_limit_mb=float('inf'))
+    elapsed = time.perf_counter() - start
+
+    rss_samples = np.array([rss for _, _, rss, _ in results['reports']])
+    window = max(1, len(rss_samples) // 10)
+    rss_start = float(np.median(rss_samples[:window]))
+    rss_end = float(np.median(rss_samples[-window:]))
+    growth = rss_end - rss_start
+
+    print(f"Prueba de resistencia: {len(rss_samples)} reportes en {elapsed:.1f} s, "
+          f"RSS {rss_start:.1f} MB -> {rss_end:.1f} MB (crecimiento {growth:+.1f} MB)")
+    assert growth <= max_growth_mb, f"La RSS creció {growth:.1f} MB (> {max_growth_mb} MB) durante la prueba de resistencia"
+    return {'rss_start_mb': rss_start, 'rss_end_mb': rss_end, 'growth_mb': growth, 'rss_samples': rss_samples}
+
+
+if __name__ == '__main__':
+    from nba_data_processor import load_and_preprocess_data, scale_data, perform_kmeans_clustering, analyze_clusters
+    from nba_player_analyzer import assign_cluster_roles
+    from nba_league_snapshot import build_league_snapshot
+
+    filepath = 'nba_active_player_stats_2023-24_Regular_Season_100min.xlsx'
+    clustering_stats_columns = [
+        'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT',
+        'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB', 'AST', 'STL',
+        'BLK', 'TOV', 'PF', 'PTS', 'GP', 'GS'
+    ]
+
+    stats_for_clustering, player_data_cleaned, player_names = load_and_preprocess_data(filepath, clustering_stats_columns)
+
+    if stats_for_clustering is not None:
+        scaled_stats_df, scaler = scale_data(stats_for_clustering)
+        clusters, kmeans_model = perform_kmeans_clustering(scaled_stats_df, 5)
+        player_data_cleaned['CLUSTER'] = clusters
+        cluster_means = analyze_clusters(player_data_cleaned, clustering_stats_columns)
+        cluster_roles = assign_cluster_roles(cluster_means)
+
+        build_league_snapshot(player_data_cleaned, cluster_means, cluster_roles, clustering_stats_columns).save('league_snapshot')
+        n_reports = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+        soak_test_renderer(list(player_data_cleaned['PLAYER_NAME'].unique()), 'league_snapshot', player_data_cleaned, n_reports=n_reports)
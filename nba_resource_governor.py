@@ -0,0 +1,203 @@
+import os
+import time
+import contextlib
+import multiprocessing as mp
+import numpy as np
+import pandas as pd
+from threadpoolctl import threadpool_limits
+
+# KMeans usa hilos OpenMP/BLAS internamente. Si además se lanzan varios procesos (barrido de K,
+# reportes en paralelo), cada uno intenta usar todos los núcleos y el rendimiento cae por
+# debajo del de una ejecución en serie. El gobernador reparte un presupuesto global de núcleos
+# entre procesos externos e hilos nativos internos, de forma que procesos x hilos <= núcleos.
+
+# Variables que leen las bibliotecas nativas al cargarse (procesos nuevos con 'spawn')
+THREAD_ENV_VARS = ['OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'BLIS_NUM_THREADS',
+                   'VECLIB_MAXIMUM_THREADS', 'NUMEXPR_NUM_THREADS']
+
+# Límite activo del proceso de trabajo actual: se guarda para que no lo libere el recolector
+_worker_limits = None
+
+
+def available_cores():
+    """Núcleos que este proceso puede usar (respeta la afinidad de CPU en Linux)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def apply_worker_limits(inner_threads):
+    """
+    Limita los hilos nativos del proceso actual. Se llama al arrancar cada proceso de trabajo:
+    fija las variables de entorno (para bibliotecas que aún no se han cargado) y aplica
+    threadpoolctl a las que ya están cargadas.
+
+    Args:
+        inner_threads (int): Hilos OpenMP/BLAS permitidos en este proceso.
+    """
+    global _worker_limits
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(inner_threads)
+    _worker_limits = threadpool_limits(limits=inner_threads)
+
+
+class ResourceGovernor:
+    """
+    Reparte `total_cores` entre procesos de trabajo (paralelismo externo) e hilos nativos
+    por proceso (paralelismo interno) y aplica el reparto en cada proceso.
+    """
+
+    def __init__(self, total_cores=None):
+        """
+        Args:
+            total_cores (int, optional): Presupuesto global de núcleos. Por defecto, los disponibles.
+        """
+        self.total_cores = max(1, int(total_cores or available_cores()))
+
+    def plan(self, n_tasks, outer_workers=None):
+        """
+        Decide el reparto para `n_tasks` tareas independientes.
+
+        Args:
+            n_tasks (int): Número de tareas (ajustes, reportes...).
+            outer_workers (int, optional): Procesos deseados. Por defecto, uno por núcleo
+                (sin pasar del número de tareas), que suele ser lo mejor para tareas pequeñas.
+
+        Returns:
+            tuple: (procesos, hilos por proceso), con procesos x hilos <= total_cores.
+        """
+        outer = outer_workers if outer_workers is not None else self.total_cores
+        outer = max(1, min(int(outer), self.total_cores, max(1, n_tasks)))
+        inner = max(1, self.total_cores // outer)
+        return outer, inner
+
+    @contextlib.contextmanager
+    def limit_threads(self, inner_threads=None):
+        """Contexto que limita los hilos nativos del proceso actual (por defecto, a todo el presupuesto)."""
+        with threadpool_limits(limits=inner_threads or self.total_cores):
+            yield
+
+    def map(self, func, items, outer_workers=None):
+        """
+        Aplica `func` a cada elemento repartiendo el trabajo según plan(): con un solo proceso
+        se ejecuta aquí mismo con el límite de hilos; si no, en un Pool cuyos procesos
+        arrancan con apply_worker_limits.
+
+        Args:
+            func (callable): Función a nivel de módulo (debe poder serializarse).
+            items (list): Elementos a procesar.
+            outer_workers (int, optional): Procesos deseados.
+
+        Returns:
+            list: Resultados en el mismo orden que `items`.
+        """
+        items = list(items)
+        outer, inner = self.plan(len(items), outer_workers)
+        if outer == 1:
+            with self.limit_threads(inner):
+                return [func(item) for item in items]
+        with mp.Pool(processes=outer, initializer=apply_worker_limits, initargs=(inner,)) as pool:
+            return pool.map(func, items, chunksize=1)
+
+
+_default_governor = ResourceGovernor()
+
+
+def get_governor():
+    """Devuelve el gobernador global que usan los puntos de entrada del pipeline."""
+    return _default_governor
+
+
+def configure_governor(total_cores=None):
+    """
+    Cambia el presupuesto global de núcleos (p. ej. para compartir la máquina con otros trabajos).
+
+    Returns:
+        ResourceGovernor: El nuevo gobernador global.
+    """
+    global _default_governor
+    _default_governor = ResourceGovernor(total_cores)
+    print(f"Gobernador de recursos: {_default_governor.total_cores} núcleos")
+    return _default_governor
+
+
+def _fit_inertia(task):
+    """Tarea de un proceso del barrido: ajusta KMeans para un K y devuelve (K, WCSS)."""
+    from sklearn.cluster import KMeans
+    X, k = task
+    kmeans = KMeans(n_clusters=k, init='k-means++', max_iter=300, n_init=10, random_state=42)
+    return k, kmeans.fit(X).inertia_
+
+
+def parallel_k_sweep(scaled_stats_df, max_k=10, outer_workers=None, governor=None):
+    """
+    Calcula la WCSS de K=1..max_k repartiendo los ajustes entre procesos según el gobernador.
+
+    Returns:
+        pd.Series: WCSS por K.
+    """
+    governor = governor or get_governor()
+    X = np.asarray(scaled_stats_df, dtype=float)
+    results = governor.map(_fit_inertia, [(X, k) for k in range(1, max_k + 1)], outer_workers=outer_workers)
+    return pd.Series(dict(results), name='WCSS').rename_axis('K')
+
+
+def benchmark_core_splits(scaled_stats_df, max_k=10, total_cores=None, repeats=1):
+    """
+    Mide el barrido de K con cada reparto procesos x hilos que cabe en el presupuesto
+    (incluido el reparto sobresuscrito de usar todos los hilos en cada proceso, como referencia).
+
+    Returns:
+        pd.DataFrame: Tiempo por reparto, ordenado de mejor a peor.
+    """
+    governor = ResourceGovernor(total_cores)
+    cores = governor.total_cores
+    splits = [(outer, cores // outer) for outer in range(1, cores + 1) if cores % outer == 0]
+    if cores > 1:
+        splits.append((cores, cores)) # Sobresuscrito: lo que pasa sin gobernador
+    X = np.asarray(scaled_stats_df, dtype=float)
+    tasks = [(X, k) for k in range(1, max_k + 1)]
+
+    rows = []
+    for outer, inner in splits:
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            if outer == 1:
+                with threadpool_limits(limits=inner):
+                    [_fit_inertia(task) for task in tasks]
+            else:
+                with mp.Pool(processes=outer, initializer=apply_worker_limits, initargs=(inner,)) as pool:
+                    pool.map(_fit_inertia, tasks, chunksize=1)
+            timings.append(time.perf_counter() - start)
+        rows.append({'processes': outer, 'threads_per_process': inner, 'threads_total': outer * inner,
+                     'seconds': min(timings)})
+
+    results_df = pd.DataFrame(rows).sort_values('seconds').reset_index(drop=True)
+    serial = results_df.loc[(results_df['processes'] == 1), 'seconds'].iloc[0]
+    results_df['speedup_vs_1_process'] = serial / results_df['seconds']
+    print(f"\nRepartos de {cores} núcleos para un barrido de K=1..{max_k}:")
+    print(results_df.round(3).to_string(index=False))
+    best = results_df.iloc[0]
+    print(f"Mejor reparto: {int(best['processes'])} procesos x {int(best['threads_per_process'])} hilos")
+    return results_df
+
+
+if __name__ == '__main__':
+    import sys
+    from nba_data_processor import load_and_preprocess_data, scale_data
+
+    filepath = 'nba_active_player_stats_2023-24_Regular_Season_100min.xlsx'
+    clustering_stats_columns = [
+        'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT',
+        'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB', 'AST', 'STL',
+        'BLK', 'TOV', 'PF', 'PTS', 'GP', 'GS'
+    ]
+
+    stats_for_clustering, player_data_cleaned, player_names = load_and_preprocess_data(filepath, clustering_stats_columns)
+
+    if stats_for_clustering is not None:
+        scaled_stats_df, scaler = scale_data(stats_for_clustering)
+        total_cores = int(sys.argv[1]) if len(sys.argv) > 1 else None
+        benchmark_core_splits(scaled_stats_df, total_cores=total_cores)
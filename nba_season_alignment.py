@@ -0,0 +1,376 @@
+import pandas as pd
+import numpy as np
+import time
+import itertools
+import contextlib
+import io
+from scipy.optimize import linear_sum_assignment
+from nba_data_processor import scale_data, perform_kmeans_clustering
+from nba_player_analyzer import assign_cluster_roles
+
+# Alineación de clústeres entre temporadas: los IDs de KMeans son arbitrarios en cada ajuste,
+# así que se emparejan los centroides de todas las temporadas con un conjunto común de
+# clústeres canónicos. Las matrices de distancias de todas las temporadas se calculan de una
+# vez y, para k pequeño, la asignación óptima se resuelve para todas las temporadas a la vez
+# evaluando todas las permutaciones; para k mayor (o k distinto) se usa linear_sum_assignment.
+
+# Hasta este k se evalúan todas las permutaciones (5! = 120). Por encima el coste crece con k! y
+# el bucle de linear_sum_assignment es más rápido (ver benchmark_alignment con k = 6..8)
+MAX_PERMUTATION_K = 5
+
+
+class SeasonFit:
+    """Ajuste de clustering de una temporada: centroides en escala original, etiquetas y medias."""
+
+    def __init__(self, season, centroids, labels, player_data, cluster_means, cluster_roles):
+        self.season = season
+        self.centroids = np.asarray(centroids, dtype=float) # (k, n_stats), escala original
+        self.labels = np.asarray(labels)
+        self.player_data = player_data
+        self.cluster_means = cluster_means
+        self.cluster_roles = cluster_roles
+
+    @property
+    def n_clusters(self):
+        return len(self.centroids)
+
+
+def fit_seasons(season_frames, stats_columns, n_clusters=5, engine='kmeans'):
+    """
+    Ajusta el pipeline (escalado + clustering) por separado en cada temporada.
+
+    Args:
+        season_frames (dict): {SEASON_ID: DataFrame de jugadores de esa temporada}.
+        stats_columns (list): Columnas del clustering.
+        n_clusters (int): Clústeres por temporada.
+        engine (str): Motor de clustering (nba_clustering_engines).
+
+    Returns:
+        list: Un SeasonFit por temporada, en orden de temporada.
+    """
+    fits = []
+    for season in sorted(season_frames):
+        player_data = season_frames[season].copy()
+        stats = player_data[stats_columns].apply(pd.to_numeric, errors='coerce').dropna()
+        player_data = player_data.loc[stats.index]
+        with contextlib.redirect_stdout(io.StringIO()):
+            scaled_stats_df, scaler = scale_data(stats)
+            labels, model = perform_kmeans_clustering(scaled_stats_df, n_clusters, engine=engine)
+        player_data['CLUSTER'] = labels
+        cluster_means = player_data.groupby('CLUSTER')[stats_columns].mean()
+        centroids = scaler.inverse_transform(model.cluster_centers_)
+        fits.append(SeasonFit(season, centroids, labels, player_data, cluster_means, assign_cluster_roles(cluster_means)))
+    print(f"{len(fits)} temporadas ajustadas con {n_clusters} clústeres.")
+    return fits
+
+
+def pairwise_sq_distances(centroids, reference):
+    """
+    Distancias euclídeas al cuadrado de los centroides de todas las temporadas a la referencia.
+
+    Args:
+        centroids (numpy.ndarray): (n_temporadas, k, n_stats).
+        reference (numpy.ndarray): (k_ref, n_stats) o (n_temporadas, k_ref, n_stats).
+
+    Returns:
+        numpy.ndarray: (n_temporadas, k, k_ref).
+    """
+    if reference.ndim == 2:
+        reference = reference[None]
+    cross = np.einsum('skd,srd->skr', centroids, np.broadcast_to(reference, (len(centroids),) + reference.shape[1:]))
+    distances = (centroids ** 2).sum(axis=2)[:, :, None] - 2.0 * cross + (reference ** 2).sum(axis=2)[:, None, :]
+    return np.maximum(distances, 0.0)
+
+
+def batched_assignment(distances):
+    """
+    Asignación óptima (mínimo coste total) de cada temporada a la referencia.
+
+    Con k <= MAX_PERMUTATION_K se evalúan todas las permutaciones de todas las temporadas en
+    una sola operación; si no, se resuelve cada temporada con linear_sum_assignment.
+
+    Args:
+        distances (numpy.ndarray): (n_temporadas, k, k) costes.
+
+    Returns:
+        numpy.ndarray: (n_temporadas, k) clúster de referencia asignado a cada clúster de cada temporada.
+    """
+    if distances.shape[1] <= MAX_PERMUTATION_K:
+        return _permutation_assignment(distances)
+    return np.stack([linear_sum_assignment(d)[1] for d in distances])
+
+
+def _permutation_assignment(distances):
+    """Asignación por fuerza bruta: coste de las k! permutaciones de todas las temporadas a la vez."""
+    k = distances.shape[1]
+    permutations = _permutations(k) # (k!, k)
+    costs = distances[:, np.arange(k)[None, :], permutations].sum(axis=2) # (temporadas, k!)
+    return permutations[costs.argmin(axis=1)]
+
+
+_permutation_cache = {}
+
+
+def _permutations(k):
+    if k not in _permutation_cache:
+        _permutation_cache[k] = np.array(list(itertools.permutations(range(k))), dtype=np.int64)
+    return _permutation_cache[k]
+
+
+def _standardize(fits):
+    """Centroides de todas las temporadas en una escala común (media y desviación de todos los jugadores)."""
+    stats = np.concatenate([fit.player_data[fit.cluster_means.columns].to_numpy(dtype=float) for fit in fits])
+    mean, scale = stats.mean(axis=0), stats.std(axis=0)
+    scale[scale == 0] = 1.0
+    return [(fit.centroids - mean) / scale for fit in fits]
+
+
+def align_seasons(fits, method='consensus', reference_season=None, max_iter=10):
+    """
+    Empareja los clústeres de todas las temporadas con un conjunto común de clústeres canónicos.
+
+    Args:
+        fits (list): SeasonFit de cada temporada (ver fit_seasons).
+        method (str): 'consensus' (se alinea con el centroide medio de las temporadas ya alineadas,
+                      iterando hasta que no cambia), 'reference' (con la temporada `reference_season`)
+                      o 'chain' (cada temporada con la anterior, componiendo las asignaciones).
+        reference_season (str, optional): Temporada de referencia. Por defecto, la última.
+        max_iter (int): Iteraciones máximas del consenso.
+
+    Returns:
+        dict: 'mapping' ({temporada: array clúster original -> clúster canónico}), 'cost' (distancia
+              media al cuadrado de cada temporada a su referencia) y 'elapsed_ms'.
+    """
+    start = time.perf_counter()
+    standardized = _standardize(fits)
+    seasons = [fit.season for fit in fits]
+    reference_index = seasons.index(reference_season) if reference_season is not None else len(fits) - 1
+    k_ref = fits[reference_index].n_clusters
+
+    if any(fit.n_clusters != k_ref for fit in fits):
+        # k distinto entre temporadas: asignación rectangular temporada a temporada con la referencia;
+        # los clústeres sin pareja reciben IDs canónicos nuevos
+        reference = standardized[reference_index]
+        mapping, cost, next_id = {}, {}, k_ref
+        for fit, centroids in zip(fits, standardized):
+            distances = pairwise_sq_distances(centroids[None], reference)[0]
+            rows, cols = linear_sum_assignment(distances)
+            season_mapping = np.full(fit.n_clusters, -1, dtype=np.int64)
+            season_mapping[rows] = cols
+            for unmatched in np.flatnonzero(season_mapping < 0):
+                season_mapping[unmatched], next_id = next_id, next_id + 1
+            mapping[fit.season], cost[fit.season] = season_mapping, float(distances[rows, cols].mean())
+        return {'mapping': mapping, 'cost': cost, 'elapsed_ms': (time.perf_counter() - start) * 1000}
+
+    centroids = np.stack(standardized) # (temporadas, k, n_stats)
+    season_index = np.arange(len(fits))[:, None]
+    if method == 'chain':
+        # Asignaciones entre temporadas consecutivas en un solo lote y luego composición
+        steps = batched_assignment(pairwise_sq_distances(centroids[1:], centroids[:-1]))
+        assignment = np.empty((len(fits), k_ref), dtype=np.int64)
+        assignment[0] = np.arange(k_ref)
+        for s in range(1, len(fits)):
+            assignment[s] = assignment[s - 1][steps[s - 1]]
+        # Se numera según la temporada de referencia
+        relabel = np.argsort(assignment[reference_index])
+        assignment = relabel[assignment]
+    else:
+        assignment = batched_assignment(pairwise_sq_distances(centroids, centroids[reference_index]))
+        if method == 'consensus':
+            for _ in range(max_iter):
+                aligned = np.empty_like(centroids)
+                aligned[season_index, assignment] = centroids
+                consensus = aligned.mean(axis=0)
+                new_assignment = batched_assignment(pairwise_sq_distances(centroids, consensus))
+                if np.array_equal(new_assignment, assignment):
+                    break
+                assignment = new_assignment
+        elif method != 'reference':
+            raise ValueError(f"Método de alineación desconocido: '{method}'. Opciones: consensus, reference, chain")
+
+    aligned = np.empty_like(centroids)
+    aligned[season_index, assignment] = centroids
+    target = aligned.mean(axis=0) if method == 'consensus' else aligned[reference_index]
+    costs = ((aligned - target[None]) ** 2).sum(axis=2).mean(axis=1)
+    return {
+        'mapping': {fit.season: assignment[s] for s, fit in enumerate(fits)},
+        'cost': {fit.season: float(costs[s]) for s, fit in enumerate(fits)},
+        'elapsed_ms': (time.perf_counter() - start) * 1000,
+    }
+
+
+def canonical_roles(fits, mapping):
+    """
+    Rol de cada clúster canónico: assign_cluster_roles sobre la media (entre temporadas) de las
+    medias de los clústeres emparejados.
+
+    Returns:
+        dict: {clúster canónico: rol}
+    """
+    aligned_means = []
+    for fit in fits:
+        means = fit.cluster_means.copy()
+        means.index = mapping[fit.season][means.index.to_numpy()]
+        aligned_means.append(means)
+    pooled_means = pd.concat(aligned_means).groupby(level=0).mean()
+    return assign_cluster_roles(pooled_means)
+
+
+def role_timeline(fits, alignment, roles=None, player_key='PLAYER_ID'):
+    """
+    Línea temporal de roles de toda la liga: una fila por jugador y temporada con su clúster
+    original, el canónico y el rol canónico.
+
+    Args:
+        fits (list): SeasonFit de cada temporada.
+        alignment (dict): Resultado de align_seasons.
+        roles (dict, optional): Roles canónicos. Por defecto, canonical_roles.
+        player_key (str): Columna que identifica al jugador entre temporadas.
+
+    Returns:
+        tuple: (DataFrame largo, DataFrame ancho jugador x temporada con el rol)
+    """
+    mapping = alignment['mapping']
+    roles = roles if roles is not None else canonical_roles(fits, mapping)
+    frames = []
+    for fit in fits:
+        key = player_key if player_key in fit.player_data.columns else 'PLAYER_NAME'
+        # Una fila por jugador y temporada (en los traspasos, la primera, como en los reportes)
+        rows = fit.player_data.drop_duplicates(subset=key)
+        canonical = mapping[fit.season][rows['CLUSTER'].to_numpy()]
+        frames.append(pd.DataFrame({
+            player_key: rows[key].to_numpy(),
+            'PLAYER_NAME': rows['PLAYER_NAME'].to_numpy(),
+            'SEASON_ID': fit.season,
+            'CLUSTER': rows['CLUSTER'].to_numpy(),
+            'CANONICAL_CLUSTER': canonical,
+            'ROLE': [roles.get(int(c), "Rol Desconocido") for c in canonical],
+        }))
+    timeline = pd.concat(frames, ignore_index=True).sort_values([player_key, 'SEASON_ID'], kind='mergesort')
+    names = timeline.drop_duplicates(player_key).set_index(player_key)['PLAYER_NAME']
+    wide = timeline.pivot(index=player_key, columns='SEASON_ID', values='ROLE')
+    wide.insert(0, 'PLAYER_NAME', names.reindex(wide.index))
+    return timeline.reset_index(drop=True), wide
+
+
+def role_transitions(timeline, player_key='PLAYER_ID'):
+    """
+    Cambios de rol entre temporadas consecutivas de cada jugador.
+
+    Returns:
+        tuple: (DataFrame con los cambios, matriz de transición rol anterior x rol nuevo)
+    """
+    previous = timeline.groupby(player_key)[['SEASON_ID', 'ROLE']].shift()
+    transitions = timeline.assign(PREV_SEASON_ID=previous['SEASON_ID'], PREV_ROLE=previous['ROLE']).dropna(subset=['PREV_ROLE'])
+    matrix = pd.crosstab(transitions['PREV_ROLE'], transitions['ROLE'])
+    changes = transitions[transitions['PREV_ROLE'] != transitions['ROLE']]
+    return changes[[player_key, 'PLAYER_NAME', 'PREV_SEASON_ID', 'SEASON_ID', 'PREV_ROLE', 'ROLE']], matrix
+
+
+def _synthetic_season_fits(player_data, stats_columns, n_seasons, n_clusters=5, random_state=42):
+    """Temporadas sintéticas (la liga real con ruido y deriva) ajustadas por separado, para pruebas."""
+    rng = np.random.default_rng(random_state)
+    frames = {}
+    for s in range(n_seasons):
+        season = player_data.copy()
+        drift = 1.0 + 0.01 * s
+        season[stats_columns] = season[stats_columns].to_numpy(dtype=float) * rng.uniform(0.9, 1.1, size=(len(season), len(stats_columns))) * drift
+        frames[f"{2000 + s}-{(2001 + s) % 100:02d}"] = season.sample(frac=1.0, random_state=s) # Orden distinto: IDs distintos
+    return fit_seasons(frames, stats_columns, n_clusters)
+
+
+def _best_ms(func, repeat):
+    """Mejor tiempo en ms de `repeat` ejecuciones (las medidas sueltas por debajo de 1 ms son ruidosas)."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def benchmark_alignment(n_seasons=(5, 20, 100), ks=(4, 5, 6, 7, 8), n_stats=21, repeat=5, random_state=42):
+    """
+    Compara, para cada k, la asignación por permutaciones (todas las temporadas a la vez), un
+    bucle de linear_sum_assignment por temporada y un bucle Python de distancias por pares,
+    sobre centroides sintéticos (permutaciones con ruido de un conjunto base). También mide el
+    pico de memoria de las permutaciones, que crece con k! y justifica MAX_PERMUTATION_K.
+
+    Returns:
+        pd.DataFrame: Tiempos en ms por k y número de temporadas, el método que usa
+        batched_assignment y si los tres coinciden.
+    """
+    import tracemalloc
+
+    rng = np.random.default_rng(random_state)
+    rows = []
+    for k in ks:
+        base = rng.normal(size=(k, n_stats))
+        _permutations(k) # La tabla de permutaciones se construye una vez por k, fuera de la medida
+        for n in n_seasons:
+            true_perm = np.stack([rng.permutation(k) for _ in range(n)])
+            centroids = base[true_perm] + rng.normal(scale=0.1, size=(n, k, n_stats))
+            distances = pairwise_sq_distances(centroids, base)
+
+            def python_loop():
+                result = np.empty((n, k), dtype=np.int64)
+                for s in range(n):
+                    pair_distances = [[sum((centroids[s, i, d] - base[j, d]) ** 2 for d in range(n_stats)) for j in range(k)] for i in range(k)]
+                    result[s] = linear_sum_assignment(np.array(pair_distances))[1]
+                return result
+
+            tracemalloc.start()
+            permuted = _permutation_assignment(distances)
+            permutation_peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+            tracemalloc.stop()
+            permutation_ms = _best_ms(lambda: _permutation_assignment(distances), repeat)
+            looped = np.stack([linear_sum_assignment(d)[1] for d in distances])
+            lsa_ms = _best_ms(lambda: np.stack([linear_sum_assignment(d)[1] for d in distances]), repeat)
+            python = python_loop()
+            python_ms = _best_ms(python_loop, 1)
+
+            # Correcto si el clúster i de cada temporada vuelve a su clúster base true_perm[s, i]
+            expected = true_perm
+            rows.append({
+                'k': k, 'seasons': n, 'permutation_ms': permutation_ms, 'permutation_peak_mb': permutation_peak_mb,
+                'lsa_loop_ms': lsa_ms, 'python_loop_ms': python_ms,
+                'used': 'permutations' if k <= MAX_PERMUTATION_K else 'lsa',
+                'correct': bool(np.array_equal(permuted, expected) and np.array_equal(looped, expected) and np.array_equal(python, expected)),
+            })
+    results = pd.DataFrame(rows)
+    print("\nAlineación de centroides entre temporadas:")
+    print(results.round(2).to_string(index=False))
+    return results
+
+
+if __name__ == '__main__':
+    import os
+    from nba_career_store import load_career_store
+
+    filepath = 'nba_active_player_stats_2023-24_Regular_Season_100min.xlsx'
+    clustering_stats_columns = [
+        'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT',
+        'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB', 'AST', 'STL',
+        'BLK', 'TOV', 'PF', 'PTS', 'GP', 'GS'
+    ]
+
+    career_store = load_career_store('career_store') if os.path.exists('career_store') else None
+    if career_store is not None:
+        # Temporadas reales desde el almacén de carreras (nba_career_store)
+        stats_for_clustering, player_data, player_names = career_store.clustering_input(clustering_stats_columns)
+        seasons = sorted(player_data['SEASON_ID'].unique())[-10:]
+        season_fits = fit_seasons({s: player_data[player_data['SEASON_ID'] == s] for s in seasons}, clustering_stats_columns)
+    else:
+        print("No hay almacén de carreras: se usan temporadas sintéticas a partir del dataset.")
+        season_fits = _synthetic_season_fits(pd.read_excel(filepath), clustering_stats_columns, n_seasons=6)
+
+    alignment = align_seasons(season_fits)
+    print(f"Alineación en {alignment['elapsed_ms']:.2f} ms; coste por temporada: "
+          + ", ".join(f"{season}: {cost:.3f}" for season, cost in alignment['cost'].items()))
+    timeline, wide_timeline = role_timeline(season_fits, alignment)
+    print(wide_timeline.head(10).to_string())
+    changes, transition_matrix = role_transitions(timeline)
+    print(f"\n{len(changes)} cambios de rol entre temporadas consecutivas:")
+    print(transition_matrix.to_string())
+
+    benchmark_alignment()
@@ -0,0 +1,313 @@
+import pandas as pd
+import numpy as np
+import os
+import io
+import time
+import contextlib
+from nba_data_processor import load_and_preprocess_data, scale_data, perform_kmeans_clustering
+from nba_player_analyzer import assign_cluster_roles
+from nba_model_runtime import ClusterScorer
+from nba_league_snapshot import build_league_snapshot
+
+# Modo vigilancia: cuando llega un dataset actualizado, solo se recalcula lo que cambió.
+# Cada fila se identifica por PLAYER_ID (más el equipo: un jugador traspasado tiene una fila
+# por equipo y otra 'TOT') y se compara por un hash de su contenido. El modelo (escalador y
+# centroides) queda fijo entre actualizaciones: las filas nuevas o cambiadas se reasignan con
+# ClusterScorer y las medias por clúster se actualizan con sumas y conteos acumulados.
+
+
+def row_keys(player_data):
+    """Clave estable de cada fila: PLAYER_ID, más el equipo si el dataset lo incluye."""
+    keys = player_data['PLAYER_ID'].astype(str)
+    if 'TEAM_ABBREVIATION' in player_data.columns:
+        keys = keys + '|' + player_data['TEAM_ABBREVIATION'].astype(str)
+    return keys
+
+
+def row_hashes(player_data, stats_columns):
+    """
+    Hash del contenido de cada fila (nombre y estadísticas), indexado por la clave de fila.
+
+    Returns:
+        pd.Series: Hash uint64 de cada fila.
+    """
+    hash_columns = [col for col in ['PLAYER_NAME'] + list(stats_columns) if col in player_data.columns]
+    hashes = pd.util.hash_pandas_object(player_data[hash_columns], index=False)
+    return pd.Series(hashes.to_numpy(), index=row_keys(player_data).to_numpy())
+
+
+def diff_rows(old_hashes, new_hashes):
+    """
+    Compara dos conjuntos de hashes de fila.
+
+    Returns:
+        dict: Claves 'added', 'removed' y 'changed' (listas de claves de fila).
+    """
+    old_keys, new_keys = set(old_hashes.index), set(new_hashes.index)
+    common = list(old_keys & new_keys)
+    changed = old_hashes.loc[common].to_numpy() != new_hashes.loc[common].to_numpy()
+    return {
+        'added': sorted(new_keys - old_keys),
+        'removed': sorted(old_keys - new_keys),
+        'changed': sorted(np.asarray(common, dtype=object)[changed].tolist()),
+    }
+
+
+class IncrementalLeagueState:
+    """
+    Estado de la liga entre actualizaciones del dataset: datos con clúster, hashes de fila,
+    sumas y conteos por clúster (para las medias), roles, asignador e instantánea.
+    """
+
+    def __init__(self, stats_columns, n_clusters=5, report_cache=None, generate_reports=True):
+        """
+        Args:
+            stats_columns (list): Columnas usadas para el clustering.
+            n_clusters (int): K del ajuste completo.
+            report_cache (ReportCache, optional): Caché de reportes; por defecto el de 'report_cache'.
+            generate_reports (bool): Si False, solo se actualiza la instantánea (sin PDFs).
+        """
+        self.stats_columns = list(stats_columns)
+        self.n_clusters = n_clusters
+        self.generate_reports = generate_reports
+        self.report_cache = report_cache
+        self.full_build_s = None
+        self.incremental = False # Solo hay estado por clave de fila válido tras una construcción sin claves duplicadas
+
+    def _regenerate_reports(self, player_names):
+        """Regenera (con el caché, que descarta los que no cambiaron) los reportes de los jugadores indicados."""
+        if not self.generate_reports or not player_names:
+            return {'reports': {'rebuilt': 0, 'skipped': 0}, 'charts': {'rebuilt': 0, 'skipped': 0}}
+        import matplotlib
+        matplotlib.use('Agg')
+        from nba_report_cache import ReportCache, regenerate_league_reports
+        if self.report_cache is None:
+            self.report_cache = ReportCache()
+        self.report_cache.counts = {kind: {'skipped': 0, 'rebuilt': 0} for kind in ['charts', 'reports']}
+        with contextlib.redirect_stdout(io.StringIO()):
+            return regenerate_league_reports(self.snapshot, self.player_data, report_cache=self.report_cache,
+                                             player_names=player_names)
+
+    def _set_means(self):
+        """Recalcula medias y roles a partir de las sumas y conteos acumulados."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            means = self.cluster_sums / self.cluster_counts[:, None]
+        self.cluster_means = pd.DataFrame(means, index=pd.Index(range(len(means)), name='CLUSTER'), columns=self.stats_columns)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.cluster_roles = assign_cluster_roles(self.cluster_means)
+        self.scorer.roles = [self.cluster_roles.get(cluster_id, "Rol Desconocido") for cluster_id in range(len(means))]
+
+    def full_build(self, stats_for_clustering, player_data_cleaned):
+        """
+        Ejecuta el pipeline completo (escalado, clustering, medias, roles, instantánea y reportes).
+
+        Returns:
+            dict: Registro de la construcción.
+        """
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            scaled_stats_df, scaler = scale_data(stats_for_clustering)
+            clusters, kmeans_model = perform_kmeans_clustering(scaled_stats_df, self.n_clusters)
+        self.scorer = ClusterScorer(scaler.mean_, scaler.scale_, kmeans_model.cluster_centers_, self.stats_columns,
+                                    ["Rol Desconocido"] * self.n_clusters)
+
+        self.player_data = player_data_cleaned.copy()
+        self.player_data['CLUSTER'] = clusters
+        self.hashes = row_hashes(self.player_data, self.stats_columns)
+        # Con claves duplicadas los hashes y posiciones por clave son ambiguos: la próxima
+        # actualización también será una construcción completa
+        self.incremental = not self.hashes.index.has_duplicates
+        values = self.player_data[self.stats_columns].to_numpy(dtype=float)
+        self.cluster_sums = np.zeros((self.n_clusters, len(self.stats_columns)))
+        np.add.at(self.cluster_sums, clusters, values)
+        self.cluster_counts = np.bincount(clusters, minlength=self.n_clusters).astype(float)
+        self._set_means()
+
+        self.snapshot = build_league_snapshot(self.player_data, self.cluster_means, self.cluster_roles, self.stats_columns)
+        report_counts = self._regenerate_reports(list(dict.fromkeys(self.player_data['PLAYER_NAME'])))
+        self.full_build_s = time.perf_counter() - start
+
+        log = {'mode': 'full', 'rows': len(self.player_data), 'rescored': len(self.player_data),
+               'reports': report_counts['reports'], 'elapsed_s': self.full_build_s}
+        print(f"[watch] Construcción completa: {len(self.player_data)} filas, "
+              f"{report_counts['reports']['rebuilt']} reportes generados en {self.full_build_s:.2f} s")
+        return log
+
+    def apply_update(self, stats_for_clustering, player_data_cleaned):
+        """
+        Aplica un dataset actualizado recalculando solo lo afectado: reasigna las filas nuevas
+        o cambiadas, actualiza las sumas por clúster, recalcula medias y roles, reconstruye la
+        instantánea y regenera los reportes de los jugadores afectados.
+
+        Returns:
+            dict: Registro del trabajo incremental frente a una reconstrucción completa.
+        """
+        start = time.perf_counter()
+        new_data = player_data_cleaned.copy()
+        new_hashes = row_hashes(new_data, self.stats_columns)
+        if new_hashes.index.has_duplicates:
+            print("[watch] Aviso: claves de fila duplicadas en el dataset nuevo, se hace una construcción completa.")
+            return self.full_build(stats_for_clustering, player_data_cleaned)
+        if not self.incremental:
+            print("[watch] El estado anterior no admite actualización incremental, se hace una construcción completa.")
+            return self.full_build(stats_for_clustering, player_data_cleaned)
+        diff = diff_rows(self.hashes, new_hashes)
+        if not any(diff.values()):
+            print("[watch] El archivo cambió pero ninguna fila es distinta; no hay nada que recalcular.")
+            return {'mode': 'noop', 'rows': len(new_data), 'rescored': 0, 'elapsed_s': time.perf_counter() - start}
+
+        old_keys = row_keys(self.player_data)
+        old_positions = pd.Series(np.arange(len(self.player_data)), index=old_keys.to_numpy())
+        new_keys = row_keys(new_data)
+        new_positions = pd.Series(np.arange(len(new_data)), index=new_keys.to_numpy())
+        old_values = self.player_data[self.stats_columns].to_numpy(dtype=float)
+        old_clusters = self.player_data['CLUSTER'].to_numpy()
+        new_values = new_data[self.stats_columns].to_numpy(dtype=float)
+
+        # Quitar de las sumas las filas eliminadas o cambiadas (con su clúster anterior)
+        outgoing = old_positions.loc[diff['removed'] + diff['changed']].to_numpy()
+        np.subtract.at(self.cluster_sums, old_clusters[outgoing], old_values[outgoing])
+        np.subtract.at(self.cluster_counts, old_clusters[outgoing], 1.0)
+
+        # Reasignar solo las filas nuevas o cambiadas y sumarlas con su clúster nuevo
+        incoming = new_positions.loc[diff['added'] + diff['changed']].to_numpy()
+        incoming_clusters = self.scorer.assign_batch(new_values[incoming])
+        np.add.at(self.cluster_sums, incoming_clusters, new_values[incoming])
+        np.add.at(self.cluster_counts, incoming_clusters, 1.0)
+
+        # Las filas sin cambios conservan su clúster
+        new_clusters = np.empty(len(new_data), dtype=old_clusters.dtype)
+        unchanged = np.setdiff1d(np.arange(len(new_data)), incoming)
+        new_clusters[unchanged] = old_clusters[old_positions.loc[new_keys.to_numpy()[unchanged]].to_numpy()]
+        new_clusters[incoming] = incoming_clusters
+
+        previous_means = self.cluster_means.copy()
+        previous_roles = dict(self.cluster_roles)
+        self._set_means()
+        touched_clusters = sorted(set(old_clusters[outgoing].tolist()) | set(incoming_clusters.tolist()))
+        role_changes = [c for c in self.cluster_roles if self.cluster_roles[c] != previous_roles.get(c)]
+
+        new_data['CLUSTER'] = new_clusters
+        self.player_data = new_data
+        self.hashes = new_hashes
+        self.snapshot = build_league_snapshot(self.player_data, self.cluster_means, self.cluster_roles, self.stats_columns)
+
+        # Afectados: las filas cambiadas y todos los jugadores de los clústeres cuya media o rol cambió
+        # (su reporte muestra la media del clúster). El caché descarta los que quedaron iguales.
+        means_changed = [c for c in touched_clusters
+                         if not np.allclose(previous_means.loc[c].to_numpy(), self.cluster_means.loc[c].to_numpy(), equal_nan=True)]
+        affected_mask = np.isin(new_clusters, means_changed + role_changes)
+        affected_mask[incoming] = True
+        affected_players = list(dict.fromkeys(new_data['PLAYER_NAME'].to_numpy()[affected_mask]))
+        report_counts = self._regenerate_reports(affected_players)
+        elapsed = time.perf_counter() - start
+
+        log = {
+            'mode': 'incremental',
+            'rows': len(new_data),
+            'added': len(diff['added']),
+            'removed': len(diff['removed']),
+            'changed': len(diff['changed']),
+            'rescored': len(incoming),
+            'clusters_updated': means_changed,
+            'role_changes': role_changes,
+            'affected_players': len(affected_players),
+            'reports': report_counts['reports'],
+            'elapsed_s': elapsed,
+            'full_build_s': self.full_build_s,
+        }
+        print(f"[watch] Actualización incremental: +{log['added']} -{log['removed']} ~{log['changed']} filas; "
+              f"{log['rescored']}/{log['rows']} reasignadas, clústeres actualizados {means_changed}, "
+              f"cambios de rol {role_changes}")
+        print(f"[watch] Reportes: {report_counts['reports']['rebuilt']} regenerados, {report_counts['reports']['skipped']} "
+              f"sin cambios (de {self.player_data['PLAYER_NAME'].nunique()} jugadores). "
+              f"Tiempo {elapsed:.2f} s frente a {self.full_build_s:.2f} s de la construcción completa")
+        return log
+
+
+def _file_signature(filepath):
+    """(mtime, tamaño) del archivo, o None si no existe."""
+    try:
+        stat = os.stat(filepath)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def watch_dataset(filepath, stats_columns, n_clusters=5, poll_interval=5.0, max_updates=None, generate_reports=True):
+    """
+    Vigila el archivo del dataset y, cada vez que cambia, aplica la actualización incremental.
+    Un cambio solo se procesa cuando el archivo deja de cambiar entre dos sondeos (escritura terminada).
+
+    Args:
+        filepath (str): Ruta del dataset (Excel).
+        stats_columns (list): Columnas usadas para el clustering.
+        n_clusters (int): K del ajuste completo inicial.
+        poll_interval (float): Segundos entre sondeos.
+        max_updates (int, optional): Termina tras este número de actualizaciones (None = sin fin).
+        generate_reports (bool): Si False, solo se mantiene la instantánea.
+
+    Returns:
+        list: Registros de cada construcción o actualización.
+    """
+    stats_for_clustering, player_data_cleaned, _ = load_and_preprocess_data(filepath, stats_columns)
+    if stats_for_clustering is None:
+        return []
+    state = IncrementalLeagueState(list(stats_for_clustering.columns), n_clusters=n_clusters, generate_reports=generate_reports)
+    logs = [state.full_build(stats_for_clustering, player_data_cleaned)]
+    last_signature = _file_signature(filepath)
+    print(f"[watch] Vigilando '{filepath}' cada {poll_interval} s (Ctrl+C para salir)...")
+
+    try:
+        while max_updates is None or len(logs) - 1 < max_updates:
+            time.sleep(poll_interval)
+            signature = _file_signature(filepath)
+            if signature is None or signature == last_signature:
+                continue
+            time.sleep(poll_interval)
+            if _file_signature(filepath) != signature:
+                continue # Aún se está escribiendo; se vuelve a mirar en el siguiente sondeo
+            last_signature = signature
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                stats_for_clustering, player_data_cleaned, _ = load_and_preprocess_data(filepath, stats_columns)
+            if stats_for_clustering is None:
+                print(f"[watch] Error: no se pudo cargar '{filepath}', se mantiene el estado anterior.")
+                continue
+            if list(stats_for_clustering.columns) != state.stats_columns:
+                print("[watch] Las columnas del dataset cambiaron; se hace una construcción completa.")
+                logs.append(state.full_build(stats_for_clustering, player_data_cleaned))
+            else:
+                logs.append(state.apply_update(stats_for_clustering, player_data_cleaned))
+    except KeyboardInterrupt:
+        print("\n[watch] Vigilancia detenida.")
+    return logs
+
+
+if __name__ == '__main__':
+    import sys
+
+    filepath = 'nba_active_player_stats_2023-24_Regular_Season_100min.xlsx'
+    clustering_stats_columns = [
+        'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT',
+        'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB', 'AST', 'STL',
+        'BLK', 'TOV', 'PF', 'PTS', 'GP', 'GS'
+    ]
+
+    if len(sys.argv) > 1 and sys.argv[1] == '--watch':
+        watch_dataset(filepath, clustering_stats_columns)
+    else:
+        # Demostración sin esperar a un archivo nuevo: se simula una actualización con tres jugadores
+        stats_for_clustering, player_data_cleaned, player_names = load_and_preprocess_data(filepath, clustering_stats_columns)
+        if stats_for_clustering is not None:
+            state = IncrementalLeagueState(clustering_stats_columns)
+            state.full_build(stats_for_clustering, player_data_cleaned)
+
+            updated = player_data_cleaned.copy()
+            updated.loc[updated.index[:3], ['GP', 'MIN', 'PTS']] += [2, 60, 40]
+            log = state.apply_update(updated[clustering_stats_columns], updated)
+
+            expected_means = state.player_data.groupby('CLUSTER')[clustering_stats_columns].mean()
+            assert np.allclose(expected_means.to_numpy(), state.cluster_means.loc[expected_means.index].to_numpy()), \
+                "Las medias incrementales no coinciden con el recálculo completo"
+            print("Medias incrementales verificadas contra groupby().mean().")
@@ -0,0 +1,166 @@
+import pandas as pd
+import numpy as np
+import time
+from nba_player_analyzer import apply_improvement_rules
+
+# Simulación "¿y si...?": aplica escenarios de mejora a las áreas débiles de todos los
+# jugadores a la vez y reasigna las líneas proyectadas con el escalador y los centroides
+# guardados (ClusterScorer), para estimar la probabilidad de que cada jugador cambie de rol.
+
+# Rangos por defecto de la simulación Monte Carlo: cada (escenario, jugador) toma un valor
+# uniforme en el rango. Las reglas que no aparecen aquí quedan fijas en su valor por defecto.
+# Con los topes fijos (95% del promedio del clúster) la proyección solo acerca al jugador a
+# su propio centroide, así que los topes también varían para permitir superar el promedio.
+DEFAULT_SCENARIO_RANGES = {
+    'pct_gain': (0.0, 0.06),
+    'pct_cap_margin': (0.01, 0.05),
+    'lower_factor': (0.80, 1.0),
+    'volume_factor': (1.0, 1.50),
+    'volume_cap': (0.95, 1.30),
+}
+
+
+def sample_improvement_scenarios(n_scenarios, n_players, scenario_ranges=None, random_state=42):
+    """
+    Genera reglas de mejora aleatorias para cada escenario y jugador.
+
+    Args:
+        n_scenarios (int): Número de escenarios.
+        n_players (int): Número de jugadores.
+        scenario_ranges (dict, optional): {regla: (mínimo, máximo)}. Por defecto, DEFAULT_SCENARIO_RANGES.
+        random_state (int): Semilla.
+
+    Returns:
+        dict: {regla: array (n_escenarios, n_jugadores, 1)} listo para apply_improvement_rules.
+    """
+    rng = np.random.default_rng(random_state)
+    scenario_ranges = scenario_ranges if scenario_ranges is not None else DEFAULT_SCENARIO_RANGES
+    return {rule: rng.uniform(low, high, size=(n_scenarios, n_players, 1)) for rule, (low, high) in scenario_ranges.items()}
+
+
+def simulate_role_transitions(snapshot, scorer, n_scenarios=1000, scenario_ranges=None, chunk_rows=500_000, random_state=42):
+    """
+    Simula `n_scenarios` escenarios de mejora para todos los jugadores de la instantánea y
+    reasigna cada línea proyectada a un clúster.
+
+    Las áreas débiles y los promedios de clúster se leen de la instantánea; solo cambian las
+    reglas de mejora. Los escenarios se procesan por bloques de como máximo `chunk_rows`
+    líneas (escenarios x jugadores) para acotar la memoria.
+
+    Args:
+        snapshot (LeagueSnapshot): Instantánea de la liga (nba_league_snapshot).
+        scorer (ClusterScorer): Asignador con el escalador y los centroides guardados (nba_model_runtime).
+        n_scenarios (int): Número de escenarios Monte Carlo.
+        scenario_ranges (dict, optional): Rangos de las reglas (ver DEFAULT_SCENARIO_RANGES).
+        chunk_rows (int): Máximo de líneas proyectadas por bloque.
+        random_state (int): Semilla.
+
+    Returns:
+        dict: 'players' (DataFrame por jugador: rol actual, rol con la proyección por defecto,
+              probabilidad de cambiar de rol y rol más probable), 'cluster_probabilities'
+              (jugadores x clústeres), 'transition_matrix' (rol actual x rol simulado),
+              'elapsed_s' y 'lines_per_s'.
+    """
+    start = time.perf_counter()
+    stats_columns = snapshot.stats_columns
+    missing = [col for col in scorer.columns if col not in stats_columns]
+    if missing:
+        raise ValueError(f"La instantánea no tiene las columnas del modelo: {', '.join(missing)}")
+    # Una fila por jugador (la primera, como en los reportes)
+    positions = np.array([snapshot.position(name) for name in dict.fromkeys(snapshot.player_names)], dtype=np.int64)
+    names = [snapshot.player_names[p] for p in positions]
+    player_values = np.asarray(snapshot.arrays['player_stats'], dtype=float)[positions]
+    cluster_avg_values = np.asarray(snapshot.arrays['cluster_avg'], dtype=float)[positions]
+    weak_mask = np.asarray(snapshot.arrays['weak_mask'], dtype=bool)[positions]
+    current_clusters = np.asarray(snapshot.arrays['cluster'])[positions]
+    model_order = [stats_columns.index(col) for col in scorer.columns]
+    n_players = len(positions)
+    n_clusters = len(scorer.centroids)
+
+    # Proyección determinista (las reglas fijas de analyze_player_weak_spots)
+    default_projection = apply_improvement_rules(player_values, cluster_avg_values, weak_mask, stats_columns)
+    default_clusters = scorer.assign_batch(np.nan_to_num(default_projection[:, model_order]))
+
+    counts = np.zeros((n_players, n_clusters), dtype=np.int64)
+    rules = sample_improvement_scenarios(n_scenarios, n_players, scenario_ranges, random_state)
+    scenarios_per_chunk = max(1, chunk_rows // max(1, n_players))
+    player_index = np.arange(n_players)
+    for first in range(0, n_scenarios, scenarios_per_chunk):
+        chunk_rules = {rule: values[first:first + scenarios_per_chunk] for rule, values in rules.items()}
+        projected = apply_improvement_rules(player_values[None], cluster_avg_values[None], weak_mask[None],
+                                            stats_columns, chunk_rules) # (escenarios, jugadores, stats)
+        n_chunk = projected.shape[0]
+        labels = scorer.assign_batch(np.nan_to_num(projected[:, :, model_order]).reshape(-1, len(model_order)))
+        np.add.at(counts, (np.tile(player_index, n_chunk), labels), 1)
+
+    cluster_probabilities = counts / n_scenarios
+    roles = np.array(scorer.roles, dtype=object)
+    current_roles = roles[current_clusters]
+    # Probabilidad de cambiar de rol: clústeres distintos con el mismo rol no cuentan como cambio
+    same_role = roles[None, :] == current_roles[:, None]
+    p_role_change = 1.0 - (cluster_probabilities * same_role).sum(axis=1)
+    most_likely = cluster_probabilities.argmax(axis=1)
+
+    players = pd.DataFrame({
+        'PLAYER_NAME': names,
+        'cluster': current_clusters,
+        'role': current_roles,
+        'projected_role': roles[default_clusters],
+        'p_role_change': p_role_change,
+        'most_likely_role': roles[most_likely],
+        'most_likely_p': cluster_probabilities[player_index, most_likely],
+        'weak_areas': weak_mask.sum(axis=1),
+    })
+
+    # Matriz de transición entre roles: promedio de las probabilidades de los jugadores de cada rol actual
+    role_names = list(dict.fromkeys(scorer.roles))
+    role_codes = np.array([role_names.index(role) for role in scorer.roles])
+    role_probabilities = np.zeros((n_players, len(role_names)))
+    np.add.at(role_probabilities.T, role_codes, cluster_probabilities.T)
+    transition_matrix = pd.DataFrame(role_probabilities, columns=role_names).groupby(current_roles).mean()
+    transition_matrix.index.name = 'Rol actual'
+    transition_matrix.columns.name = 'Rol simulado'
+
+    elapsed = time.perf_counter() - start
+    lines = n_scenarios * n_players
+    print(f"Simulación: {n_scenarios} escenarios x {n_players} jugadores ({lines:,} líneas) en {elapsed:.2f} s "
+          f"({lines / elapsed:,.0f} líneas/s)")
+    return {
+        'players': players,
+        'cluster_probabilities': pd.DataFrame(cluster_probabilities, index=names, columns=range(n_clusters)),
+        'transition_matrix': transition_matrix,
+        'elapsed_s': elapsed,
+        'lines_per_s': lines / elapsed,
+    }
+
+
+if __name__ == '__main__':
+    from nba_data_processor import load_and_preprocess_data, scale_data, perform_kmeans_clustering, analyze_clusters
+    from nba_player_analyzer import assign_cluster_roles
+    from nba_league_snapshot import build_league_snapshot
+    from nba_model_runtime import export_cluster_model, load_cluster_model
+
+    filepath = 'nba_active_player_stats_2023-24_Regular_Season_100min.xlsx'
+    clustering_stats_columns = [
+        'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT',
+        'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB', 'AST', 'STL',
+        'BLK', 'TOV', 'PF', 'PTS', 'GP', 'GS'
+    ]
+
+    stats_for_clustering, player_data_cleaned, player_names = load_and_preprocess_data(filepath, clustering_stats_columns)
+
+    if stats_for_clustering is not None:
+        scaled_stats_df, scaler = scale_data(stats_for_clustering)
+        clusters, kmeans_model = perform_kmeans_clustering(scaled_stats_df, 5)
+        player_data_cleaned['CLUSTER'] = clusters
+        cluster_means = analyze_clusters(player_data_cleaned, clustering_stats_columns)
+        cluster_roles = assign_cluster_roles(cluster_means)
+        export_cluster_model(scaler, kmeans_model, clustering_stats_columns, cluster_roles)
+
+        league_snapshot = build_league_snapshot(player_data_cleaned, cluster_means, cluster_roles, clustering_stats_columns)
+        results = simulate_role_transitions(league_snapshot, load_cluster_model(), n_scenarios=2000)
+
+        print("\nProbabilidad de transición entre roles:")
+        print(results['transition_matrix'].round(3).to_string())
+        print("\nJugadores con más probabilidad de cambiar de rol:")
+        print(results['players'].sort_values('p_role_change', ascending=False).head(15).round(3).to_string(index=False))
@@ -0,0 +1,294 @@
+import pandas as pd
+import numpy as np
+import os
+import gc
+import time
+import threading
+import multiprocessing as mp
+from openpyxl import Workbook
+
+# Exportación del libro de la liga en modo write_only de openpyxl: cada hoja se escribe por
+# lotes de filas directamente al archivo, sin construir la hoja en memoria, así que la
+# memoria del exportador no crece con el número de filas (a diferencia de to_excel).
+
+DEFAULT_BATCH_ROWS = 5000
+
+# Hojas del libro de la liga, en orden
+LEAGUE_SHEETS = ['Dataset', 'Medias por clúster', 'Roles', 'Comparaciones', 'Áreas débiles']
+
+
+def _frame_batches(df, batch_rows=DEFAULT_BATCH_ROWS, index=False):
+    """Parte un DataFrame en lotes de filas listas para openpyxl (tipos de Python, None en lugar de NaN)."""
+    if index:
+        df = df.reset_index()
+    for start in range(0, len(df), batch_rows):
+        batch = df.iloc[start:start + batch_rows]
+        yield batch.astype(object).where(batch.notna(), None).to_numpy().tolist()
+
+
+def write_sheet(workbook, title, header, row_batches):
+    """
+    Añade una hoja a un libro write_only escribiéndola lote a lote.
+
+    Args:
+        workbook (openpyxl.Workbook): Libro creado con write_only=True.
+        title (str): Nombre de la hoja.
+        header (list): Cabecera.
+        row_batches (iterable): Lotes (listas de filas) a escribir.
+
+    Returns:
+        int: Filas escritas (sin la cabecera).
+    """
+    sheet = workbook.create_sheet(title=title[:31])
+    sheet.append(list(header))
+    n_rows = 0
+    for batch in row_batches:
+        for row in batch:
+            sheet.append(row)
+        n_rows += len(batch)
+    return n_rows
+
+
+def _comparison_batches(snapshot, teams, batch_players):
+    """Filas de la hoja de comparaciones (formato largo: jugador x estadística), por bloques de jugadores."""
+    stats = np.array(snapshot.stats_columns, dtype=object)
+    n_stats = len(stats)
+    names = np.array(snapshot.player_names, dtype=object)
+    for start in range(0, len(names), batch_players):
+        stop = min(start + batch_players, len(names))
+        n = stop - start
+        columns = [
+            np.repeat(names[start:stop], n_stats),
+            np.repeat(teams[start:stop], n_stats),
+            np.tile(stats, n),
+        ]
+        for field in ['player_stats', 'cluster_avg', 'difference', 'pct_difference', 'projected_stats']:
+            values = np.asarray(snapshot.arrays[field][start:stop], dtype=float).ravel().astype(object)
+            values[pd.isna(values)] = None
+            columns.append(values)
+        columns.append(np.asarray(snapshot.arrays['weak_mask'][start:stop], dtype=bool).ravel())
+        yield np.column_stack(columns).tolist()
+
+
+def _weak_area_batches(snapshot, teams, batch_players):
+    """Filas de la hoja de áreas débiles: una por jugador y estadística débil, con su descripción y drill."""
+    from nba_player_analyzer import describe_weak_area # Import diferido: export_dataframe no necesita el analizador
+
+    drill_keys = snapshot.metadata['drill_keys']
+    for start in range(0, len(snapshot.player_names), batch_players):
+        stop = min(start + batch_players, len(snapshot.player_names))
+        weak_mask = np.asarray(snapshot.arrays['weak_mask'][start:stop], dtype=bool)
+        player_values = np.asarray(snapshot.arrays['player_stats'][start:stop], dtype=float)
+        cluster_avg_values = np.asarray(snapshot.arrays['cluster_avg'][start:stop], dtype=float)
+        drill_codes = np.asarray(snapshot.arrays['drill_codes'][start:stop])
+        rows = []
+        for i, j in zip(*np.nonzero(weak_mask)):
+            stat = snapshot.stats_columns[j]
+            player_value = player_values[i, j].item()
+            cluster_avg_value = cluster_avg_values[i, j].item()
+            rows.append([
+                snapshot.player_names[start + i], teams[start + i], stat, player_value, cluster_avg_value,
+                describe_weak_area(stat, player_value, cluster_avg_value),
+                drill_keys[drill_codes[i, j]] if drill_codes[i, j] >= 0 else None,
+            ])
+        yield rows
+
+
+def export_league_workbook(output_path, player_data_with_clusters, snapshot, cluster_means, cluster_roles,
+                           batch_rows=DEFAULT_BATCH_ROWS):
+    """
+    Exporta en un solo libro el dataset, las medias y roles por clúster, las comparaciones de
+    cada jugador con su clúster y sus áreas débiles, escribiendo por lotes en modo write_only.
+
+    Args:
+        output_path (str): Ruta del .xlsx.
+        player_data_with_clusters (pd.DataFrame): DataFrame de jugadores con la columna 'CLUSTER'.
+        snapshot (LeagueSnapshot): Instantánea de la liga (nba_league_snapshot).
+        cluster_means (pd.DataFrame): Estadísticas promedio por clúster.
+        cluster_roles (dict): Rol de cada clúster.
+        batch_rows (int): Filas por lote.
+
+    Returns:
+        dict: Filas escritas por hoja.
+    """
+    start = time.perf_counter()
+    workbook = Workbook(write_only=True)
+    n_stats = max(1, len(snapshot.stats_columns))
+    batch_players = max(1, batch_rows // n_stats)
+    if 'TEAM_ABBREVIATION' in player_data_with_clusters.columns:
+        teams = player_data_with_clusters.loc[snapshot.row_labels, 'TEAM_ABBREVIATION'].to_numpy(dtype=object)
+    else:
+        teams = np.full(len(snapshot), None, dtype=object)
+
+    means_with_roles = cluster_means.copy()
+    means_with_roles.insert(0, 'ROLE', [cluster_roles.get(c, "Rol Desconocido") for c in cluster_means.index])
+    sizes = player_data_with_clusters['CLUSTER'].value_counts()
+    roles = pd.DataFrame({
+        'CLUSTER': list(cluster_roles.keys()),
+        'ROLE': list(cluster_roles.values()),
+        'PLAYERS': [int(sizes.get(c, 0)) for c in cluster_roles],
+    })
+
+    rows = {}
+    rows['Dataset'] = write_sheet(workbook, 'Dataset', player_data_with_clusters.columns,
+                                  _frame_batches(player_data_with_clusters, batch_rows))
+    rows['Medias por clúster'] = write_sheet(workbook, 'Medias por clúster', ['CLUSTER'] + list(means_with_roles.columns),
+                                             _frame_batches(means_with_roles, batch_rows, index=True))
+    rows['Roles'] = write_sheet(workbook, 'Roles', roles.columns, _frame_batches(roles, batch_rows))
+    rows['Comparaciones'] = write_sheet(
+        workbook, 'Comparaciones',
+        ['PLAYER_NAME', 'TEAM_ABBREVIATION', 'STAT', 'Player Stats', 'Cluster Average', 'Difference',
+         'Percentage Difference', 'Projected', 'Weak'],
+        _comparison_batches(snapshot, teams, batch_players))
+    rows['Áreas débiles'] = write_sheet(
+        workbook, 'Áreas débiles',
+        ['PLAYER_NAME', 'TEAM_ABBREVIATION', 'STAT', 'Player Stats', 'Cluster Average', 'Descripción', 'Drill'],
+        _weak_area_batches(snapshot, teams, batch_players))
+    workbook.save(output_path)
+    print(f"Libro de la liga guardado en: {output_path} ({sum(rows.values()):,} filas en {len(rows)} hojas, "
+          f"{time.perf_counter() - start:.1f} s)")
+    return rows
+
+
+def export_dataframe(df, output_path, sheet_name='Sheet1', batch_rows=DEFAULT_BATCH_ROWS, index=False):
+    """
+    Equivalente a df.to_excel(output_path, sheet_name, index) escribiendo en modo write_only.
+
+    Returns:
+        int: Filas escritas.
+    """
+    workbook = Workbook(write_only=True)
+    header = ([df.index.name or 'index'] if index else []) + [str(col) for col in df.columns]
+    n_rows = write_sheet(workbook, sheet_name, header, _frame_batches(df, batch_rows, index=index))
+    workbook.save(output_path)
+    return n_rows
+
+
+class _RssSampler:
+    """
+    Muestrea el RSS actual en un hilo mientras dura el bloque `with`. A diferencia de
+    ru_maxrss (máximo de toda la vida del proceso), mide solo lo que ocurre dentro del bloque.
+    """
+
+    def __init__(self, interval_s=0.005):
+        from nba_report_renderer import current_rss_mb
+        self._current_rss_mb = current_rss_mb
+        self.interval_s = interval_s
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval_s):
+            self.peak_mb = max(self.peak_mb, self._current_rss_mb())
+
+    def __enter__(self):
+        gc.collect()
+        self.baseline_mb = self.peak_mb = self._current_rss_mb()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, self._current_rss_mb())
+        return False
+
+
+def _synthetic_league_state(player_data_with_clusters, cluster_means, cluster_roles, stats_columns, n_rows, random_state=42):
+    """Liga sintética de `n_rows` jugadores (jugadores reales remuestreados con ruido) y su instantánea."""
+    from nba_league_snapshot import build_league_snapshot
+
+    rng = np.random.default_rng(random_state)
+    synthetic = player_data_with_clusters.iloc[rng.integers(0, len(player_data_with_clusters), size=n_rows)].reset_index(drop=True)
+    synthetic[stats_columns] = synthetic[stats_columns].to_numpy(dtype=float) * rng.uniform(0.8, 1.2, size=(n_rows, len(stats_columns)))
+    synthetic['PLAYER_NAME'] = synthetic['PLAYER_NAME'] + ' #' + pd.Series(np.arange(n_rows)).astype(str)
+    snapshot = build_league_snapshot(synthetic, cluster_means, cluster_roles, stats_columns)
+    return synthetic, snapshot
+
+
+def _benchmark_worker(args):
+    mode, n_rows, player_data_with_clusters, cluster_means, cluster_roles, stats_columns, output_path = args
+    synthetic, snapshot = _synthetic_league_state(player_data_with_clusters, cluster_means, cluster_roles, stats_columns, n_rows)
+    with _RssSampler() as rss:
+        start = time.perf_counter()
+        if mode == 'streaming':
+            export_league_workbook(output_path, synthetic, snapshot, cluster_means, cluster_roles)
+        else:
+            # Camino actual: un DataFrame por hoja y to_excel con el escritor por defecto
+            comparisons = pd.DataFrame({
+                'PLAYER_NAME': np.repeat(snapshot.player_names, len(snapshot.stats_columns)),
+                'STAT': np.tile(snapshot.stats_columns, len(snapshot)),
+                **{field: np.asarray(snapshot.arrays[field], dtype=float).ravel()
+                   for field in ['player_stats', 'cluster_avg', 'difference', 'pct_difference', 'projected_stats']},
+                'Weak': np.asarray(snapshot.arrays['weak_mask'], dtype=bool).ravel(),
+            })
+            weak = comparisons[comparisons['Weak']]
+            with pd.ExcelWriter(output_path) as writer:
+                synthetic.to_excel(writer, sheet_name='Dataset', index=False)
+                cluster_means.to_excel(writer, sheet_name='Medias por clúster')
+                pd.Series(cluster_roles, name='ROLE').to_excel(writer, sheet_name='Roles')
+                comparisons.to_excel(writer, sheet_name='Comparaciones', index=False)
+                weak.to_excel(writer, sheet_name='Áreas débiles', index=False)
+        elapsed = time.perf_counter() - start
+    size_mb = os.path.getsize(output_path) / 2**20
+    os.remove(output_path)
+    return {'mode': mode, 'rows': n_rows, 'seconds': elapsed, 'baseline_rss_mb': rss.baseline_mb,
+            'peak_rss_mb': rss.peak_mb, 'file_mb': size_mb}
+
+
+def benchmark_workbook_export(player_data_with_clusters, cluster_means, cluster_roles, stats_columns,
+                              sizes=(10_000, 100_000), modes=('to_excel', 'streaming'), max_to_excel_rows=20_000):
+    """
+    Compara el tiempo y el pico de RSS de exportar el libro de la liga con to_excel y con el
+    exportador por lotes. Cada medición se hace en un proceso nuevo; 'baseline_rss_mb' es el
+    RSS actual con los datos ya construidos y 'peak_rss_mb' el máximo muestreado durante la
+    exportación, así que 'export_rss_mb' es la memoria que añade la propia exportación.
+    to_excel necesita del orden de 85 KB de RAM por jugador (toda la hoja de comparaciones en
+    memoria), así que por encima de `max_to_excel_rows` no se ejecuta.
+
+    Returns:
+        pd.DataFrame: Una fila por (modo, tamaño).
+    """
+    context = mp.get_context('spawn')
+    results = []
+    for n_rows in sizes:
+        for mode in modes:
+            if mode == 'to_excel' and n_rows > max_to_excel_rows:
+                print(f"to_excel omitido con {n_rows:,} jugadores (max_to_excel_rows={max_to_excel_rows:,}).")
+                continue
+            args = (mode, n_rows, player_data_with_clusters, cluster_means, cluster_roles, stats_columns,
+                    f'benchmark_{mode}_{n_rows}.xlsx')
+            with context.Pool(1) as pool:
+                results.append(pool.apply(_benchmark_worker, (args,)))
+    results = pd.DataFrame(results)
+    results['export_rss_mb'] = results['peak_rss_mb'] - results['baseline_rss_mb']
+    print("\nExportación del libro de la liga:")
+    print(results.round(2).to_string(index=False))
+    return results
+
+
+if __name__ == '__main__':
+    from nba_data_processor import load_and_preprocess_data, scale_data, perform_kmeans_clustering, analyze_clusters
+    from nba_player_analyzer import assign_cluster_roles
+    from nba_league_snapshot import build_league_snapshot
+
+    filepath = 'nba_active_player_stats_2023-24_Regular_Season_100min.xlsx'
+    clustering_stats_columns = [
+        'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT',
+        'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB', 'AST', 'STL',
+        'BLK', 'TOV', 'PF', 'PTS', 'GP', 'GS'
+    ]
+
+    stats_for_clustering, player_data_cleaned, player_names = load_and_preprocess_data(filepath, clustering_stats_columns)
+
+    if stats_for_clustering is not None:
+        scaled_stats_df, scaler = scale_data(stats_for_clustering)
+        clusters, kmeans_model = perform_kmeans_clustering(scaled_stats_df, 5)
+        player_data_cleaned['CLUSTER'] = clusters
+        cluster_means = analyze_clusters(player_data_cleaned, clustering_stats_columns)
+        cluster_roles = assign_cluster_roles(cluster_means)
+
+        league_snapshot = build_league_snapshot(player_data_cleaned, cluster_means, cluster_roles, clustering_stats_columns)
+        export_league_workbook('nba_league_workbook.xlsx', player_data_cleaned, league_snapshot, cluster_means, cluster_roles)
+
+        benchmark_workbook_export(player_data_cleaned, cluster_means, cluster_roles, clustering_stats_columns)